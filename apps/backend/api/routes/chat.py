@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict
 from semantic_kernel.contents.chat_history import ChatHistory
 from services.ai import ChatService
+from services.ai.orchestration.result_cache import get_tool_result_cache
 from core.oauth2 import validate_docusign_access
 from schemas import ChatMessage, ChatResponse
 
@@ -41,3 +42,9 @@ async def clear_chat_history(auth_info: dict = Depends(validate_docusign_access)
         raise HTTPException(
             status_code=500, detail=f"Error clearing chat history: {str(e)}"
         )
+
+
+@router.get("/cache")
+async def tool_cache_stats(auth_info: dict = Depends(validate_docusign_access)):
+    """Hit and miss counters and size of the contract tool result cache"""
+    return get_tool_result_cache().stats()
@@ -8,6 +8,7 @@ from services.docusign import EnvelopeService
 from services.document import DocumentDownloader
 from services.notification import WebhookService
 from services.ai import PDFProcessor
+from services.ai.orchestration.contract_service import get_contract_service
 from schemas import (
     UserSchema,
     EnvelopeSchema,
@@ -125,6 +126,18 @@ async def get_json_files(auth_info: dict = Depends(validate_docusign_access)):
         )
 
 
+@router.get("/portfolio")
+async def get_portfolio(auth_info: dict = Depends(validate_docusign_access)):
+    """Portfolio statistics of the authenticated account, updated on ingestion"""
+    try:
+        service = get_contract_service(auth_info["account_id"])
+        return await service.cached_call("get_portfolio_overview")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error retrieving portfolio statistics: {str(e)}"
+        )
+
+
 @router.get("/{envelope_id}/documents", response_model=EnvelopeDocumentsSchema)
 async def list_envelope_documents(
     envelope_id: str, auth_info: dict = Depends(validate_docusign_access)
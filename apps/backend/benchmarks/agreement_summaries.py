@@ -0,0 +1,233 @@
+"""
+Benchmark of agreement queries reading stored summaries against the queries
+that rebuilt agreements from the graph.
+
+Writes a synthetic account to Neo4j, then runs every agreement query of the
+contract tools both ways with the same random parameters: the previous
+queries matching parties, roles and countries of incorporation and
+collecting them, and the current ones reading the summary stored on each
+agreement. Reports mean and p95 latency, the rows returned and the rows of
+the widest step of the query plan, where collecting multiplies rows. The
+synthetic account is deleted afterwards.
+
+Needs a running Neo4j configured through the usual NEO4J_* variables.
+
+Usage:
+    python -m benchmarks.agreement_summaries [--agreements 20000] \
+        [--organizations 500] [--queries 200] [--page-size 21]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from services.ai.neo4j.neo4j_indexer import Neo4jIndexer
+from services.ai.neo4j.schema import SchemaManager
+from services.ai.storage import Neo4jContractStore
+from benchmarks.ingest_workers import (
+    CLAUSE_TYPES,
+    DELETE_ACCOUNT_STATEMENT,
+    DELETE_ORGANIZATIONS_STATEMENT,
+    synthetic_corpus,
+)
+
+# Agreement lists before summaries: parties, roles, countries and states
+# collected from the graph for every agreement of the page
+PARTIES_RETURN = """
+        MATCH (country:Country)-[i:INCORPORATED_IN]-(p:Organization)-[r:IS_PARTY_TO]-(a)
+        RETURN a as agreement, collect(p) as parties, collect(r) as roles, collect(country) as countries, collect(i) as states
+        ORDER BY agreement.envelope_id
+"""
+
+COLLECTED_QUERIES = {
+    "get_contract": """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement {envelope_id: $envelope_id})
+        MATCH (a)-[:HAS_CLAUSE]->(clause:ContractClause)
+        WITH a, collect(clause) as clauses
+        MATCH (country:Country)-[i:INCORPORATED_IN]-(p:Organization)-[r:IS_PARTY_TO]-(a)
+        WITH a, clauses, collect(p) as parties, collect(country) as countries, collect(r) as roles, collect(i) as states
+        RETURN a as agreement, clauses, parties, countries, roles, states
+    """,
+    "get_contracts_by_party": """
+        CALL db.index.fulltext.queryNodes('organizationNameTextIndex', $organization_name)
+        YIELD node AS o, score
+        WHERE EXISTS { (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)<-[:IS_PARTY_TO]-(o) }
+        WITH o, score
+        ORDER BY score DESC
+        LIMIT 1
+        WITH o
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)<-[:IS_PARTY_TO]-(o)
+        WHERE $after IS NULL OR a.envelope_id > $after[0]
+        WITH DISTINCT a
+        ORDER BY a.envelope_id
+        LIMIT $limit
+    """
+    + PARTIES_RETURN,
+    "get_contracts_with_clause_type": """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)
+        WHERE ($after IS NULL OR a.envelope_id > $after[0])
+            AND EXISTS { (a)-[:HAS_CLAUSE]->(:ContractClause {type: $clause_type}) }
+        WITH a
+        ORDER BY a.envelope_id
+        LIMIT $limit
+    """
+    + PARTIES_RETURN,
+    "get_contracts_without_clause_type": """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)
+        WHERE ($after IS NULL OR a.envelope_id > $after[0])
+            AND NOT EXISTS { (a)-[:HAS_CLAUSE]->(:ContractClause {type: $clause_type}) }
+        WITH a
+        ORDER BY a.envelope_id
+        LIMIT $limit
+    """
+    + PARTIES_RETURN,
+}
+
+SUMMARY_QUERIES = {
+    "get_contract": Neo4jContractStore.GET_CONTRACT_BY_ID_QUERY,
+    "get_contracts_by_party": Neo4jContractStore.GET_CONTRACTS_BY_PARTY_NAME,
+    "get_contracts_with_clause_type": Neo4jContractStore.GET_CONTRACT_WITH_CLAUSE_TYPE_QUERY,
+    "get_contracts_without_clause_type": Neo4jContractStore.GET_CONTRACT_WITHOUT_CLAUSE_TYPE_QUERY,
+}
+
+
+def parameter_factories(
+    account_id: str, args
+) -> Dict[str, Callable[[random.Random], dict]]:
+    """Random parameters of each query, given a random generator"""
+
+    def page(rng: random.Random) -> dict:
+        # Start pages at random agreements, as later pages of a listing would
+        after = f"{account_id}-{rng.randrange(args.agreements)}"
+        return {"after": rng.choice([None, [after]]), "limit": args.page_size}
+
+    return {
+        "get_contract": lambda rng: {
+            "envelope_id": f"{account_id}-{rng.randrange(args.agreements)}"
+        },
+        "get_contracts_by_party": lambda rng: {
+            "organization_name": (
+                f'"{account_id} Org {rng.randrange(args.organizations)}"'
+            ),
+            **page(rng),
+        },
+        "get_contracts_with_clause_type": lambda rng: {
+            "clause_type": rng.choice(CLAUSE_TYPES),
+            **page(rng),
+        },
+        "get_contracts_without_clause_type": lambda rng: {
+            "clause_type": rng.choice(CLAUSE_TYPES),
+            **page(rng),
+        },
+    }
+
+
+async def timed(
+    indexer: Neo4jIndexer, query: str, parameters: List[dict]
+) -> Tuple[List[float], int]:
+    """Latencies in milliseconds and number of records returned"""
+    latencies = []
+    returned = 0
+    for params in parameters:
+        started = time.perf_counter()
+        records, _, _ = await indexer.driver.execute_query(
+            query, params, database_=indexer.database
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        returned += len(records)
+    return latencies, returned
+
+
+async def profiled_rows(indexer: Neo4jIndexer, query: str, params: dict) -> int:
+    """Rows of the widest operator of the query plan"""
+    _, summary, _ = await indexer.driver.execute_query(
+        f"PROFILE {query}", params, database_=indexer.database
+    )
+
+    def widest(plan: dict) -> int:
+        return max(
+            [int(plan.get("rows", 0))]
+            + [widest(child) for child in plan.get("children", [])]
+        )
+
+    return widest(summary.profile or {})
+
+
+async def benchmark(args):
+    account_id = f"benchmark-{uuid.uuid4().hex[:8]}"
+    indexer = Neo4jIndexer(batch_size=args.batch_size)
+    try:
+        await SchemaManager(indexer.driver, indexer.database).ensure_current()
+
+        items = []
+        corpus = synthetic_corpus(account_id, args.agreements, args.organizations)
+        for i, json_data in enumerate(corpus):
+            envelope_id = f"{account_id}-{i}"
+            indexer._tag_agreement(account_id, envelope_id, json_data)
+            items.append((envelope_id, Path(f"{envelope_id}.json"), json_data))
+        started = time.perf_counter()
+        await indexer._write_items(items)
+        print(
+            f"{args.agreements} agreements, {args.organizations} organizations, "
+            f"written in {time.perf_counter() - started:.1f}s"
+        )
+
+        factories = parameter_factories(account_id, args)
+        print(f"{args.queries} queries each, pages of {args.page_size}")
+        print(
+            f"{'query':<34} {'reads':<10} {'mean ms':>8} {'p95 ms':>8} "
+            f"{'rows':>6} {'widest':>7}"
+        )
+        for name, factory in factories.items():
+            rng = random.Random(args.seed)
+            parameters = [
+                {"account_id": account_id, **factory(rng)} for _ in range(args.queries)
+            ]
+            for reads, query in (
+                ("collected", COLLECTED_QUERIES[name]),
+                ("summary", SUMMARY_QUERIES[name]),
+            ):
+                # Warm up the plan cache before timing
+                await timed(indexer, query, parameters[:5])
+                latencies, returned = await timed(indexer, query, parameters)
+                widest = await profiled_rows(indexer, query, parameters[0])
+                print(
+                    f"{name:<34} {reads:<10} {np.mean(latencies):>8.2f} "
+                    f"{np.percentile(latencies, 95):>8.2f} "
+                    f"{returned / len(parameters):>6.1f} {widest:>7}"
+                )
+    finally:
+        await indexer.driver.execute_query(
+            DELETE_ACCOUNT_STATEMENT, account_id=account_id, database_=indexer.database
+        )
+        await indexer.driver.execute_query(
+            DELETE_ORGANIZATIONS_STATEMENT,
+            prefix=f"{account_id} Org ",
+            database_=indexer.database,
+        )
+        await indexer.close()
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--agreements", type=int, default=20000)
+    parser.add_argument("--organizations", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    # Tools fetch one agreement past the page to know if another page follows
+    parser.add_argument("--page-size", type=int, default=21)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
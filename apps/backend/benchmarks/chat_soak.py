@@ -0,0 +1,154 @@
+"""
+Soak test of the chat backend under sustained load from many accounts.
+
+Sends messages for accounts drawn at random from a pool larger than the
+contract service cache, so services are created, reused and evicted
+throughout. Each message builds the account's kernel and runs a contract
+query, like a chat turn calling one tool. Every report prints the cached
+services, database connections and memory, which should level off rather
+than grow with the number of messages.
+
+With --llm, messages go through the full chat completion instead, which
+calls the OpenAI API.
+
+Needs a running Neo4j configured through the usual NEO4J_* variables.
+
+Usage:
+    python -m benchmarks.chat_soak [--messages 20000] [--accounts 1000] \
+        [--concurrency 16] [--report-every 1000] [--llm]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+import tracemalloc
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from schemas import ClauseType
+from services.ai import ChatService
+from services.ai.storage import (
+    Neo4jContractStore,
+    close_contract_stores,
+    get_contract_store,
+)
+
+COUNT_CONNECTIONS_QUERY = """
+CALL dbms.listConnections() YIELD connector
+WHERE connector = 'bolt'
+RETURN count(*) AS connections
+"""
+
+
+def open_sockets() -> Optional[int]:
+    """Sockets open in this process, where /proc is available"""
+    if not os.path.isdir("/proc/self/fd"):
+        return None
+    sockets = 0
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            sockets += os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        except OSError:
+            pass
+    return sockets
+
+
+def resident_mb() -> Optional[float]:
+    """Resident memory of this process in MB, where /proc is available"""
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+async def server_connections() -> Optional[int]:
+    """Bolt connections the server reports, which needs an admin user"""
+    store = get_contract_store()
+    if not isinstance(store, Neo4jContractStore):
+        return None
+    try:
+        records = await store._query(COUNT_CONNECTIONS_QUERY)
+    except Exception:
+        return None
+    return records[0]["connections"]
+
+
+async def send_message(chat_service: ChatService, account_id: str, args):
+    if args.llm:
+        await chat_service.get_chat_response(
+            "Which contracts have a non-compete clause?", account_id
+        )
+        return
+    kernel, _ = await chat_service.initialize_kernel(account_id)
+    plugin = kernel.get_plugin("contract_search")
+    await kernel.invoke(
+        plugin["get_contracts_with_clause_type"],
+        clause_type=random.choice(list(ClauseType)),
+    )
+
+
+async def report(chat_service: ChatService, sent: int, started: float):
+    current, _ = tracemalloc.get_traced_memory()
+    values = [
+        sent,
+        sent / (time.perf_counter() - started),
+        len(chat_service._contract_services),
+        open_sockets(),
+        await server_connections(),
+        resident_mb(),
+        current / 2**20,
+    ]
+    print(
+        " ".join(
+            f"{'-' if value is None else round(value, 1):>{width}}"
+            for value, width in zip(values, [9, 9, 7, 8, 8, 8, 9])
+        )
+    )
+
+
+async def soak(args):
+    chat_service = ChatService()
+    rng = random.Random(0)
+    accounts = [f"soak-{i}" for i in range(args.accounts)]
+    sent = 0
+
+    async def worker():
+        nonlocal sent
+        while sent < args.messages:
+            sent += 1
+            await send_message(chat_service, rng.choice(accounts), args)
+            if sent % args.report_every == 0:
+                await report(chat_service, sent, started)
+
+    tracemalloc.start()
+    print(
+        f"{'messages':>9} {'msg/s':>9} {'cached':>7} {'sockets':>8} "
+        f"{'server':>8} {'rss MB':>8} {'heap MB':>9}"
+    )
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    finally:
+        tracemalloc.stop()
+        await close_contract_stores()
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--report-every", type=int, default=1000)
+    parser.add_argument("--llm", action="store_true")
+    asyncio.run(soak(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Benchmark of excerpt embedding dimensionality on the Neo4j vector index.
+
+Writes an account's extracted agreements to Neo4j and embeds its excerpts and
+a set of query texts once at full dimensionality (through the persistent
+embedding cache). For every candidate dimensionality the excerpt_embedding
+index is rebuilt at that size and filled with the vectors truncated and
+renormalized, which is what the text-embedding-3 models return when asked
+for fewer dimensions. Each query then goes through get_contracts_similar_text
+of the contract service, and the benchmark reports:
+
+- top-k recall against an exact full-dimension search of the account's
+  excerpts
+- size of the vector index on disk, found through SHOW INDEXES in the
+  database directory given by --neo4j-data-dir
+- mean and p95 latency of get_contracts_similar_text
+
+Query embeddings are precomputed, so latencies leave out the embedding API.
+
+Rebuilding the index removes every stored excerpt embedding, so run it
+against a development database configured through the usual NEO4J_*
+variables. At the end the index is rebuilt at the configured dimensionality;
+generate_embeddings then embeds the excerpts again from the embedding cache.
+
+Usage:
+    python -m benchmarks.embedding_dimensions --account-id <id> \
+        [--queries queries.txt] [--dimensions 256 512 1024 1536] \
+        [--neo4j-data-dir /var/lib/neo4j/data]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from neo4j_graphrag.embeddings import Embedder
+
+from core.settings import get_settings
+from services.ai import ContractSearchService
+from services.ai.embeddings import CachedOpenAIEmbeddings, ExcerptEmbeddingPipeline
+from services.ai.neo4j.neo4j_indexer import Neo4jIndexer
+from services.ai.neo4j.schema import SchemaManager
+from services.ai.storage import Neo4jContractStore
+
+# get_contracts_similar_text returns the excerpts closest to the text
+TOP_K = 3
+
+INDEX_QUERY = """
+SHOW INDEXES YIELD id, name, state, indexProvider
+WHERE name = $name
+RETURN id, state, indexProvider
+"""
+
+
+class PrecomputedEmbedder(Embedder):
+    """Embedder returning the vector computed beforehand for each query"""
+
+    def __init__(self, vectors: Dict[str, List[float]]):
+        self.vectors = vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors[text]
+
+
+def load_agreements(base_dir: Path, account_id: str) -> List[Tuple[str, Path, dict]]:
+    """The account's extracted agreements, as ingestion items"""
+    items = []
+    for json_file in sorted((base_dir / "output" / account_id).glob("*/*.json")):
+        with open(json_file, "r") as file:
+            json_data = json.load(file)
+        items.append((json_file.parent.name, json_file, json_data))
+    return items
+
+
+def truncate(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    truncated = vectors[:, :dimensions]
+    return truncated / np.linalg.norm(truncated, axis=1, keepdims=True)
+
+
+def top_k(corpus: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = corpus @ query
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+async def rebuild_index(schema: SchemaManager):
+    """Empty vector index at the schema manager's dimensionality"""
+    await schema.driver.execute_query(
+        schema.DROP_VECTOR_INDEX_STATEMENT, database_=schema.database
+    )
+    # CALL ... IN TRANSACTIONS needs an auto-commit transaction
+    async with schema.driver.session(database=schema.database) as session:
+        result = await session.run(schema.CLEAR_EMBEDDINGS_STATEMENT)
+        await result.consume()
+    await schema.ensure_vector_index()
+
+
+async def index_size(
+    indexer: Neo4jIndexer, data_dir: Optional[Path]
+) -> Optional[float]:
+    """Size in MiB of the vector index files, once the index is online"""
+    await indexer.driver.execute_query(
+        f"CALL db.awaitIndex('{SchemaManager.VECTOR_INDEX_NAME}', 600)",
+        database_=indexer.database,
+    )
+    records, _, _ = await indexer.driver.execute_query(
+        INDEX_QUERY, name=SchemaManager.VECTOR_INDEX_NAME, database_=indexer.database
+    )
+    if not data_dir or not records:
+        return None
+    # Index files live in schema/index/<provider>/<index id> of the database
+    directory = (
+        data_dir
+        / "databases"
+        / indexer.database
+        / "schema"
+        / "index"
+        / records[0]["indexProvider"]
+        / str(records[0]["id"])
+    )
+    if not directory.exists():
+        return None
+    size = sum(path.stat().st_size for path in directory.rglob("*") if path.is_file())
+    return size / (1024 * 1024)
+
+
+async def benchmark(args):
+    settings = get_settings()
+    items = load_agreements(Path(args.base_dir), args.account_id)
+    if not items:
+        raise SystemExit(f"No extracted agreements for account {args.account_id}")
+
+    indexer = Neo4jIndexer()
+    try:
+        await SchemaManager(indexer.driver, indexer.database).migrate()
+        for envelope_id, _, json_data in items:
+            indexer._tag_agreement(args.account_id, envelope_id, json_data)
+        await indexer._write_items(items)
+
+        # Excerpts as stored: keyed by normalized text, shared between clauses
+        excerpts: Dict[str, str] = {}
+        for _, _, json_data in items:
+            for clause in json_data["agreement"].get("clauses") or []:
+                if clause.get("exists") is True:
+                    for excerpt in clause["excerpt_nodes"]:
+                        excerpts.setdefault(excerpt["key"], excerpt["text"])
+        keys = sorted(excerpts)
+        texts = [excerpts[key] for key in keys]
+        if len(texts) <= TOP_K:
+            raise SystemExit(f"Not enough excerpts for account {args.account_id}")
+
+        if args.queries:
+            with open(args.queries, "r") as file:
+                queries = [line.strip() for line in file if line.strip()]
+        else:
+            # Without real chat questions, use the opening words of sample excerpts
+            sample = random.Random(0).sample(
+                texts, min(args.sample_queries, len(texts))
+            )
+            queries = [" ".join(text.split()[:25]) for text in sample]
+
+        embedder = CachedOpenAIEmbeddings(dimensions=args.full_dimensions)
+        corpus_full = np.asarray(embedder.embed_many(texts), dtype=np.float32)
+        queries_full = np.asarray(embedder.embed_many(queries), dtype=np.float32)
+
+        # Exact full-dimension results, which the index should find
+        corpus_ref = truncate(corpus_full, args.full_dimensions)
+        reference = [
+            {texts[i] for i in top_k(corpus_ref, query, TOP_K)}
+            for query in truncate(queries_full, args.full_dimensions)
+        ]
+
+        print(f"{len(texts)} excerpts, {len(queries)} queries, top-{TOP_K}")
+        print(
+            f"{'dims':>6} {'recall@k':>9} {'index MiB':>10} "
+            f"{'mean ms':>8} {'p95 ms':>8}"
+        )
+        for dimensions in sorted(args.dimensions):
+            await rebuild_index(
+                SchemaManager(indexer.driver, indexer.database, dimensions)
+            )
+            corpus = truncate(corpus_full, dimensions)
+            rows = [
+                {"key": key, "embedding": vector.tolist()}
+                for key, vector in zip(keys, corpus)
+            ]
+            for start in range(0, len(rows), 1000):
+                await indexer.driver.execute_query(
+                    ExcerptEmbeddingPipeline.WRITE_EMBEDDINGS_STATEMENT,
+                    rows=rows[start : start + 1000],
+                    database_=indexer.database,
+                )
+            size = await index_size(indexer, args.neo4j_data_dir)
+
+            query_vectors = truncate(queries_full, dimensions)
+            store = Neo4jContractStore(
+                indexer.uri,
+                indexer.user,
+                indexer.password,
+                indexer.database,
+                embedder=PrecomputedEmbedder(
+                    dict(zip(queries, query_vectors.tolist()))
+                ),
+            )
+            service = ContractSearchService(
+                uri=None, user=None, pwd=None, account_id=args.account_id, store=store
+            )
+            try:
+                # Warm up the plan cache before timing
+                for query in queries[:5]:
+                    await service.get_contracts_similar_text(query)
+
+                latencies = []
+                hits = 0
+                for query, expected in zip(queries, reference):
+                    started = time.perf_counter()
+                    agreements = await service.get_contracts_similar_text(query)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    found = {
+                        excerpt
+                        for agreement in agreements
+                        for clause in agreement["clauses"]
+                        for excerpt in clause["excerpts"]
+                    }
+                    hits += len(expected & found)
+            finally:
+                await store.close()
+
+            recall = hits / (TOP_K * len(queries))
+            size_text = f"{size:>10.2f}" if size is not None else f"{'-':>10}"
+            print(
+                f"{dimensions:>6} {recall:>9.3f} {size_text} "
+                f"{np.mean(latencies):>8.2f} {np.percentile(latencies, 95):>8.2f}"
+            )
+    finally:
+        await rebuild_index(
+            SchemaManager(
+                indexer.driver, indexer.database, settings.embedding_dimensions
+            )
+        )
+        await indexer.close()
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--account-id", required=True)
+    parser.add_argument("--base-dir", default="./data")
+    parser.add_argument("--queries", help="File with one query text per line")
+    parser.add_argument(
+        "--dimensions", type=int, nargs="+", default=[256, 512, 1024, 1536]
+    )
+    parser.add_argument("--full-dimensions", type=int, default=1536)
+    parser.add_argument("--sample-queries", type=int, default=50)
+    parser.add_argument(
+        "--neo4j-data-dir",
+        type=Path,
+        help="Data directory of the Neo4j server, to read the index size",
+    )
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Benchmark of graph ingestion throughput against the number of write workers.
+
+Writes a synthetic corpus of agreements to Neo4j once per worker count and
+reports agreements per second and retried transactions. Organizations,
+countries and clause types are drawn from small pools, so the corpus has the
+shared hot nodes of a real account. Every run uses its own synthetic account,
+which is deleted afterwards.
+
+Needs a running Neo4j configured through the usual NEO4J_* variables.
+
+Usage:
+    python -m benchmarks.ingest_workers [--agreements 2000] \
+        [--workers 1 2 4 8] [--organizations 200] [--batch-size 200]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import List
+
+from dotenv import load_dotenv
+
+from services.ai.neo4j.neo4j_indexer import Neo4jIndexer
+from services.ai.neo4j.schema import SchemaManager
+
+COUNTRIES = ["United States", "United Kingdom", "Germany", "France", "Canada"]
+CLAUSE_TYPES = [
+    "Non-Compete",
+    "Exclusivity",
+    "Anti-Assignment",
+    "Audit Rights",
+    "Cap On Liability",
+    "Insurance",
+    "License grant",
+    "Termination For Convenience",
+]
+RISK_TYPES = ["LEGAL", "FINANCIAL", "COMPLIANCE", "OPERATIONAL"]
+
+DELETE_ACCOUNT_STATEMENT = """
+MATCH (account:Account {account_id: $account_id})
+OPTIONAL MATCH (account)-[:HAS_AGREEMENT]->(agreement:Agreement)
+OPTIONAL MATCH (agreement)-[:HAS_CLAUSE|HAS_RISK|HAS_OBLIGATION]->(child)
+OPTIONAL MATCH (child)-[:HAS_EXCERPT]->(excerpt:Excerpt)
+DETACH DELETE excerpt, child, agreement, account
+"""
+
+DELETE_ORGANIZATIONS_STATEMENT = """
+MATCH (o:Organization)
+WHERE o.name STARTS WITH $prefix
+DETACH DELETE o
+"""
+
+
+def synthetic_corpus(
+    account_id: str, agreements: int, organizations: int, seed: int = 0
+) -> List[dict]:
+    """Generate agreements in the shape produced by extraction"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(agreements):
+        envelope_id = f"{account_id}-{i}"
+        clauses = []
+        for clause_type in rng.sample(CLAUSE_TYPES, 4):
+            clauses.append(
+                {
+                    "clause_type": clause_type,
+                    "exists": True,
+                    "excerpts": [
+                        f"{clause_type} excerpt {j} of {envelope_id}" for j in range(2)
+                    ],
+                }
+            )
+        corpus.append(
+            {
+                "agreement": {
+                    "agreement_name": f"Synthetic agreement {i}",
+                    "agreement_type": "Service Agreement",
+                    "effective_date": "2024-01-01",
+                    "expiration_date": "2026-01-01",
+                    "renewal_term": "1 year",
+                    "parties": [
+                        {
+                            "role": role,
+                            "name": f"{account_id} Org {rng.randrange(organizations)}",
+                            "incorporation_country": rng.choice(COUNTRIES),
+                            "incorporation_state": "",
+                        }
+                        for role in ("Provider", "Customer")
+                    ],
+                    "governing_law": {
+                        "country": rng.choice(COUNTRIES),
+                        "state": "",
+                        "most_favored_country": "",
+                    },
+                    "clauses": clauses,
+                    "risks": [
+                        {
+                            "risk_type": rng.choice(RISK_TYPES),
+                            "description": f"Risk {j} of {envelope_id}",
+                            "level": "MEDIUM",
+                            "impact": "Synthetic",
+                        }
+                        for j in range(2)
+                    ],
+                    "obligations": [
+                        {
+                            "description": f"Obligation of {envelope_id}",
+                            "due_date": "2025-01-01",
+                            "recurring": False,
+                            "status": "PENDING",
+                        }
+                    ],
+                }
+            }
+        )
+    return corpus
+
+
+async def run(workers: int, args) -> dict:
+    account_id = f"benchmark-{uuid.uuid4().hex[:8]}"
+    indexer = Neo4jIndexer(batch_size=args.batch_size)
+    indexer.write_concurrency = workers
+    try:
+        corpus = synthetic_corpus(account_id, args.agreements, args.organizations)
+        items = []
+        for i, json_data in enumerate(corpus):
+            envelope_id = f"{account_id}-{i}"
+            indexer._tag_agreement(account_id, envelope_id, json_data)
+            items.append((envelope_id, Path(f"{envelope_id}.json"), json_data))
+
+        started = time.perf_counter()
+        await indexer._write_items(items)
+        elapsed = time.perf_counter() - started
+
+        return {
+            "workers": workers,
+            "seconds": elapsed,
+            "rate": len(items) / elapsed,
+            "retries": indexer.retried_transactions,
+        }
+    finally:
+        await indexer.driver.execute_query(
+            DELETE_ACCOUNT_STATEMENT,
+            account_id=account_id,
+            database_=indexer.database,
+        )
+        await indexer.driver.execute_query(
+            DELETE_ORGANIZATIONS_STATEMENT,
+            prefix=f"{account_id} Org ",
+            database_=indexer.database,
+        )
+        await indexer.close()
+
+
+async def benchmark(args):
+    indexer = Neo4jIndexer()
+    try:
+        await SchemaManager(indexer.driver, indexer.database).ensure_current()
+    finally:
+        await indexer.close()
+
+    print(f"{args.agreements} agreements, batches of {args.batch_size}")
+    print(f"{'workers':>8} {'seconds':>9} {'agreements/s':>13} {'retries':>8}")
+    for workers in args.workers:
+        result = await run(workers, args)
+        print(
+            f"{result['workers']:>8} {result['seconds']:>9.2f} "
+            f"{result['rate']:>13.1f} {result['retries']:>8}"
+        )
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--agreements", type=int, default=2000)
+    parser.add_argument("--organizations", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=200)
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Benchmark of account-scoped excerpt search with many tenants.
+
+Writes a synthetic multi-tenant corpus whose account sizes follow a Zipf
+distribution, so a few large accounts hold most excerpts and many small ones
+hold a handful. Excerpt vectors are drawn around shared topics, so every
+query has close neighbours in other accounts. Queries come from accounts
+drawn uniformly, and the benchmark reports:
+
+- top-k recall of the store's search against an exact search over the
+  account's excerpts
+- the recall a global top-k search filtered to the account afterwards would
+  have had, which is how the search worked before
+- mean and p95 search latency
+
+Vectors are synthetic, no embedding API is called. With the neo4j backend
+the corpus is written to the configured Neo4j under its own accounts, which
+are deleted afterwards.
+
+Usage:
+    python -m benchmarks.vector_search [--backend neo4j|sqlite] \
+        [--accounts 200] [--excerpts 50000] [--queries 200] [--top-k 3]
+"""
+
+import argparse
+import asyncio
+import math
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from dotenv import load_dotenv
+from neo4j_graphrag.embeddings import Embedder
+
+from core.settings import get_settings
+from services.ai.embeddings import ExcerptEmbeddingPipeline
+from services.ai.neo4j.neo4j_indexer import Neo4jIndexer
+from services.ai.storage import (
+    ContractStore,
+    Neo4jContractStore,
+    SQLiteContractStore,
+)
+
+EXCERPTS_PER_AGREEMENT = 10
+
+DELETE_ACCOUNTS_STATEMENT = """
+MATCH (account:Account)
+WHERE account.account_id STARTS WITH $prefix
+OPTIONAL MATCH (account)-[:HAS_AGREEMENT]->(agreement:Agreement)
+OPTIONAL MATCH (agreement)-[:HAS_CLAUSE]->(clause:ContractClause)
+OPTIONAL MATCH (clause)-[:HAS_EXCERPT]->(excerpt:Excerpt)
+DETACH DELETE excerpt, clause, agreement, account
+"""
+
+
+class SyntheticEmbedder(Embedder):
+    """Embedder returning the synthetic vector registered for each text"""
+
+    def __init__(self):
+        self.vectors: Dict[str, List[float]] = {}
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors[text]
+
+    def embed_many(self, texts: List[str]) -> List[List[float]]:
+        return [self.vectors[text] for text in texts]
+
+
+def account_sizes(accounts: int, excerpts: int) -> List[int]:
+    """Excerpts per account, Zipf distributed with at least one each"""
+    weights = 1 / np.arange(1, accounts + 1)
+    return [max(1, int(size)) for size in excerpts * weights / weights.sum()]
+
+
+def synthetic_vectors(
+    rng: np.random.Generator, topics: np.ndarray, count: int
+) -> np.ndarray:
+    """Vectors scattered around randomly chosen topics, normalized"""
+    centers = topics[rng.integers(len(topics), size=count)]
+    vectors = centers + 0.5 * rng.standard_normal(centers.shape) / math.sqrt(
+        topics.shape[1]
+    )
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_agreements(account_id: str, texts: List[str]) -> List[dict]:
+    """Agreements holding the account's excerpts, in the shape of extraction"""
+    agreements = []
+    for i in range(0, len(texts), EXCERPTS_PER_AGREEMENT):
+        agreement = {
+            "envelope_id": f"{account_id}-{i // EXCERPTS_PER_AGREEMENT}",
+            "account_id": account_id,
+            "agreement_name": f"Synthetic agreement {i // EXCERPTS_PER_AGREEMENT}",
+            "agreement_type": "Service Agreement",
+            "parties": [],
+            "governing_law": {
+                "country": "United States",
+                "state": "",
+                "most_favored_country": "",
+            },
+            "clauses": [
+                {
+                    "clause_type": "Exclusivity",
+                    "exists": True,
+                    "excerpts": texts[i : i + EXCERPTS_PER_AGREEMENT],
+                }
+            ],
+            "risks": [],
+            "obligations": [],
+        }
+        Neo4jIndexer._assign_keys(agreement)
+        agreements.append(agreement)
+    return agreements
+
+
+async def write_corpus(
+    store: ContractStore, embedder: SyntheticEmbedder, agreements: List[dict]
+):
+    for i in range(0, len(agreements), 200):
+        await store.write_agreements(agreements[i : i + 200])
+
+    if isinstance(store, SQLiteContractStore):
+        await store.generate_embeddings()
+        return
+
+    # The embedding pipeline calls the embedding API, so vectors are set directly
+    rows = [
+        {"key": excerpt["key"], "embedding": embedder.vectors[excerpt["text"]]}
+        for agreement in agreements
+        for clause in agreement["clauses"]
+        for excerpt in clause["excerpt_nodes"]
+    ]
+    for i in range(0, len(rows), 1000):
+        await store._query(
+            ExcerptEmbeddingPipeline.WRITE_EMBEDDINGS_STATEMENT, rows=rows[i : i + 1000]
+        )
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    scores = vectors @ query
+    k = min(k, len(scores))
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+async def benchmark(args):
+    settings = get_settings()
+    rng = np.random.default_rng(0)
+    dimensions = settings.embedding_dimensions
+    topics = rng.standard_normal((args.topics, dimensions))
+    topics /= np.linalg.norm(topics, axis=1, keepdims=True)
+
+    prefix = f"vector-bench-{uuid.uuid4().hex[:8]}-"
+    accounts = [f"{prefix}{i}" for i in range(args.accounts)]
+    embedder = SyntheticEmbedder()
+    texts: Dict[str, List[str]] = {}
+    vectors: Dict[str, np.ndarray] = {}
+    for account_id, size in zip(accounts, account_sizes(args.accounts, args.excerpts)):
+        texts[account_id] = [f"{account_id} excerpt {j}" for j in range(size)]
+        vectors[account_id] = synthetic_vectors(rng, topics, size)
+        embedder.vectors.update(zip(texts[account_id], vectors[account_id].tolist()))
+
+    # Every excerpt of every account, for the global search baseline
+    all_owners = np.array(
+        [account_id for account_id in accounts for _ in texts[account_id]]
+    )
+    all_vectors = np.vstack([vectors[account_id] for account_id in accounts])
+
+    if args.backend == "sqlite":
+        directory = tempfile.TemporaryDirectory()
+        store = SQLiteContractStore(
+            Path(directory.name) / "contracts.sqlite", embedder=embedder
+        )
+    else:
+        config = settings.get_neo4j_config()
+        store = Neo4jContractStore(
+            config["uri"],
+            config["user"],
+            config["password"],
+            config["database"],
+            embedder=embedder,
+        )
+
+    try:
+        started = time.perf_counter()
+        await write_corpus(
+            store,
+            embedder,
+            [
+                agreement
+                for account_id in accounts
+                for agreement in synthetic_agreements(account_id, texts[account_id])
+            ],
+        )
+        print(
+            f"{len(accounts)} accounts, {len(all_vectors)} excerpts "
+            f"(largest {len(texts[accounts[0]])}, smallest "
+            f"{len(texts[accounts[-1]])}), written in "
+            f"{time.perf_counter() - started:.1f}s"
+        )
+
+        query_accounts = rng.choice(accounts, size=args.queries)
+        query_vectors = synthetic_vectors(rng, topics, args.queries)
+        k = args.top_k
+        latencies = []
+        hits = baseline_hits = expected_total = 0
+        for i, (account_id, query) in enumerate(zip(query_accounts, query_vectors)):
+            embedder.vectors[f"query {i}"] = query.tolist()
+            account_texts = texts[account_id]
+            expected = {
+                account_texts[j] for j in exact_top_k(vectors[account_id], query, k)
+            }
+            expected_total += len(expected)
+
+            # Before: top-k of the whole index, filtered to the account
+            global_best = exact_top_k(all_vectors, query, k)
+            baseline_hits += int((all_owners[global_best] == account_id).sum())
+
+            started = time.perf_counter()
+            results = await store.search_similar_excerpts(
+                account_id, f"query {i}", top_k=k
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += len(expected & {result["excerpt"] for result in results})
+
+        print(f"{args.queries} queries, top-{k}")
+        print(f"{'recall@k':>9} {'global recall@k':>16} {'mean ms':>8} {'p95 ms':>8}")
+        print(
+            f"{hits / expected_total:>9.3f} {baseline_hits / expected_total:>16.3f} "
+            f"{np.mean(latencies):>8.2f} {np.percentile(latencies, 95):>8.2f}"
+        )
+    finally:
+        if isinstance(store, Neo4jContractStore):
+            await store._query(DELETE_ACCOUNTS_STATEMENT, prefix=prefix)
+        await store.close()
+        if args.backend == "sqlite":
+            directory.cleanup()
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend", choices=["neo4j", "sqlite"], default="neo4j")
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--excerpts", type=int, default=50000)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,72 @@ class Settings(BaseSettings):
     neo4j_user: str = os.getenv("NEO4J_USER", "neo4j")
     neo4j_password: str = os.getenv("NEO4J_PASSWORD")
     neo4j_database: str = os.getenv("NEO4J_DATABASE", "neo4j")
+    neo4j_ingest_batch_size: int = int(os.getenv("NEO4J_INGEST_BATCH_SIZE", "200"))
+    neo4j_write_concurrency: int = int(os.getenv("NEO4J_WRITE_CONCURRENCY", "4"))
+    neo4j_write_retries: int = int(os.getenv("NEO4J_WRITE_RETRIES", "5"))
+    neo4j_write_retry_backoff: float = float(
+        os.getenv("NEO4J_WRITE_RETRY_BACKOFF", "0.2")
+    )
+
+    # Storage Settings
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "neo4j")
+    sqlite_store_path: str = os.getenv("SQLITE_STORE_PATH", "./data/contracts.sqlite")
+
+    # Embedding Settings
+    embedding_model: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    embedding_dimensions: int = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+    embedding_base_url: str = os.getenv("EMBEDDING_BASE_URL", "")
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    embedding_page_size: int = int(os.getenv("EMBEDDING_PAGE_SIZE", "1024"))
+    embedding_concurrency: int = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+    embedding_cache_dir: str = os.getenv(
+        "EMBEDDING_CACHE_DIR", "./data/embedding_cache"
+    )
+    embedding_cache_dtype: str = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")
+
+    # Extraction Settings
+    near_duplicate_threshold: float = float(
+        os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9")
+    )
+    near_duplicate_max_diff_chars: int = int(
+        os.getenv("NEAR_DUPLICATE_MAX_DIFF_CHARS", "6000")
+    )
+    direct_completion_max_chars: int = int(
+        os.getenv("DIRECT_COMPLETION_MAX_CHARS", "200000")
+    )
+    direct_completion_min_chars_per_page: int = int(
+        os.getenv("DIRECT_COMPLETION_MIN_CHARS_PER_PAGE", "200")
+    )
+    preprocess_max_workers: int = int(
+        os.getenv("PREPROCESS_MAX_WORKERS", str(os.cpu_count() or 1))
+    )
+    ingest_handoff: bool = os.getenv("INGEST_HANDOFF", "true").lower() == "true"
+
+    # Chat Settings
+    chat_service_cache_size: int = int(os.getenv("CHAT_SERVICE_CACHE_SIZE", "256"))
+    chat_service_idle_ttl: float = float(os.getenv("CHAT_SERVICE_IDLE_TTL", "1800"))
+    tool_result_cache_max_mb: int = int(os.getenv("TOOL_RESULT_CACHE_MAX_MB", "64"))
+    account_generation_check_interval: float = float(
+        os.getenv("ACCOUNT_GENERATION_CHECK_INTERVAL", "5")
+    )
+    cypher_cache_path: str = os.getenv(
+        "CYPHER_CACHE_PATH", "./data/cypher_cache.sqlite"
+    )
+    cypher_cache_similarity: float = float(os.getenv("CYPHER_CACHE_SIMILARITY", "0.95"))
+    generated_cypher_max_estimated_rows: int = int(
+        os.getenv("GENERATED_CYPHER_MAX_ESTIMATED_ROWS", "100000")
+    )
+    generated_cypher_row_limit: int = int(
+        os.getenv("GENERATED_CYPHER_ROW_LIMIT", "100")
+    )
+    generated_cypher_timeout: float = float(os.getenv("GENERATED_CYPHER_TIMEOUT", "5"))
+    vector_search_oversample: int = int(os.getenv("VECTOR_SEARCH_OVERSAMPLE", "10"))
+    vector_search_max_candidates: int = int(
+        os.getenv("VECTOR_SEARCH_MAX_CANDIDATES", "1000")
+    )
+    hybrid_search_rrf_k: int = int(os.getenv("HYBRID_SEARCH_RRF_K", "60"))
+    tool_page_size: int = int(os.getenv("TOOL_PAGE_SIZE", "20"))
+    tool_max_excerpts: int = int(os.getenv("TOOL_MAX_EXCERPTS", "3"))
 
     class Config:
         env_file = ".env"
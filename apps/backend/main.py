@@ -1,11 +1,32 @@
+from contextlib import asynccontextmanager
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from api.routes import auth, envelopes, webhook, chat
+from core.settings import get_settings
+from services.ai.neo4j.schema import migrate_schema
+from services.ai.storage import close_contract_stores
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Apply graph schema migrations once at startup, when the graph is the store
+    if get_settings().storage_backend == "neo4j":
+        try:
+            await migrate_schema()
+        except Exception as e:
+            logger.error(f"Graph schema migration failed: {e}")
+    yield
+    # Release the shared database drivers
+    await close_contract_stores()
 
 
-app = FastAPI(title="DocuSign Integration API", root_path="/api")
+app = FastAPI(title="DocuSign Integration API", root_path="/api", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
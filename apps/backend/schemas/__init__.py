@@ -7,12 +7,15 @@ from .agreement import (
     GoverningLaw,
     ContractClause,
     Agreement,
+    AgreementSummary,
     ClauseType,
     RiskLevel,
     RiskType,
     Risk,
+    AgreementRisk,
     ObligationStatus,
     Obligation,
+    Page,
 )
 
 __all__ = [
@@ -27,12 +30,15 @@ __all__ = [
     "GoverningLaw",
     "ContractClause",
     "Agreement",
+    "AgreementSummary",
     "ClauseType",
     "RiskLevel",
     "RiskType",
     "Risk",
+    "AgreementRisk",
     "ObligationStatus",
     "Obligation",
+    "Page",
     "UserSchema",
     "ChatMessage",
     "ChatResponse",
@@ -1,5 +1,5 @@
 from typing import TypedDict
-from typing import List
+from typing import Any, Dict, List
 from enum import Enum
 from datetime import datetime
 from typing import Optional
@@ -36,6 +36,21 @@ class Agreement(TypedDict):
     clauses: List[ContractClause]
 
 
+# Stored as JSON on each agreement at ingestion, so agreement lists read one
+# property instead of rebuilding this from the graph
+class AgreementSummary(TypedDict):
+    envelope_id: str
+    name: str
+    agreement_type: str
+    effective_date: str
+    expiration_date: str
+    renewal_term: str
+    industry: Optional[str]
+    parties: List[Party]
+    clause_types: List[str]
+    risk_counts: Dict[str, int]  # risk level -> number of risks
+
+
 class ClauseType(Enum):
     ANTI_ASSIGNMENT = "Anti-Assignment"
     COMPETITIVE_RESTRICTION = "Competitive Restriction Exception"
@@ -91,6 +106,13 @@ class Risk(TypedDict):
     impact: str
 
 
+class AgreementRisk(TypedDict):
+    agreement_name: str
+    envelope_id: str
+    clause_types: List[str]
+    risk: Risk
+
+
 class ObligationStatus(Enum):
     PENDING = "PENDING"
     COMPLETED = "COMPLETED"
@@ -105,3 +127,8 @@ class Obligation(TypedDict):
     recurring: bool
     recurrence_pattern: Optional[str]  # e.g., "MONTHLY", "YEARLY"
     reminder_days: int  # Days before due date to send reminder
+
+
+class Page(TypedDict):
+    items: List[Any]
+    next_cursor: Optional[str]  # None on the last page
@@ -0,0 +1,10 @@
+from .cache import EmbeddingCache, get_embedding_cache
+from .embedder import CachedOpenAIEmbeddings
+from .pipeline import ExcerptEmbeddingPipeline
+
+__all__ = [
+    "EmbeddingCache",
+    "get_embedding_cache",
+    "CachedOpenAIEmbeddings",
+    "ExcerptEmbeddingPipeline",
+]
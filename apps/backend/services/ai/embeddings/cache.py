@@ -0,0 +1,160 @@
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from core.settings import get_settings
+from utils import content_hash
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (normalized text hash, model, dimensions).
+
+    Vectors are stored as fixed-size float rows in a memory-mapped file, one
+    file per model and dimensionality. A SQLite table maps each text hash to
+    its row. Rows are allocated through SQLite, so several processes can share
+    the same cache directory.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        model: str,
+        dimensions: int,
+        dtype: str = "float16",
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = self.dimensions * self.dtype.itemsize
+
+        safe_model = re.sub(r"[^\w.-]", "_", model)
+        self.cache_dir = (
+            Path(cache_dir) / f"{safe_model}-{dimensions}-{self.dtype.name}"
+        )
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.cache_dir / "vectors.bin"
+        self.vectors_path.touch(exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.cache_dir / "index.sqlite", check_same_thread=False, timeout=30
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "row INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "key TEXT UNIQUE NOT NULL, "
+            "ready INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.commit()
+
+        self._mmap: Optional[np.memmap] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> str:
+        return content_hash(text)
+
+    def _rows(self, rows: Sequence[int]) -> np.ndarray:
+        """Read rows from the memory map, remapping when the file has grown"""
+        needed = max(rows) + 1
+        if self._mmap is None or self._mmap.shape[0] < needed:
+            total = self.vectors_path.stat().st_size // self.row_bytes
+            self._mmap = np.memmap(
+                self.vectors_path,
+                dtype=self.dtype,
+                mode="r",
+                shape=(total, self.dimensions),
+            )
+        return self._mmap[list(rows)]
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Look up cached vectors; misses are returned as None"""
+        keys = [self.key(text) for text in texts]
+        if not keys:
+            return []
+
+        with self._lock:
+            placeholders = ",".join("?" * len(keys))
+            found = dict(
+                self._db.execute(
+                    "SELECT key, row FROM entries "
+                    f"WHERE ready = 1 AND key IN ({placeholders})",
+                    keys,
+                ).fetchall()
+            )
+
+            results: List[Optional[List[float]]] = [None] * len(keys)
+            hit_positions = [i for i, key in enumerate(keys) if key in found]
+            if hit_positions:
+                vectors = self._rows([found[keys[i]] - 1 for i in hit_positions])
+                for i, vector in zip(hit_positions, vectors):
+                    results[i] = vector.astype(np.float32).tolist()
+
+        self.hits += len(hit_positions)
+        self.misses += len(keys) - len(hit_positions)
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Store vectors for the given texts"""
+        arrays = [np.asarray(vector, dtype=self.dtype) for vector in vectors]
+        for array in arrays:
+            if array.shape != (self.dimensions,):
+                raise ValueError(
+                    f"Expected {self.dimensions} dimensions, got {array.shape}"
+                )
+
+        with self._lock:
+            # Allocate rows first; keys cached meanwhile by another process are
+            # skipped. Rows never marked ready, e.g. after a crash between the
+            # two commits, are written again
+            new_rows = {}
+            for text, array in zip(texts, arrays):
+                key = self.key(text)
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO entries (key) VALUES (?)", (key,)
+                )
+                if cursor.rowcount:
+                    new_rows[cursor.lastrowid] = array
+                    continue
+                row, ready = self._db.execute(
+                    "SELECT row, ready FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if not ready:
+                    new_rows[row] = array
+            self._db.commit()
+            if not new_rows:
+                return
+
+            with open(self.vectors_path, "r+b") as file:
+                for row, array in new_rows.items():
+                    file.seek((row - 1) * self.row_bytes)
+                    file.write(array.tobytes())
+
+            # Rows become visible to readers only once their vector is written
+            self._db.executemany(
+                "UPDATE entries SET ready = 1 WHERE row = ?",
+                [(row,) for row in new_rows],
+            )
+            self._db.commit()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        return self.get_many([text])[0]
+
+    def put(self, text: str, vector: Sequence[float]):
+        self.put_many([text], [vector])
+
+
+@lru_cache()
+def get_embedding_cache(model: str, dimensions: int) -> EmbeddingCache:
+    """Process-wide cache instance per model and dimensionality"""
+    settings = get_settings()
+    return EmbeddingCache(
+        settings.embedding_cache_dir, model, dimensions, settings.embedding_cache_dtype
+    )
@@ -0,0 +1,53 @@
+import os
+from typing import Any, List
+
+from neo4j_graphrag.embeddings import Embedder
+from openai import OpenAI
+
+from core.settings import get_settings
+from .cache import get_embedding_cache
+
+
+class CachedOpenAIEmbeddings(Embedder):
+    """OpenAI query embedder that checks the persistent embedding cache first"""
+
+    def __init__(self, model: str = None, dimensions: int = None, **kwargs: Any):
+        settings = get_settings()
+        self.model = model or settings.embedding_model
+        self.dimensions = dimensions or settings.embedding_dimensions
+        self.cache = get_embedding_cache(self.model, self.dimensions)
+        self.client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=settings.embedding_base_url or None,
+            **kwargs,
+        )
+
+    def embed_query(self, text: str) -> list[float]:
+        cached = self.cache.get(text)
+        if cached is not None:
+            return cached
+
+        response = self.client.embeddings.create(
+            input=text, model=self.model, dimensions=self.dimensions
+        )
+        embedding = response.data[0].embedding
+        self.cache.put(text, embedding)
+        return embedding
+
+    def embed_many(self, texts: List[str], batch_size: int = None) -> List[List[float]]:
+        """Embed several texts, batching the cache misses into API calls"""
+        batch_size = batch_size or get_settings().embedding_batch_size
+        embeddings = self.cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start : start + batch_size]
+            response = self.client.embeddings.create(
+                input=[texts[i] for i in batch],
+                model=self.model,
+                dimensions=self.dimensions,
+            )
+            fresh = [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+            self.cache.put_many([texts[i] for i in batch], fresh)
+            for i, embedding in zip(batch, fresh):
+                embeddings[i] = embedding
+        return embeddings
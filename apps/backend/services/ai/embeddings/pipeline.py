@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional
+
+from neo4j import AsyncDriver
+from openai import AsyncOpenAI
+
+from core.settings import get_settings
+from schemas.webhook import ProcessingPhase
+from ...notification import WebhookService
+from ...tracking import ProgressTracker
+from .cache import get_embedding_cache
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ExcerptEmbeddingPipeline:
+    """
+    Client-side embedding of Excerpt nodes.
+
+    Unembedded excerpts are streamed out in keyset pages, embedded in batched
+    API calls with bounded concurrency and written back with UNWIND, one
+    transaction per batch. Progress survives failures: a rerun only picks up
+    excerpts that still have no embedding.
+    """
+
+    # Tracked like an envelope so progress shows up with the graph phase
+    JOB_ID = "excerpt_embeddings"
+
+    COUNT_PENDING_QUERY = """
+    MATCH (e:Excerpt)
+    WHERE e.embedding IS NULL AND e.text IS NOT NULL AND e.key IS NOT NULL
+    RETURN count(e) AS pending
+    """
+
+    FETCH_PAGE_QUERY = """
+    MATCH (e:Excerpt)
+    WHERE e.key > $after AND e.embedding IS NULL AND e.text IS NOT NULL
+    RETURN e.key AS key, e.text AS text
+    ORDER BY e.key
+    LIMIT $page_size
+    """
+
+    WRITE_EMBEDDINGS_STATEMENT = """
+    UNWIND $rows AS row
+    MATCH (e:Excerpt {key: row.key})
+    CALL db.create.setNodeVectorProperty(e, 'embedding', row.embedding)
+    """
+
+    def __init__(
+        self,
+        driver: AsyncDriver,
+        database: str = "neo4j",
+        webhook_service: Optional[WebhookService] = None,
+    ):
+        settings = get_settings()
+
+        self.driver = driver
+        self.database = database
+        self.progress_tracker = ProgressTracker(
+            webhook_service, phase=ProcessingPhase.JSON_TO_GRAPH
+        )
+
+        self.model = settings.embedding_model
+        self.dimensions = settings.embedding_dimensions
+        self.batch_size = settings.embedding_batch_size
+        self.page_size = settings.embedding_page_size
+        self.concurrency = settings.embedding_concurrency
+        self.cache = get_embedding_cache(self.model, self.dimensions)
+
+        # A base URL override allows pointing at a local fake embedding endpoint
+        self.client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=settings.embedding_base_url or None,
+        )
+
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with a single API call"""
+        response = await self.client.embeddings.create(
+            model=self.model, input=texts, dimensions=self.dimensions
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+    async def _embed_batch(self, batch: List[dict], semaphore: asyncio.Semaphore):
+        async with semaphore:
+            # Only texts missing from the local cache cost an API call
+            texts = [row["text"] for row in batch]
+            embeddings = await asyncio.to_thread(self.cache.get_many, texts)
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            if missing:
+                fresh = await self.embed_texts([texts[i] for i in missing])
+                await asyncio.to_thread(
+                    self.cache.put_many, [texts[i] for i in missing], fresh
+                )
+                for i, embedding in zip(missing, fresh):
+                    embeddings[i] = embedding
+
+            rows = [
+                {"key": row["key"], "embedding": embedding}
+                for row, embedding in zip(batch, embeddings)
+            ]
+            await self.driver.execute_query(
+                self.WRITE_EMBEDDINGS_STATEMENT, rows=rows, database_=self.database
+            )
+        return len(rows)
+
+    async def run(self) -> int:
+        """Embed every excerpt that has no embedding yet"""
+        records, _, _ = await self.driver.execute_query(
+            self.COUNT_PENDING_QUERY, database_=self.database
+        )
+        pending = records[0]["pending"] if records else 0
+        if not pending:
+            logger.info("No excerpts waiting for embeddings")
+            return 0
+
+        total_batches = -(-pending // self.batch_size)
+        await self.progress_tracker.start_envelope(self.JOB_ID, total_batches)
+        logger.info(f"Embedding {pending} excerpts in {total_batches} batches")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        embedded = 0
+        failed = 0
+        after = ""
+
+        while True:
+            page, _, _ = await self.driver.execute_query(
+                self.FETCH_PAGE_QUERY,
+                after=after,
+                page_size=self.page_size,
+                database_=self.database,
+            )
+            if not page:
+                break
+            after = page[-1]["key"]
+
+            batches = [
+                [dict(record) for record in page[start : start + self.batch_size]]
+                for start in range(0, len(page), self.batch_size)
+            ]
+            results = await asyncio.gather(
+                *(self._embed_batch(batch, semaphore) for batch in batches),
+                return_exceptions=True,
+            )
+
+            for batch, result in zip(batches, results):
+                if isinstance(result, Exception):
+                    # Left without embedding, picked up again by the next run
+                    failed += len(batch)
+                    logger.error(f"Error embedding {len(batch)} excerpts: {result}")
+                else:
+                    embedded += result
+                await self.progress_tracker.update_document_progress(
+                    self.JOB_ID, f"{embedded}/{pending} excerpts embedded"
+                )
+
+        if failed:
+            await self.progress_tracker.mark_envelope_failed(
+                self.JOB_ID, f"{failed} excerpts could not be embedded"
+            )
+        await self.progress_tracker.complete_envelope(self.JOB_ID, [])
+
+        logger.info(f"Embedded {embedded} excerpts, {failed} failed")
+        return embedded
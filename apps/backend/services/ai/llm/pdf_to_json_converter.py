@@ -1,5 +1,7 @@
 import os
 import json
+import asyncio
+import difflib
 from pathlib import Path
 import logging
 from openai import OpenAI
@@ -8,12 +10,19 @@ from openai.types.beta.threads.message_create_params import (
     AttachmentToolFileSearch,
 )
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Dict, List, Optional
 
+from core.settings import get_settings
 from utils import read_text_file, save_json_string_to_file, extract_json_from_string
 from ..neo4j.neo4j_indexer import Neo4jIndexer
+from ...document import NearDuplicateIndex, PDFPreprocessor
 from ...notification import WebhookService
-from ...tracking import ProgressTracker, BatchProgressTracker
+from ...tracking import (
+    ProgressTracker,
+    BatchProgressTracker,
+    WorkManifest,
+    WorkStatus,
+)
 from schemas.webhook import ProcessingPhase, TerminateMessage
 
 # Set up logging
@@ -30,6 +39,14 @@ class PDFProcessor:
             webhook_service, phase=ProcessingPhase.PDF_TO_JSON
         )
         self.batch_tracker = None  # Will be initialized when we know total files
+        self.duplicate_index = None  # Will be initialized per account
+        self.pdf_index = None  # Preprocessed PDF facts, initialized per account
+        self.manifest = None  # Work manifest, initialized per account
+        self.handoff = None  # Queue to the graph writer in pipeline mode
+        self._persist_tasks = set()
+        # Extractions handed over whose file is not written yet, by path
+        self._unwritten: Dict[str, str] = {}
+        self.settings = get_settings()
 
         # Initialize OpenAI client
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
@@ -44,6 +61,7 @@ class PDFProcessor:
         self.extraction_prompt = read_text_file(
             prompts_dir / "contract_extraction_prompt.txt"
         )
+        self.update_prompt = read_text_file(prompts_dir / "contract_update_prompt.txt")
 
         # Configure assistant
         self.pdf_assistant = self.client.beta.assistants.create(
@@ -57,10 +75,16 @@ class PDFProcessor:
         # Initialize Neo4j indexer
         self.neo4j_indexer = Neo4jIndexer(webhook_service)
 
-    async def process_pdf(self, envelope_id: str, pdf_path: str | Path) -> str | None:
+    async def process_pdf(
+        self, envelope_id: str, pdf_path: str | Path, text: Optional[str] = None
+    ) -> str | None:
         """Process a single PDF file and return the extracted content"""
         logger.info(f"Processing {pdf_path}...")
 
+        # Documents with a usable text layer skip the Assistants file upload
+        if self._has_usable_text(pdf_path, text):
+            return await self.process_text(envelope_id, pdf_path, text)
+
         try:
             # Create thread
             thread = self.client.beta.threads.create()
@@ -116,6 +140,157 @@ class PDFProcessor:
             logger.error(f"Error processing PDF {pdf_path}: {e}")
             return None
 
+    def _has_usable_text(self, pdf_path: str | Path, text: Optional[str]) -> bool:
+        """
+        Whether the text layer holds the contract rather than what a scan
+        carries on top of the image, like a stamp, header or page numbers
+        """
+        if not text or len(text) > self.settings.direct_completion_max_chars:
+            return False
+        facts = self.pdf_index.get(pdf_path) if self.pdf_index else None
+        if not facts or not facts["page_count"]:
+            return False
+        characters = len("".join(text.split()))
+        return (
+            characters / facts["page_count"]
+            >= self.settings.direct_completion_min_chars_per_page
+        )
+
+    async def process_text(
+        self, envelope_id: str, pdf_path: str | Path, text: str
+    ) -> str | None:
+        """Extract contract content from a PDF text layer with a direct completion"""
+        try:
+            await self.progress_tracker.update_document_progress(
+                envelope_id, str(pdf_path)
+            )
+
+            # Off the event loop, so the graph writer and requests keep running
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
+                model="gpt-4o-mini",
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": self.system_instruction},
+                    {
+                        "role": "user",
+                        "content": f"{self.extraction_prompt}\n\nContract:\n{text}",
+                    },
+                ],
+            )
+            result = response.choices[0].message.content
+
+            if self.batch_tracker:
+                await self.batch_tracker.update_envelope_progress(
+                    envelope_id, str(pdf_path)
+                )
+
+            return result
+
+        except Exception as e:
+            await self.progress_tracker.mark_envelope_failed(envelope_id, str(e))
+            logger.error(f"Error processing text layer of {pdf_path}: {e}")
+            return None
+
+    async def update_extraction(
+        self, prior_json: dict, passages: List[str]
+    ) -> str | None:
+        """Ask the LLM to patch a prior extraction with the passages that changed"""
+        try:
+            content = (
+                f"{self.update_prompt}\n\n"
+                f"Existing JSON document:\n{json.dumps(prior_json)}\n\n"
+                "Changed passages in the new contract:\n" + "\n---\n".join(passages)
+            )
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
+                model="gpt-4o-mini",
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": self.system_instruction},
+                    {"role": "user", "content": content},
+                ],
+            )
+            return response.choices[0].message.content
+
+        except Exception as e:
+            logger.error(f"Error updating prior extraction: {e}")
+            return None
+
+    @staticmethod
+    def _diff_passages(prior_text: str, text: str) -> List[str]:
+        """Return the passages of text that differ from prior_text"""
+        prior_lines = [" ".join(line.split()) for line in prior_text.splitlines()]
+        lines = [" ".join(line.split()) for line in text.splitlines()]
+        prior_lines = [line for line in prior_lines if line]
+        lines = [line for line in lines if line]
+
+        passages = []
+        matcher = difflib.SequenceMatcher(None, prior_lines, lines, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag in ("replace", "insert"):
+                passages.append("\n".join(lines[j1:j2]))
+            elif tag == "delete":
+                passages.append("[removed] " + "\n".join(prior_lines[i1:i2]))
+        return passages
+
+    async def _reuse_near_duplicate(
+        self,
+        envelope_id: str,
+        pdf_path: Path,
+        text: str,
+        signature: List[int],
+    ) -> dict | None:
+        """Reuse the extraction of a near-duplicate document, if one is indexed"""
+        if not self.duplicate_index or not text.strip():
+            return None
+
+        match = self.duplicate_index.query(text, signature)
+        if not match:
+            return None
+
+        doc_id, entry, score = match
+        prior_output = Path(entry["output_file"])
+        prior_text_file = Path(entry["text_file"])
+        # Extractions of this run may still be waiting to be written
+        prior_string = self._unwritten.get(str(prior_output))
+        if prior_string is None and prior_output.exists():
+            prior_string = read_text_file(prior_output)
+        if prior_string is None or not prior_text_file.exists():
+            return None
+
+        prior_json = extract_json_from_string(prior_string)
+        if not prior_json:
+            return None
+
+        passages = self._diff_passages(read_text_file(prior_text_file), text)
+        if sum(len(p) for p in passages) > self.settings.near_duplicate_max_diff_chars:
+            return None
+
+        logger.info(
+            f"Reusing extraction of {doc_id} for {pdf_path} "
+            f"(similarity {score:.2f}, {len(passages)} changed passages)"
+        )
+
+        contract_json = prior_json
+        if passages:
+            response = await self.update_extraction(prior_json, passages)
+            contract_json = extract_json_from_string(response) if response else None
+            if not contract_json or "agreement" not in contract_json:
+                logger.warning(
+                    f"Update of prior extraction failed for {pdf_path}, "
+                    "falling back to full extraction"
+                )
+                return None
+
+        await self.progress_tracker.update_document_progress(envelope_id, str(pdf_path))
+        if self.batch_tracker:
+            await self.batch_tracker.update_envelope_progress(
+                envelope_id, str(pdf_path)
+            )
+
+        return contract_json
+
     async def process_directory(self, base_dir: str | Path, account_id: str) -> bool:
         """Process PDFs in the specific account directory matching account_id"""
         base_path = Path(base_dir)
@@ -139,11 +314,31 @@ class PDFProcessor:
             logger.error(f"Account directory not found for account_id: {account_id}")
             return False
 
-        # Count total PDFs for batch tracking
-        total_pdfs = sum(1 for _ in docusign_path.rglob("*.pdf"))
+        # Plan the work and totals from the account's manifest
+        self.manifest = WorkManifest(base_path, account_id)
+        pending = self.manifest.pending(ProcessingPhase.PDF_TO_JSON)
         self.batch_tracker = BatchProgressTracker(
-            total_pdfs, self.webhook_service, phase=ProcessingPhase.PDF_TO_JSON
+            len(pending), self.webhook_service, phase=ProcessingPhase.PDF_TO_JSON
         )
+        if not pending:
+            logger.info(f"No PDFs pending extraction for account {account_id}")
+            return False
+
+        # Extract hashes, page counts and text layers once per PDF
+        pdf_paths = [
+            self.manifest.source_path(envelope_id, document["document"])
+            for envelope_id, documents in pending.items()
+            for document in documents
+        ]
+        self.pdf_index = await PDFPreprocessor(
+            base_path, account_id, self.settings.preprocess_max_workers
+        ).run(pdf_paths)
+        for pdf_path in pdf_paths:
+            facts = self.pdf_index.get(pdf_path)
+            if facts:
+                self.manifest.record_hash(
+                    pdf_path.parent.name, pdf_path.name, facts["sha256"]
+                )
 
         logger.info(f"Processing account directory: {account_dir}")
 
@@ -153,39 +348,69 @@ class PDFProcessor:
         account_output.mkdir(exist_ok=True)
         account_debug.mkdir(exist_ok=True)
 
-        # Process envelopes in this account
-        created = await self._process_account_envelopes(
-            account_dir, account_output, account_debug
+        # Load the near-duplicate index of previously extracted documents
+        self.duplicate_index = NearDuplicateIndex(
+            base_path / "near_duplicates" / f"{account_id}.json",
+            threshold=self.settings.near_duplicate_threshold,
         )
-        json_files_created |= created
+
+        # In pipeline mode agreements go straight to the graph writer
+        ingestion = None
+        if self.settings.ingest_handoff:
+            self.handoff = asyncio.Queue()
+            ingestion = asyncio.create_task(
+                self.neo4j_indexer.index_stream(
+                    base_path, account_id, self.handoff, len(pending)
+                )
+            )
+
+        # Process envelopes in this account
+        try:
+            created = await self._process_account_envelopes(
+                pending, account_output, account_debug
+            )
+            json_files_created |= created
+        finally:
+            self.duplicate_index.save()
+            for error in await asyncio.gather(
+                *self._persist_tasks, return_exceptions=True
+            ):
+                if isinstance(error, Exception):
+                    logger.error(f"Error writing extraction output: {error}")
+            if ingestion:
+                await self.handoff.put(None)
+                self.handoff = None
+                try:
+                    await ingestion
+                except Exception as e:
+                    # Agreements not written stay pending in the manifest
+                    logger.error(f"Error during streamed Neo4j ingestion: {e}")
 
         return json_files_created
 
     async def _process_account_envelopes(
         self,
-        account_dir: Path,
+        pending: Dict[str, List[dict]],
         account_output: Path,
         account_debug: Path,
     ) -> bool:
-        """Process all envelopes in an account directory"""
+        """Process the pending envelopes of an account"""
         json_files_created = False
 
-        for envelope_dir in account_dir.iterdir():
-            if not envelope_dir.is_dir():
-                continue
-
-            # Get envelope_id from directory name
-            envelope_id = envelope_dir.name
-            logger.info(f"Processing envelope directory: {envelope_dir}")
+        for envelope_id, documents in pending.items():
+            logger.info(f"Processing envelope: {envelope_id}")
 
             # Create envelope directories
-            envelope_output = account_output / envelope_dir.name
-            envelope_debug = account_debug / envelope_dir.name
+            envelope_output = account_output / envelope_id
+            envelope_debug = account_debug / envelope_id
             envelope_output.mkdir(exist_ok=True)
             envelope_debug.mkdir(exist_ok=True)
 
-            # Get PDF files once
-            contract_pdfs = list(envelope_dir.glob("*.pdf"))
+            contract_pdfs = [
+                document["document"]
+                for document in documents
+                if document["document"].lower().endswith(".pdf")
+            ]
             total_pdfs_in_envelope = len(contract_pdfs)
 
             await self.progress_tracker.start_envelope(
@@ -195,16 +420,36 @@ class PDFProcessor:
                 envelope_id, total_pdfs_in_envelope
             )
 
+            # Only the first contract of an envelope is extracted
+            for document in documents:
+                if not contract_pdfs or document["document"] != contract_pdfs[0]:
+                    self.manifest.mark(
+                        ProcessingPhase.PDF_TO_JSON,
+                        envelope_id,
+                        document["document"],
+                        WorkStatus.SKIPPED,
+                    )
+
             if contract_pdfs:
+                pdf_path = self.manifest.source_path(envelope_id, contract_pdfs[0])
                 created = await self._process_envelope_pdf(
-                    envelope_id, contract_pdfs[0], envelope_output, envelope_debug
+                    envelope_id, pdf_path, envelope_output, envelope_debug
                 )
                 json_files_created |= created
+                if not created:
+                    self.manifest.mark(
+                        ProcessingPhase.PDF_TO_JSON,
+                        envelope_id,
+                        pdf_path.name,
+                        WorkStatus.FAILED,
+                        error="Extraction failed",
+                    )
 
                 # Mark envelope complete
                 await self.batch_tracker.complete_envelope(envelope_id)
                 await self.progress_tracker.complete_envelope(
-                    envelope_id, [str(p) for p in envelope_output.rglob("*.json")]
+                    envelope_id,
+                    [str(envelope_output / f"{pdf_path.name}.json")] if created else [],
                 )
         return json_files_created
 
@@ -217,26 +462,58 @@ class PDFProcessor:
     ) -> bool:
         """Process a single PDF in an envelope directory"""
         try:
-            complete_response = await self.process_pdf(envelope_id, pdf_path)
-            if not complete_response:
-                return False
-
-            # Save debug response
-            debug_file = envelope_debug / f"complete_response_{pdf_path.name}.json"
-            save_json_string_to_file(complete_response, str(debug_file))
-
-            # Process and save JSON
-            contract_json = extract_json_from_string(complete_response)
-            if not contract_json:
-                logger.error(
-                    f"Failed to extract valid JSON from response for {pdf_path}"
+            # Text layer from the preprocessing index
+            text = self.pdf_index.read_text(pdf_path) if self.pdf_index else ""
+            signature = None
+            if text.strip():
+                signature = await asyncio.to_thread(
+                    self.duplicate_index.signature, text
                 )
-                return False
+
+            contract_json = await self._reuse_near_duplicate(
+                envelope_id, pdf_path, text, signature
+            )
+
+            if contract_json is None:
+                complete_response = await self.process_pdf(envelope_id, pdf_path, text)
+                if not complete_response:
+                    return False
+
+                # Save debug response
+                debug_file = envelope_debug / f"complete_response_{pdf_path.name}.json"
+                save_json_string_to_file(complete_response, str(debug_file))
+
+                # Process and save JSON
+                contract_json = extract_json_from_string(complete_response)
+                if not contract_json:
+                    logger.error(
+                        f"Failed to extract valid JSON from response for {pdf_path}"
+                    )
+                    return False
             contract_json["agreement"]["email_subject"] = pdf_path.name.rstrip(".pdf")
             contract_json["agreement"]["envelope_id"] = envelope_id
             json_string = json.dumps(contract_json, indent=4)
             output_file = envelope_output / f"{pdf_path.name}.json"
-            save_json_string_to_file(json_string, str(output_file))
+            if self.handoff:
+                # The file is only kept for audit and the json_files endpoint,
+                # so it is written in the background
+                self._persist(envelope_id, pdf_path.name, json_string, output_file)
+                await self.handoff.put((envelope_id, output_file, contract_json))
+            else:
+                save_json_string_to_file(json_string, str(output_file))
+                self.manifest.record_output(envelope_id, pdf_path.name, output_file)
+
+            # Register the extraction so later near-duplicates can reuse it
+            if signature:
+                text_file = envelope_debug / f"text_layer_{pdf_path.name}.txt"
+                save_json_string_to_file(text, str(text_file))
+                self.duplicate_index.add(
+                    f"{envelope_id}/{pdf_path.name}",
+                    text,
+                    signature,
+                    output_file=str(output_file),
+                    text_file=str(text_file),
+                )
 
             return True
 
@@ -247,14 +524,43 @@ class PDFProcessor:
 
         return False
 
+    def _persist(
+        self, envelope_id: str, document: str, json_string: str, output_file: Path
+    ):
+        """Write an extraction to disk without blocking the pipeline"""
+        self._unwritten[str(output_file)] = json_string
+        task = asyncio.create_task(
+            self._write_output(envelope_id, document, json_string, output_file)
+        )
+        self._persist_tasks.add(task)
+        task.add_done_callback(self._persist_tasks.discard)
+
+    async def _write_output(
+        self, envelope_id: str, document: str, json_string: str, output_file: Path
+    ):
+        try:
+            await asyncio.to_thread(
+                save_json_string_to_file, json_string, str(output_file)
+            )
+        finally:
+            self._unwritten.pop(str(output_file), None)
+        # Recorded once the file exists, so the manifest never points at a
+        # missing output
+        self.manifest.record_output(envelope_id, document, output_file)
+
     async def run(self, account_id: str):
         """Main execution method"""
         try:
             # Process PDFs to JSON
             json_files_created = await self.process_directory("./data", account_id)
 
-            # Index to Neo4j if files were created
-            if json_files_created:
+            # Index to Neo4j if files were created or are still waiting. In
+            # pipeline mode the stream already wrote and embedded what was
+            # extracted, so only agreements it left pending are indexed
+            waiting = self.manifest and self.manifest.pending(
+                ProcessingPhase.JSON_TO_GRAPH
+            )
+            if waiting or (json_files_created and not self.settings.ingest_handoff):
                 logger.info(
                     "JSON files created successfully. Starting Neo4j indexing..."
                 )
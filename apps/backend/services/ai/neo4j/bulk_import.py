@@ -0,0 +1,321 @@
+import csv
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BulkImportWriter:
+    """
+    Streams agreements into node and relationship CSV files for the offline
+    `neo4j-admin database import` tool.
+
+    Nodes get the same stable IDs the transactional path MERGEs on, so the
+    imported graph matches what CREATE_GRAPH_STATEMENT would build. Agreements
+    are written one at a time: only the IDs of nodes shared between agreements
+    (accounts, organizations, countries, clause types and excerpts) are kept in
+    memory, as short digests, to deduplicate them.
+
+    Agreements must already carry the keys assigned by Neo4jIndexer.
+    """
+
+    # file name -> header, in the import tool's format
+    NODE_FILES: Dict[str, List[str]] = {
+        "Account": ["account_id:ID(Account)", ":LABEL"],
+        "Agreement": [
+            "envelope_id:ID(Agreement)",
+            "name",
+            "effective_date",
+            "expiration_date",
+            "effective_on:date",
+            "expires_on:date",
+            "industry",
+            "summary",
+            "agreement_type",
+            "renewal_term",
+            "most_favored_country",
+            ":LABEL",
+        ],
+        "Organization": ["name:ID(Organization)", ":LABEL"],
+        "Country": ["name:ID(Country)", ":LABEL"],
+        "ClauseType": ["name:ID(ClauseType)", ":LABEL"],
+        "ContractClause": ["key:ID(ContractClause)", "type", ":LABEL"],
+        "Excerpt": ["key:ID(Excerpt)", "text", ":LABEL"],
+        "Risk": [
+            "key:ID(Risk)",
+            "risk_type",
+            "description",
+            "level",
+            "impact",
+            ":LABEL",
+        ],
+        "Obligation": [
+            "key:ID(Obligation)",
+            "description",
+            "due_date",
+            "due_on:date",
+            "recurring:boolean",
+            "recurrence_pattern",
+            "status",
+            "reminder_days",
+            ":LABEL",
+        ],
+    }
+
+    RELATIONSHIP_FILES: Dict[str, List[str]] = {
+        "HAS_AGREEMENT": [":START_ID(Account)", ":END_ID(Agreement)", ":TYPE"],
+        "GOVERNED_BY_LAW": [
+            ":START_ID(Agreement)",
+            ":END_ID(Country)",
+            "state",
+            ":TYPE",
+        ],
+        "IS_PARTY_TO": [
+            ":START_ID(Organization)",
+            ":END_ID(Agreement)",
+            "role",
+            ":TYPE",
+        ],
+        "INCORPORATED_IN": [
+            ":START_ID(Organization)",
+            ":END_ID(Country)",
+            "state",
+            ":TYPE",
+        ],
+        "HAS_CLAUSE": [
+            ":START_ID(Agreement)",
+            ":END_ID(ContractClause)",
+            "type",
+            ":TYPE",
+        ],
+        "HAS_EXCERPT": [":START_ID(ContractClause)", ":END_ID(Excerpt)", ":TYPE"],
+        "HAS_TYPE": [":START_ID(ContractClause)", ":END_ID(ClauseType)", ":TYPE"],
+        "HAS_RISK": [":START_ID(Agreement)", ":END_ID(Risk)", ":TYPE"],
+        "HAS_OBLIGATION": [":START_ID(Agreement)", ":END_ID(Obligation)", ":TYPE"],
+    }
+
+    # Nodes and relationships that can repeat across agreements
+    SHARED = {
+        "Account",
+        "Agreement",
+        "Organization",
+        "Country",
+        "ClauseType",
+        "Excerpt",
+        "INCORPORATED_IN",
+    }
+
+    def __init__(self, output_dir: str | Path):
+        self.output_dir = Path(output_dir)
+        self.counts: Dict[str, int] = {
+            name: 0 for name in [*self.NODE_FILES, *self.RELATIONSHIP_FILES]
+        }
+        self.skipped_agreements = 0
+        self._seen: Dict[str, set] = {name: set() for name in self.SHARED}
+        self._files = {}
+        self._writers = {}
+
+    def __enter__(self) -> "BulkImportWriter":
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for name, header in {**self.NODE_FILES, **self.RELATIONSHIP_FILES}.items():
+            file = open(self.output_dir / f"{name}.csv", "w", newline="")
+            self._files[name] = file
+            self._writers[name] = csv.writer(file)
+            self._writers[name].writerow(header)
+        return self
+
+    def __exit__(self, *exc):
+        for file in self._files.values():
+            file.close()
+        if exc[0] is None:
+            with open(self.output_dir / "counts.json", "w") as file:
+                json.dump(self.counts, file, indent=2)
+
+    @staticmethod
+    def _digest(*parts) -> bytes:
+        return hashlib.blake2b(
+            "\x1f".join(str(part) for part in parts).encode(), digest_size=12
+        ).digest()
+
+    def _write(self, name: str, row: list, identity: Tuple, local: Optional[set]):
+        """Write a row once per identity, globally for shared entries"""
+        seen = self._seen.get(name, local)
+        digest = self._digest(name, *identity)
+        if digest in seen:
+            return
+        seen.add(digest)
+        # The last column is the node label or relationship type
+        self._writers[name].writerow([*row, name])
+        self.counts[name] += 1
+
+    def _node(self, label: str, node_id, *properties, local: Optional[set] = None):
+        self._write(label, [node_id, *properties], (node_id,), local)
+
+    def _relationship(
+        self, rel_type: str, start, end, *properties, local: Optional[set] = None
+    ):
+        self._write(rel_type, [start, end, *properties], (start, end), local)
+
+    @staticmethod
+    def _is_valid(agreement: dict) -> bool:
+        """Whether MERGE would accept every key the agreement writes"""
+        governing_law = agreement.get("governing_law") or {}
+        keys = [
+            agreement.get("account_id"),
+            agreement.get("envelope_id"),
+            governing_law.get("country"),
+        ]
+        for party in agreement.get("parties") or []:
+            keys += [party.get("name"), party.get("incorporation_country")]
+        for clause in agreement.get("clauses") or []:
+            if clause.get("exists") is True:
+                keys.append(clause.get("clause_type"))
+        return all(key is not None for key in keys)
+
+    def add(self, agreement: dict):
+        """Write the nodes and relationships of one keyed agreement"""
+        if not self._is_valid(agreement):
+            # The transactional path rejects these on a null MERGE key too
+            self.skipped_agreements += 1
+            logger.warning(
+                f"Skipping agreement {agreement.get('envelope_id')}: null key"
+            )
+            return
+
+        envelope_id = agreement["envelope_id"]
+        if self._digest("Agreement", envelope_id) in self._seen["Agreement"]:
+            # Child node keys include the envelope, so only the first is kept
+            self.skipped_agreements += 1
+            logger.warning(f"Skipping repeated agreement {envelope_id}")
+            return
+
+        local = set()
+        governing_law = agreement.get("governing_law") or {}
+
+        self._node("Account", agreement["account_id"])
+        self._node(
+            "Agreement",
+            envelope_id,
+            agreement.get("agreement_name"),
+            agreement.get("effective_date"),
+            agreement.get("expiration_date"),
+            agreement.get("effective_on"),
+            agreement.get("expires_on"),
+            agreement.get("industry"),
+            agreement.get("summary"),
+            agreement.get("agreement_type"),
+            agreement.get("renewal_term"),
+            governing_law.get("most_favored_country"),
+        )
+        self._relationship(
+            "HAS_AGREEMENT", agreement["account_id"], envelope_id, local=local
+        )
+
+        self._node("Country", governing_law["country"])
+        self._relationship(
+            "GOVERNED_BY_LAW",
+            envelope_id,
+            governing_law["country"],
+            governing_law.get("state"),
+            local=local,
+        )
+
+        for party in agreement.get("parties") or []:
+            self._node("Organization", party["name"])
+            self._node("Country", party["incorporation_country"])
+            self._relationship(
+                "IS_PARTY_TO",
+                party["name"],
+                envelope_id,
+                party.get("role"),
+                local=local,
+            )
+            self._relationship(
+                "INCORPORATED_IN",
+                party["name"],
+                party["incorporation_country"],
+                party.get("incorporation_state"),
+            )
+
+        for clause in agreement.get("clauses") or []:
+            if clause.get("exists") is not True:
+                continue
+            self._node(
+                "ContractClause", clause["key"], clause["clause_type"], local=local
+            )
+            self._relationship(
+                "HAS_CLAUSE",
+                envelope_id,
+                clause["key"],
+                clause["clause_type"],
+                local=local,
+            )
+            for excerpt in clause.get("excerpt_nodes") or []:
+                self._node("Excerpt", excerpt["key"], excerpt["text"])
+                self._relationship(
+                    "HAS_EXCERPT", clause["key"], excerpt["key"], local=local
+                )
+            self._node("ClauseType", clause["clause_type"])
+            self._relationship(
+                "HAS_TYPE", clause["key"], clause["clause_type"], local=local
+            )
+
+        for risk in agreement.get("risks") or []:
+            self._node(
+                "Risk",
+                risk["key"],
+                risk.get("risk_type"),
+                risk.get("description"),
+                risk.get("level"),
+                risk.get("impact"),
+                local=local,
+            )
+            self._relationship("HAS_RISK", envelope_id, risk["key"], local=local)
+
+        for obligation in agreement.get("obligations") or []:
+            recurring = obligation.get("recurring")
+            self._node(
+                "Obligation",
+                obligation["key"],
+                obligation.get("description"),
+                obligation.get("due_date"),
+                obligation.get("due_on"),
+                None if recurring is None else str(bool(recurring)).lower(),
+                obligation.get("recurrence_pattern"),
+                obligation.get("status"),
+                obligation.get("reminder_days"),
+                local=local,
+            )
+            self._relationship(
+                "HAS_OBLIGATION", envelope_id, obligation["key"], local=local
+            )
+
+    def add_all(self, agreements: Iterable[dict]) -> Dict[str, int]:
+        """Write a stream of agreements and return the row count of every file"""
+        for agreement in agreements:
+            self.add(agreement)
+        return self.counts
+
+    def import_command(self, database: str = "neo4j") -> str:
+        """
+        neo4j-admin command that loads the files into an empty database.
+
+        Excerpts span several lines, hence --multiline-fields. Constraints and
+        indexes are created afterwards by the schema migrations.
+        """
+        nodes = " ".join(
+            f"--nodes={self.output_dir / f'{label}.csv'}" for label in self.NODE_FILES
+        )
+        relationships = " ".join(
+            f"--relationships={self.output_dir / f'{rel_type}.csv'}"
+            for rel_type in self.RELATIONSHIP_FILES
+        )
+        return (
+            f"neo4j-admin database import full {nodes} {relationships} "
+            f"--multiline-fields=true --overwrite-destination {database}"
+        )
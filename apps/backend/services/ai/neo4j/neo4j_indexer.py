@@ -1,15 +1,41 @@
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase
+from neo4j.exceptions import TransientError
+import asyncio
 import json
 import os
+import random
+import sys
+from collections import Counter
 from pathlib import Path
 import logging
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 
+from core.settings import get_settings
 from schemas.webhook import ProcessingPhase
+from utils import content_hash, normalize_text, parse_date
 from ...notification import WebhookService
-from ...tracking import ProgressTracker, BatchProgressTracker
+from ...tracking import (
+    ProgressTracker,
+    BatchProgressTracker,
+    WorkManifest,
+    WorkStatus,
+)
+from ..embeddings import ExcerptEmbeddingPipeline
+from ..storage import (
+    ContractStore,
+    Neo4jContractStore,
+    SQLiteContractStore,
+    agreement_summary,
+    load_summary,
+    portfolio_change,
+    portfolio_counts,
+    portfolio_deltas,
+    record_generation,
+)
+from .bulk_import import BulkImportWriter
+from .schema import SchemaManager
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -19,7 +45,7 @@ logger = logging.getLogger(__name__)
 class Neo4jIndexer:
     # Cypher
     CREATE_GRAPH_STATEMENT = """
-    WITH $data AS data
+    UNWIND $batch AS data
     WITH data.agreement as a
 
     // Account node
@@ -27,13 +53,17 @@ class Neo4jIndexer:
 
     // Agreement node
     MERGE (agreement:Agreement {envelope_id: a.envelope_id})
-    ON CREATE SET 
+    SET 
     agreement.name = a.agreement_name,
     agreement.effective_date = a.effective_date,
     agreement.expiration_date = a.expiration_date,
+    agreement.effective_on = date(a.effective_on),
+    agreement.expires_on = date(a.expires_on),
     agreement.agreement_type = a.agreement_type,
     agreement.renewal_term = a.renewal_term,
-    agreement.most_favored_country = a.governing_law.most_favored_country
+    agreement.most_favored_country = a.governing_law.most_favored_country,
+    agreement.industry = a.industry,
+    agreement.summary = a.summary
 
     // Create relationship between Account and Agreement
     MERGE (account)-[:HAS_AGREEMENT]->(agreement)
@@ -43,8 +73,14 @@ class Neo4jIndexer:
     MERGE (agreement)-[gbl:GOVERNED_BY_LAW]->(gl_country)
     SET gbl.state = a.governing_law.state
 
-    // Parties
+    // Parties, dropping the ones no longer listed
     WITH a, agreement
+    CALL {
+    WITH a, agreement
+    MATCH (agreement)<-[stale:IS_PARTY_TO]-(o:Organization)
+    WHERE NOT o.name IN [party IN a.parties | party.name]
+    DELETE stale
+    }
     FOREACH (party IN a.parties |
     MERGE (p:Organization {name: party.name})
     MERGE (p)-[ipt:IS_PARTY_TO]->(agreement)
@@ -54,104 +90,249 @@ class Neo4jIndexer:
     SET incorporated.state = party.incorporation_state
     )
 
-    // Clauses and excerpts
+    // Clauses keyed by envelope and clause type, excerpts shared by text hash
     WITH a, agreement, [clause IN a.clauses WHERE clause.exists = true] AS valid_clauses
+    CALL {
+    WITH agreement, valid_clauses
+    MATCH (agreement)-[:HAS_CLAUSE]->(cl:ContractClause)
+    WHERE cl.key IS NULL OR NOT cl.key IN [clause IN valid_clauses | clause.key]
+    CALL {
+        WITH cl
+        MATCH (cl)-[r:HAS_EXCERPT]->(e:Excerpt)
+        DELETE r
+        WITH e WHERE NOT (e)<-[:HAS_EXCERPT]-()
+        DELETE e
+    }
+    DETACH DELETE cl
+    }
+    CALL {
+    WITH agreement, valid_clauses
+    UNWIND valid_clauses AS clause
+    MATCH (agreement)-[:HAS_CLAUSE]->(:ContractClause {key: clause.key})-[r:HAS_EXCERPT]->(e:Excerpt)
+    WHERE e.key IS NULL OR NOT e.key IN [excerpt IN clause.excerpt_nodes | excerpt.key]
+    DELETE r
+    WITH e WHERE NOT (e)<-[:HAS_EXCERPT]-()
+    DELETE e
+    }
     FOREACH (clause IN valid_clauses |
-    CREATE (cl:ContractClause {type: clause.clause_type})
+    MERGE (cl:ContractClause {key: clause.key})
+    SET cl.type = clause.clause_type
     MERGE (agreement)-[clt:HAS_CLAUSE]->(cl)
     SET clt.type = clause.clause_type
-    FOREACH (excerpt IN clause.excerpts |
-        MERGE (cl)-[:HAS_EXCERPT]->(e:Excerpt {text: excerpt})
+    FOREACH (excerpt IN clause.excerpt_nodes |
+        MERGE (e:Excerpt {key: excerpt.key})
+        ON CREATE SET e.text = excerpt.text
+        MERGE (cl)-[:HAS_EXCERPT]->(e)
     )
     MERGE (clType:ClauseType{name: clause.clause_type})
     MERGE (cl)-[:HAS_TYPE]->(clType)
     )
 
-    // Risks
+    // Risks, keyed by envelope, type and content
     WITH a, agreement
-    FOREACH (risk IN CASE WHEN a.risks IS NOT NULL THEN a.risks ELSE [] END |
-    CREATE (r:Risk {
-        risk_type: risk.risk_type,
-        description: risk.description,
-        level: risk.level,
-        impact: risk.impact
-    })
+    WITH a, agreement, CASE WHEN a.risks IS NOT NULL THEN a.risks ELSE [] END AS risks
+    CALL {
+    WITH agreement, risks
+    MATCH (agreement)-[:HAS_RISK]->(r:Risk)
+    WHERE r.key IS NULL OR NOT r.key IN [risk IN risks | risk.key]
+    DETACH DELETE r
+    }
+    FOREACH (risk IN risks |
+    MERGE (r:Risk {key: risk.key})
+    SET
+        r.risk_type = risk.risk_type,
+        r.description = risk.description,
+        r.level = risk.level,
+        r.impact = risk.impact
     MERGE (agreement)-[:HAS_RISK]->(r)
     )
 
-    // Obligations
+    // Obligations, keyed by envelope and content
     WITH a, agreement
-    FOREACH (obligation IN CASE WHEN a.obligations IS NOT NULL THEN a.obligations ELSE [] END |
-    CREATE (o:Obligation {
-        description: obligation.description,
-        due_date: obligation.due_date,
-        recurring: obligation.recurring,
-        recurrence_pattern: obligation.recurrence_pattern,
-        status: obligation.status,
-        reminder_days: obligation.reminder_days
-    })
+    WITH a, agreement, CASE WHEN a.obligations IS NOT NULL THEN a.obligations ELSE [] END AS obligations
+    CALL {
+    WITH agreement, obligations
+    MATCH (agreement)-[:HAS_OBLIGATION]->(o:Obligation)
+    WHERE o.key IS NULL OR NOT o.key IN [obligation IN obligations | obligation.key]
+    DETACH DELETE o
+    }
+    FOREACH (obligation IN obligations |
+    MERGE (o:Obligation {key: obligation.key})
+    SET
+        o.description = obligation.description,
+        o.due_date = obligation.due_date,
+        o.due_on = date(obligation.due_on),
+        o.recurring = obligation.recurring,
+        o.recurrence_pattern = obligation.recurrence_pattern,
+        o.status = obligation.status,
+        o.reminder_days = obligation.reminder_days
     MERGE (agreement)-[:HAS_OBLIGATION]->(o)
     )
     """
 
-    CREATE_VECTOR_INDEX_STATEMENT = """
-    CREATE VECTOR INDEX excerpt_embedding IF NOT EXISTS 
-        FOR (e:Excerpt) ON (e.embedding) 
-        OPTIONS {indexConfig: {`vector.dimensions`: 1536, `vector.similarity_function`:'cosine'}} 
+    # Summaries the agreements of a batch had before it is written
+    PREVIOUS_SUMMARIES_QUERY = """
+    UNWIND $envelope_ids AS envelope_id
+    MATCH (a:Agreement {envelope_id: envelope_id})
+    RETURN a.envelope_id AS envelope_id, a.summary AS summary
+    """
+
+    # Per-account counters, changed by what the batch added and removed.
+    # Counters dropping to zero are removed.
+    UPDATE_PORTFOLIO_STATS_STATEMENT = """
+    UNWIND $deltas AS delta
+    MERGE (s:PortfolioStat {key: delta.key})
+    ON CREATE SET
+        s.account_id = delta.account_id,
+        s.kind = delta.kind,
+        s.scope = delta.scope,
+        s.name = delta.name,
+        s.count = 0
+    SET s.count = s.count + delta.count
+    WITH s WHERE s.count <= 0
+    DELETE s
+    """
+
+    # Shared nodes created up front, so concurrent writers only match them
+    PRECREATE_SHARED_STATEMENTS = {
+        "accounts": "UNWIND $names AS name MERGE (:Account {account_id: name})",
+        "organizations": "UNWIND $names AS name MERGE (:Organization {name: name})",
+        "countries": "UNWIND $names AS name MERGE (:Country {name: name})",
+        "clause_types": "UNWIND $names AS name MERGE (:ClauseType {name: name})",
+    }
+
+    # Account-scoped counts of every node label and relationship type, to
+    # check a bulk import against the CSV files that produced it
+    VERIFY_COUNT_QUERIES = {
+        "Account": "MATCH (n:Account {account_id: $account_id}) RETURN count(n) AS count",
+        "Agreement": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(n:Agreement) RETURN count(DISTINCT n) AS count",
+        "Organization": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)<-[:IS_PARTY_TO]-(n:Organization) RETURN count(DISTINCT n) AS count",
+        "Country": """
+        CALL {
+            MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[:GOVERNED_BY_LAW]->(n:Country) RETURN n
+            UNION
+            MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)<-[:IS_PARTY_TO]-(:Organization)-[:INCORPORATED_IN]->(n:Country) RETURN n
+        }
+        RETURN count(DISTINCT n) AS count
+        """,
+        "ClauseType": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_CLAUSE]->(:ContractClause)-[:HAS_TYPE]->(n:ClauseType) RETURN count(DISTINCT n) AS count",
+        "ContractClause": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_CLAUSE]->(n:ContractClause) RETURN count(DISTINCT n) AS count",
+        "Excerpt": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_CLAUSE]->(:ContractClause)-[:HAS_EXCERPT]->(n:Excerpt) RETURN count(DISTINCT n) AS count",
+        "Risk": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_RISK]->(n:Risk) RETURN count(DISTINCT n) AS count",
+        "Obligation": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_OBLIGATION]->(n:Obligation) RETURN count(DISTINCT n) AS count",
+        "HAS_AGREEMENT": "MATCH (:Account {account_id: $account_id})-[r:HAS_AGREEMENT]->(:Agreement) RETURN count(r) AS count",
+        "GOVERNED_BY_LAW": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[r:GOVERNED_BY_LAW]->() RETURN count(r) AS count",
+        "IS_PARTY_TO": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)<-[r:IS_PARTY_TO]-() RETURN count(r) AS count",
+        "INCORPORATED_IN": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)<-[:IS_PARTY_TO]-(:Organization)-[r:INCORPORATED_IN]->() RETURN count(DISTINCT r) AS count",
+        "HAS_CLAUSE": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[r:HAS_CLAUSE]->() RETURN count(r) AS count",
+        "HAS_EXCERPT": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_CLAUSE]->(:ContractClause)-[r:HAS_EXCERPT]->() RETURN count(r) AS count",
+        "HAS_TYPE": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_CLAUSE]->(:ContractClause)-[r:HAS_TYPE]->() RETURN count(r) AS count",
+        "HAS_RISK": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[r:HAS_RISK]->() RETURN count(r) AS count",
+        "HAS_OBLIGATION": "MATCH (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[r:HAS_OBLIGATION]->() RETURN count(r) AS count",
+    }
+
+    # One-off compaction of graphs written before key-based upserts.
+    # Keyed nodes, then nodes with embeddings, are kept first.
+    COMPACT_FETCH_STATEMENTS = {
+        "ContractClause": """
+        MATCH (a:Agreement)-[:HAS_CLAUSE]->(n:ContractClause)
+        RETURN [a.envelope_id, n.type] AS parts, elementId(n) AS id
+        ORDER BY n.key IS NULL
+        """,
+        "Risk": """
+        MATCH (a:Agreement)-[:HAS_RISK]->(n:Risk)
+        RETURN [a.envelope_id, n.risk_type, n.description] AS parts, elementId(n) AS id
+        ORDER BY n.key IS NULL
+        """,
+        "Obligation": """
+        MATCH (a:Agreement)-[:HAS_OBLIGATION]->(n:Obligation)
+        RETURN [a.envelope_id, n.description, n.due_date] AS parts, elementId(n) AS id
+        ORDER BY n.key IS NULL
+        """,
+        "Excerpt": """
+        MATCH (n:Excerpt)
+        RETURN [n.text] AS parts, elementId(n) AS id
+        ORDER BY n.key IS NULL, n.embedding IS NULL
+        """,
+    }
+
+    COMPACT_MERGE_STATEMENT = """
+    UNWIND $groups AS g
+    MATCH (keep) WHERE elementId(keep) = g.keep
+    SET keep.key = g.key
+    WITH keep, g
+    UNWIND g.duplicates AS duplicate_id
+    MATCH (duplicate) WHERE elementId(duplicate) = duplicate_id
+    CALL {
+        WITH keep, duplicate
+        MATCH (duplicate)-[:HAS_EXCERPT]->(e:Excerpt)
+        MERGE (keep)-[:HAS_EXCERPT]->(e)
+    }
+    CALL {
+        WITH keep, duplicate
+        MATCH (cl:ContractClause)-[:HAS_EXCERPT]->(duplicate)
+        MERGE (cl)-[:HAS_EXCERPT]->(keep)
+    }
+    DETACH DELETE duplicate
+    """
+
+    # One-off summaries of agreements ingested before they were stored,
+    # fetched in the shape of extraction output
+    SUMMARIZE_FETCH_STATEMENT = """
+    MATCH (a:Agreement)
+    WHERE a.summary IS NULL
+    WITH a LIMIT $limit
+    RETURN a {
+        .envelope_id,
+        agreement_name: a.name,
+        .agreement_type,
+        .effective_date,
+        .expiration_date,
+        .renewal_term,
+        .industry,
+        parties: [(p:Organization)-[r:IS_PARTY_TO]->(a) | {
+            name: p.name,
+            role: r.role,
+            incorporation_country: head([(p)-[:INCORPORATED_IN]->(c:Country) | c.name]),
+            incorporation_state: head([(p)-[i:INCORPORATED_IN]->(:Country) | i.state])
+        }],
+        clauses: [(a)-[:HAS_CLAUSE]->(c:ContractClause) | {clause_type: c.type, exists: true}],
+        risks: [(a)-[:HAS_RISK]->(r:Risk) | {level: r.level}]
+    } AS agreement
+    """
+
+    DELETE_PORTFOLIO_STATS_STATEMENT = """
+    MATCH (s:PortfolioStat)
+    WITH s LIMIT $limit
+    DELETE s
+    RETURN count(*) AS deleted
+    """
+
+    PORTFOLIO_SUMMARIES_QUERY = """
+    MATCH (acc:Account)-[:HAS_AGREEMENT]->(a:Agreement)
+    WHERE a.summary IS NOT NULL AND ($after IS NULL OR a.envelope_id > $after)
+    RETURN acc.account_id AS account_id, a.envelope_id AS envelope_id, a.summary AS summary
+    ORDER BY a.envelope_id
+    LIMIT $limit
+    """
+
+    SUMMARIZE_WRITE_STATEMENT = """
+    UNWIND $summaries AS s
+    MATCH (a:Agreement {envelope_id: s.envelope_id})
+    SET a.summary = s.summary
     """
 
-    CREATE_FULL_TEXT_INDICES = [
-        (
-            "excerptTextIndex",
-            "CREATE FULLTEXT INDEX excerptTextIndex IF NOT EXISTS FOR (e:Excerpt) ON EACH [e.text]",
-        ),
-        (
-            "agreementTypeTextIndex",
-            "CREATE FULLTEXT INDEX agreementTypeTextIndex IF NOT EXISTS FOR (a:Agreement) ON EACH [a.agreement_type]",
-        ),
-        (
-            "clauseTypeNameTextIndex",
-            "CREATE FULLTEXT INDEX clauseTypeNameTextIndex IF NOT EXISTS FOR (ct:ClauseType) ON EACH [ct.name]",
-        ),
-        (
-            "clauseNameTextIndex",
-            "CREATE FULLTEXT INDEX contractClauseTypeTextIndex IF NOT EXISTS FOR (c:ContractClause) ON EACH [c.type]",
-        ),
-        (
-            "organizationNameTextIndex",
-            "CREATE FULLTEXT INDEX organizationNameTextIndex IF NOT EXISTS FOR (o:Organization) ON EACH [o.name]",
-        ),
-        (
-            "contractIdIndex",
-            "CREATE INDEX agreementContractId IF NOT EXISTS FOR (a:Agreement) ON (a.envelope_id)",
-        ),
-        (
-            "riskTypeIndex",
-            "CREATE INDEX riskTypeIndex IF NOT EXISTS FOR (r:Risk) ON (r.risk_type)",
-        ),
-        (
-            "riskLevelIndex",
-            "CREATE INDEX riskLevelIndex IF NOT EXISTS FOR (r:Risk) ON (r.level)",
-        ),
-        (
-            "obligationStatusIndex",
-            "CREATE INDEX obligationStatusIndex IF NOT EXISTS FOR (o:Obligation) ON (o.status)",
-        ),
-        (
-            "obligationDueDateIndex",
-            "CREATE INDEX obligationDueDateIndex IF NOT EXISTS FOR (o:Obligation) ON (o.due_date)",
-        ),
-    ]
-
-    EMBEDDINGS_STATEMENT = """
-    MATCH (e:Excerpt) 
-    WHERE e.text is not null and e.embedding is null
-    SET e.embedding = genai.vector.encode(e.text, "OpenAI", { 
-                        token: $token, model: "text-embedding-3-small", dimensions: 1536
-                    })
+    DELETE_ORPHAN_EXCERPTS_STATEMENT = """
+    MATCH (e:Excerpt)
+    WHERE NOT (e)<-[:HAS_EXCERPT]-()
+    DETACH DELETE e
     """
 
-    def __init__(self, webhook_service: Optional[WebhookService] = None):
+    def __init__(
+        self,
+        webhook_service: Optional[WebhookService] = None,
+        batch_size: Optional[int] = None,
+    ):
         load_dotenv()
 
         self.webhook_service = webhook_service
@@ -159,44 +340,32 @@ class Neo4jIndexer:
             webhook_service, phase=ProcessingPhase.JSON_TO_GRAPH
         )
         self.batch_tracker = None
+        self.manifest = None  # Work manifest, initialized per account
+        self.written_accounts = set()  # Accounts whose agreements were written
 
         # Initialize connection parameters
         self.uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
         self.user = os.getenv("NEO4J_USERNAME", "neo4j")
         self.password = os.getenv("NEO4J_PASSWORD")
-        self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        self.database = os.getenv("NEO4J_DATABASE", "neo4j")
 
-        # Initialize driver
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
+        # Number of agreements written per transaction, and concurrent writers
+        settings = get_settings()
+        self.batch_size = batch_size or settings.neo4j_ingest_batch_size
+        self.write_concurrency = settings.neo4j_write_concurrency
+        self.write_retries = settings.neo4j_write_retries
+        self.write_retry_backoff = settings.neo4j_write_retry_backoff
+        self.retried_transactions = 0
 
-    def _index_exists(self, index_name: str) -> bool:
-        """Check if an index exists in Neo4j"""
-        check_index_query = "SHOW INDEXES WHERE name = $index_name"
-        result = self.driver.execute_query(
-            check_index_query, {"index_name": index_name}
-        )
-        return len(result.records) > 0
+        # With the in-process backend, agreements are written to its store
+        self.store: Optional[ContractStore] = None
+        if settings.storage_backend == "sqlite":
+            self.store = SQLiteContractStore(settings.sqlite_store_path)
 
-    async def create_indices(self):
-        """Create all necessary indices in Neo4j"""
-        try:
-            # Create full-text indices
-            for index_name, create_query in self.CREATE_FULL_TEXT_INDICES:
-                try:
-                    if not self._index_exists(index_name):
-                        logger.info(f"Creating index: {index_name}")
-                        self.driver.execute_query(create_query)
-                    else:
-                        logger.info(f"Index {index_name} already exists.")
-                except Exception as e:
-                    logger.error(f"Error creating index {index_name}: {e}")
-
-            # Create vector index
-            self.driver.execute_query(self.CREATE_VECTOR_INDEX_STATEMENT)
-
-        except Exception as e:
-            logger.error(f"Error creating indices: {e}")
-            raise
+        # Initialize driver
+        self.driver = AsyncGraphDatabase.driver(
+            self.uri, auth=(self.user, self.password)
+        )
 
     async def process_json_files(self, base_dir: str | Path, account_id: str):
         """Process JSON files from directory structure and load into Neo4j"""
@@ -213,46 +382,98 @@ class Neo4jIndexer:
             logger.error(f"Account directory not found for account_id: {account_id}")
             return
 
-        # Count total JSON files
-        total_files = sum(1 for _ in output_path.rglob("*.json"))
+        # Plan the work and totals from the account's manifest
+        self.manifest = WorkManifest(base_path, account_id)
+        pending_envelopes = self.manifest.pending(ProcessingPhase.JSON_TO_GRAPH)
         self.batch_tracker = BatchProgressTracker(
-            total_files, self.webhook_service, phase=ProcessingPhase.JSON_TO_GRAPH
+            len(pending_envelopes),
+            self.webhook_service,
+            phase=ProcessingPhase.JSON_TO_GRAPH,
         )
 
-        # Process each account directory
-        for envelope_dir in account_dir.iterdir():
-            if envelope_dir.is_dir():
-                # Register envelope with trackers
-                envelope_id = envelope_dir.name
-                total_jsons = len(list(envelope_dir.rglob("*.json")))
-                await self.progress_tracker.start_envelope(envelope_id, total_jsons)
-                await self.batch_tracker.register_envelope(envelope_id, total_jsons)
+        # Register envelopes and load their agreements
+        envelope_files = {}
+        pending = []
+        for envelope_id, documents in pending_envelopes.items():
+            json_files = [Path(document["output_path"]) for document in documents]
+            envelope_files[envelope_id] = json_files
+            await self.progress_tracker.start_envelope(envelope_id, len(json_files))
+            await self.batch_tracker.register_envelope(envelope_id, len(json_files))
+
+            for json_file in json_files:
+                item = await self._load_json_file(account_id, envelope_id, json_file)
+                if item:
+                    pending.append(item)
+
+        # Write agreements in batches, one transaction per batch
+        await self._write_items(pending)
+
+        # Mark envelopes complete
+        for envelope_id, json_files in envelope_files.items():
+            await self.batch_tracker.complete_envelope(envelope_id)
+            await self.progress_tracker.complete_envelope(
+                envelope_id, [str(p) for p in json_files]
+            )
+
+    async def index_stream(
+        self,
+        base_dir: str | Path,
+        account_id: str,
+        queue: asyncio.Queue,
+        total_envelopes: int,
+    ):
+        """
+        Write agreements to Neo4j as extraction hands them over through queue.
+
+        Items are (envelope_id, output_file, json_data) tuples and None ends
+        the stream. Agreements already waiting in the queue are written
+        together by the concurrent writers, and their excerpts are embedded
+        once the stream ends.
+        """
+        await self._ensure_schema()
 
-                if envelope_dir.is_dir():
-                    await self._process_envelope_directory(envelope_id, envelope_dir)
+        self.manifest = WorkManifest(base_dir, account_id)
+        self.batch_tracker = BatchProgressTracker(
+            total_envelopes, self.webhook_service, phase=ProcessingPhase.JSON_TO_GRAPH
+        )
 
-                # Mark envelope complete
+        written = False
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            batch = [item]
+            max_items = self.batch_size * self.write_concurrency
+            while len(batch) < max_items and not queue.empty():
+                item = queue.get_nowait()
+                if item is None:
+                    break
+                batch.append(item)
+
+            for envelope_id, _, json_data in batch:
+                await self.progress_tracker.start_envelope(envelope_id, 1)
+                await self.batch_tracker.register_envelope(envelope_id, 1)
+                self._tag_agreement(account_id, envelope_id, json_data)
+
+            # Agreements arriving meanwhile are written with the next batch
+            await self._write_items(batch)
+            written = True
+            for envelope_id, json_file, _ in batch:
                 await self.batch_tracker.complete_envelope(envelope_id)
                 await self.progress_tracker.complete_envelope(
-                    envelope_id, [str(p) for p in account_dir.rglob("*.json")]
+                    envelope_id, [str(json_file)]
                 )
 
-    async def _process_envelope_directory(self, envelope_id: str, envelope_dir: Path):
-        """Process all JSON files in an envelope directory"""
-        logger.info(f"Processing envelope directory: {envelope_dir}")
+            if item is None:
+                break
 
-        json_files = list(envelope_dir.glob("*.json"))
-        for json_file in json_files:
-            try:
-                await self._process_json_file(envelope_id, json_file)
-            except Exception as e:
-                await self.progress_tracker.mark_envelope_failed(
-                    envelope_id, f"Error processing {json_file}: {str(e)}"
-                )
-                logger.error(f"Error processing {json_file}: {e}")
+        if written:
+            await self.generate_embeddings()
 
-    async def _process_json_file(self, envelope_id: str, json_file: Path):
-        """Process a single JSON file and load it into Neo4j"""
+    async def _load_json_file(
+        self, account_id: str, envelope_id: str, json_file: Path
+    ) -> Optional[Tuple[str, Path, dict]]:
+        """Load a single JSON file and tag its agreement with envelope and account"""
         try:
             # Update progress
             await self.progress_tracker.update_document_progress(
@@ -260,39 +481,484 @@ class Neo4jIndexer:
             )
 
             with open(json_file, "r") as file:
-                json_string = file.read()
-                json_data = json.loads(json_string)
+                json_data = json.load(file)
+
+            self._tag_agreement(account_id, envelope_id, json_data)
+            return envelope_id, json_file, json_data
+
+        except Exception as e:
+            await self.progress_tracker.mark_envelope_failed(
+                envelope_id, f"Error processing {json_file}: {str(e)}"
+            )
+            self._mark(envelope_id, json_file, WorkStatus.FAILED, str(e))
+            logger.error(f"Error processing {json_file}: {e}")
+            return None
+
+    def _tag_agreement(self, account_id: str, envelope_id: str, json_data: dict):
+        """Add envelope_id, account_id and node keys to the agreement"""
+        agreement = json_data["agreement"]
+        agreement["envelope_id"] = envelope_id
+        agreement["account_id"] = account_id
+        self._assign_keys(agreement)
+        self._parse_dates(agreement)
+        agreement["industry"] = self._industry(agreement)
+        agreement["summary"] = agreement_summary(agreement)
+
+    def _mark(
+        self,
+        envelope_id: str,
+        json_file: Path,
+        status: WorkStatus,
+        error: Optional[str] = None,
+    ):
+        """Record the ingestion status of an extraction output in the manifest"""
+        if self.manifest:
+            # Outputs are named after their source document, "<document>.json"
+            self.manifest.mark(
+                ProcessingPhase.JSON_TO_GRAPH,
+                envelope_id,
+                json_file.stem,
+                status,
+                error=error,
+            )
 
-                # Get the account_id from the directory structure
-                # json_file.parent is envelope dir, json_file.parent.parent is account dir
-                account_id = json_file.parent.parent.name
+    @staticmethod
+    def _node_key(envelope_id: str, *parts) -> str:
+        """Deterministic key of an agreement's child node"""
+        return content_hash(envelope_id, *parts)
+
+    @classmethod
+    def _assign_keys(cls, agreement: dict):
+        """Assign deterministic keys to clauses, excerpts, risks and obligations"""
+        envelope_id = agreement["envelope_id"]
+        for clause in agreement.get("clauses") or []:
+            clause["key"] = cls._node_key(envelope_id, clause.get("clause_type"))
+            clause["excerpt_nodes"] = [
+                {"key": content_hash(excerpt), "text": excerpt}
+                for excerpt in clause.get("excerpts") or []
+            ]
+        for risk in agreement.get("risks") or []:
+            risk["key"] = cls._node_key(
+                envelope_id, risk.get("risk_type"), risk.get("description")
+            )
+        for obligation in agreement.get("obligations") or []:
+            obligation["key"] = cls._node_key(
+                envelope_id, obligation.get("description"), obligation.get("due_date")
+            )
+
+    @staticmethod
+    def _parse_dates(agreement: dict):
+        """Add ISO dates parsed from the extracted date strings, kept as they are"""
+        agreement["effective_on"] = parse_date(agreement.get("effective_date"))
+        agreement["expires_on"] = parse_date(agreement.get("expiration_date"))
+        for obligation in agreement.get("obligations") or []:
+            obligation["due_on"] = parse_date(obligation.get("due_date"))
+
+    @staticmethod
+    def _industry(agreement: dict) -> Optional[str]:
+        """Industry named by the extraction, normalized so agreements group"""
+        industry = normalize_text(
+            (agreement.get("industry_patterns") or {}).get("industry")
+        )
+        # Placeholders copied from the JSON template of the prompt
+        if industry in ("", "string", "unknown", "n/a", "none"):
+            return None
+        return industry
+
+    @staticmethod
+    def _shard(
+        items: List[Tuple[str, Path, dict]], shards: int
+    ) -> List[List[Tuple[str, Path, dict]]]:
+        """
+        Partition agreements into balanced shards, keeping agreements that
+        share an organization or an excerpt in the same shard where it has room.
+        """
+        shards = max(1, min(shards, len(items)))
+        capacity = -(-len(items) // shards)
+        buckets = [[] for _ in range(shards)]
+        owners = {}
+
+        for item in items:
+            agreement = item[2]["agreement"]
+            nodes = [
+                ("Organization", party.get("name"))
+                for party in agreement.get("parties") or []
+            ]
+            nodes += [
+                ("Excerpt", excerpt["key"])
+                for clause in agreement.get("clauses") or []
+                if clause.get("exists") is True
+                for excerpt in clause.get("excerpt_nodes") or []
+            ]
+
+            # The shard already owning most of its nodes, else the smallest
+            votes = Counter(owners[node] for node in nodes if node in owners)
+            shard = next(
+                (s for s, _ in votes.most_common() if len(buckets[s]) < capacity),
+                min(range(shards), key=lambda s: len(buckets[s])),
+            )
+            buckets[shard].append(item)
+            for node in nodes:
+                owners.setdefault(node, shard)
+
+        return buckets
+
+    async def _precreate_shared_nodes(self, agreements: List[dict]):
+        """Create the account, organization, country and clause type nodes"""
+        names = {label: set() for label in self.PRECREATE_SHARED_STATEMENTS}
+        for agreement in agreements:
+            names["accounts"].add(agreement.get("account_id"))
+            governing_law = agreement.get("governing_law") or {}
+            names["countries"].add(governing_law.get("country"))
+            for party in agreement.get("parties") or []:
+                names["organizations"].add(party.get("name"))
+                names["countries"].add(party.get("incorporation_country"))
+            for clause in agreement.get("clauses") or []:
+                if clause.get("exists") is True:
+                    names["clause_types"].add(clause.get("clause_type"))
+
+        async def create(tx):
+            for label, statement in self.PRECREATE_SHARED_STATEMENTS.items():
+                values = sorted(name for name in names[label] if name is not None)
+                if values:
+                    result = await tx.run(statement, names=values)
+                    await result.consume()
+
+        try:
+            async with self.driver.session(database=self.database) as session:
+                await session.execute_write(create)
+        except Exception as e:
+            # Writers still MERGE these nodes, only with more contention
+            logger.warning(f"Could not pre-create shared nodes: {e}")
+
+    async def _ensure_schema(self):
+        """Apply pending schema migrations, which only the Neo4j backend has"""
+        if self.store is None:
+            await SchemaManager(self.driver, self.database).ensure_current()
+
+    async def _write_items(self, items: List[Tuple[str, Path, dict]]):
+        """
+        Write agreements with up to write_concurrency concurrent writers.
+
+        Shared nodes are pre-created in one transaction, then each writer takes
+        a shard of agreements and writes it in batches. Sharding keeps most
+        agreements that touch the same nodes on one writer; the remaining
+        lock conflicts are retried with backoff.
+        """
+        if not items:
+            return
+
+        if self.store is None:
+            await self._precreate_shared_nodes(
+                [data["agreement"] for _, _, data in items]
+            )
 
-                # Add envelope_id to the agreement
-                agreement = json_data["agreement"]
-                agreement["envelope_id"] = envelope_id
-                agreement["account_id"] = account_id
+        async def write_shard(shard):
+            for start in range(0, len(shard), self.batch_size):
+                await self._write_batch(shard[start : start + self.batch_size])
 
-                # Execute Neo4j statement
-                self.driver.execute_query(self.CREATE_GRAPH_STATEMENT, data=json_data)
-                logger.info(f"Processed {json_file}")
+        shards = self._shard(items, self.write_concurrency)
+        await asyncio.gather(*(write_shard(shard) for shard in shards))
 
-            # Update batch progress
+        account_ids = {data["agreement"]["account_id"] for _, _, data in items}
+        self.written_accounts |= account_ids
+        await self._bump_generations(account_ids)
+
+    async def _bump_generations(self, account_ids):
+        """Advance the data generation of accounts, invalidating cached results"""
+        for account_id in account_ids:
+            try:
+                if self.store is not None:
+                    generation = await self.store.bump_generation(account_id)
+                else:
+                    records, _, _ = await self.driver.execute_query(
+                        Neo4jContractStore.BUMP_GENERATION_QUERY,
+                        account_id=account_id,
+                        database_=self.database,
+                    )
+                    generation = records[0]["generation"]
+                record_generation(account_id, generation)
+            except Exception as e:
+                logger.error(f"Error updating generation of account {account_id}: {e}")
+
+    @classmethod
+    async def _run_batch(cls, tx, batch: List[dict]):
+        """Write a batch and update the portfolio statistics in the same transaction"""
+        agreements = [data["agreement"] for data in batch]
+        result = await tx.run(
+            cls.PREVIOUS_SUMMARIES_QUERY,
+            envelope_ids=[agreement["envelope_id"] for agreement in agreements],
+        )
+        previous = {record["envelope_id"]: record["summary"] async for record in result}
+
+        result = await tx.run(cls.CREATE_GRAPH_STATEMENT, batch=batch)
+        await result.consume()
+
+        changes: Dict[str, Counter] = {}
+        for agreement in agreements:
+            changes.setdefault(agreement["account_id"], Counter()).update(
+                portfolio_change(
+                    load_summary(previous.get(agreement["envelope_id"])),
+                    load_summary(agreement.get("summary")),
+                )
+            )
+        deltas = [
+            delta
+            for account_id, counts in changes.items()
+            for delta in portfolio_deltas(account_id, counts)
+        ]
+        if deltas:
+            deltas.sort(key=lambda delta: delta["key"])
+            result = await tx.run(cls.UPDATE_PORTFOLIO_STATS_STATEMENT, deltas=deltas)
+            await result.consume()
+
+    async def _execute_batch(self, batch: List[dict]):
+        """Run a batch transaction, retrying deadlocks and lock timeouts with backoff"""
+        if self.store is not None:
+            await self.store.write_agreements([data["agreement"] for data in batch])
+            return
+
+        for attempt in range(self.write_retries + 1):
+            try:
+                async with self.driver.session(database=self.database) as session:
+                    async with await session.begin_transaction() as tx:
+                        await self._run_batch(tx, batch)
+                        await tx.commit()
+                return
+            except TransientError as e:
+                if attempt == self.write_retries:
+                    raise
+                self.retried_transactions += 1
+                delay = self.write_retry_backoff * 2**attempt
+                delay *= random.uniform(0.5, 1.5)
+                logger.warning(
+                    f"Transient error writing {len(batch)} agreements, "
+                    f"retrying in {delay:.2f}s: {e.code}"
+                )
+                await asyncio.sleep(delay)
+
+    async def _write_batch(self, items: List[Tuple[str, Path, dict]]):
+        """
+        Write a batch of agreements in a single transaction.
+
+        A failed batch is split in halves and retried until the bad record is
+        isolated, so one invalid agreement does not block the rest.
+        """
+        try:
+            await self._execute_batch([data for _, _, data in items])
+        except Exception as e:
+            if len(items) == 1:
+                envelope_id, json_file, _ = items[0]
+                await self.progress_tracker.mark_envelope_failed(
+                    envelope_id, f"Error processing {json_file}: {str(e)}"
+                )
+                self._mark(envelope_id, json_file, WorkStatus.FAILED, str(e))
+                logger.error(f"Error processing {json_file}: {e}")
+                return
+
+            logger.warning(
+                f"Batch of {len(items)} agreements failed, splitting to isolate: {e}"
+            )
+            middle = len(items) // 2
+            await self._write_batch(items[:middle])
+            await self._write_batch(items[middle:])
+            return
+
+        logger.info(f"Processed batch of {len(items)} agreements")
+
+        # Update manifest and batch progress
+        for envelope_id, json_file, _ in items:
+            self._mark(envelope_id, json_file, WorkStatus.DONE)
             if self.batch_tracker:
                 await self.batch_tracker.update_envelope_progress(
                     envelope_id, str(json_file)
                 )
 
-        except Exception as e:
-            await self.progress_tracker.mark_envelope_failed(envelope_id, str(e))
-            raise
+    def _iter_agreements(self, account_id: str, outputs: List[dict]):
+        """Load and key extraction outputs one at a time"""
+        for output in outputs:
+            envelope_id, json_file = output["envelope_id"], output["output_path"]
+            try:
+                with open(json_file, "r") as file:
+                    json_data = json.load(file)
+                self._tag_agreement(account_id, envelope_id, json_data)
+                yield json_data["agreement"]
+            except Exception as e:
+                logger.error(f"Error processing {json_file}: {e}")
+
+    def export_bulk_import(
+        self,
+        base_dir: str | Path,
+        account_id: str,
+        output_dir: Optional[str | Path] = None,
+    ) -> Path:
+        """
+        Convert an account's extracted agreements into CSV files for the
+        offline bulk importer, for the first load of a large account.
+        """
+        output_path = Path(output_dir or Path(base_dir) / "bulk_import" / account_id)
+        outputs = WorkManifest(base_dir, account_id).outputs()
+
+        with BulkImportWriter(output_path) as writer:
+            counts = writer.add_all(self._iter_agreements(account_id, outputs))
+
+        logger.info(
+            f"Wrote bulk import files for {len(outputs)} agreements to {output_path} "
+            f"({writer.skipped_agreements} skipped): {counts}"
+        )
+        logger.info(f"Load into an empty database with: {writer.import_command()}")
+        logger.info(
+            "Then build the portfolio statistics with: "
+            "python -m services.ai.neo4j.neo4j_indexer portfolio"
+        )
+        return output_path
+
+    async def verify_bulk_import(
+        self, account_id: str, output_dir: str | Path
+    ) -> Dict[str, Tuple[int, int]]:
+        """
+        Compare the account's node and relationship counts in the database with
+        the counts of the CSV files, returning the mismatches as
+        (expected, actual).
+
+        The files hold what the transactional path would write, so this checks
+        an imported database as well as one loaded through MERGE.
+        """
+        with open(Path(output_dir) / "counts.json", "r") as file:
+            expected = json.load(file)
+
+        mismatches = {}
+        for name, query in self.VERIFY_COUNT_QUERIES.items():
+            records, _, _ = await self.driver.execute_query(
+                query, account_id=account_id, database_=self.database
+            )
+            actual = records[0]["count"]
+            if actual != expected.get(name, 0):
+                mismatches[name] = (expected.get(name, 0), actual)
+
+        if mismatches:
+            logger.error(f"Bulk import verification failed: {mismatches}")
+        else:
+            logger.info(f"Bulk import verified: {expected}")
+        return mismatches
+
+    async def compact_graph(self):
+        """
+        Collapse duplicate clause, risk, obligation and excerpt nodes created
+        before key-based upserts, and assign them their deterministic keys.
+        """
+        for label, fetch_statement in self.COMPACT_FETCH_STATEMENTS.items():
+            records, _, _ = await self.driver.execute_query(
+                fetch_statement, database_=self.database
+            )
+
+            # Group node ids by the key ingestion would give them
+            groups = {}
+            for record in records:
+                key = content_hash(*record["parts"])
+                groups.setdefault(key, []).append(record["id"])
+
+            payload = [
+                {"key": key, "keep": ids[0], "duplicates": ids[1:]}
+                for key, ids in groups.items()
+            ]
+            duplicates = sum(len(group["duplicates"]) for group in payload)
+            logger.info(
+                f"Compacting {label}: {len(payload)} keys, {duplicates} duplicates"
+            )
+
+            for start in range(0, len(payload), self.batch_size):
+                await self.driver.execute_query(
+                    self.COMPACT_MERGE_STATEMENT,
+                    groups=payload[start : start + self.batch_size],
+                    database_=self.database,
+                )
+
+        await self.driver.execute_query(
+            self.DELETE_ORPHAN_EXCERPTS_STATEMENT, database_=self.database
+        )
+        logger.info("Graph compaction completed")
+
+    async def summarize_agreements(self):
+        """Store the summary of agreements ingested before summaries existed"""
+        summarized = 0
+        while True:
+            records, _, _ = await self.driver.execute_query(
+                self.SUMMARIZE_FETCH_STATEMENT,
+                limit=self.batch_size,
+                database_=self.database,
+            )
+            if not records:
+                break
+            await self.driver.execute_query(
+                self.SUMMARIZE_WRITE_STATEMENT,
+                summaries=[
+                    {
+                        "envelope_id": record["agreement"]["envelope_id"],
+                        "summary": agreement_summary(record["agreement"]),
+                    }
+                    for record in records
+                ],
+                database_=self.database,
+            )
+            summarized += len(records)
+        logger.info(f"Summarized {summarized} agreements")
+
+    async def rebuild_portfolio_stats(self):
+        """
+        Recount every account's portfolio statistics from the agreement
+        summaries, after bulk imports or summarize. Run it while nothing is
+        being ingested.
+        """
+        while True:
+            records, _, _ = await self.driver.execute_query(
+                self.DELETE_PORTFOLIO_STATS_STATEMENT,
+                limit=10000,
+                database_=self.database,
+            )
+            if records[0]["deleted"] == 0:
+                break
+
+        counts: Dict[str, Counter] = {}
+        after = None
+        while True:
+            records, _, _ = await self.driver.execute_query(
+                self.PORTFOLIO_SUMMARIES_QUERY,
+                after=after,
+                limit=self.batch_size,
+                database_=self.database,
+            )
+            if not records:
+                break
+            for record in records:
+                counts.setdefault(record["account_id"], Counter()).update(
+                    portfolio_counts(load_summary(record["summary"]))
+                )
+            after = records[-1]["envelope_id"]
+
+        for account_id, account_counts in counts.items():
+            deltas = portfolio_deltas(account_id, account_counts)
+            for start in range(0, len(deltas), self.batch_size):
+                await self.driver.execute_query(
+                    self.UPDATE_PORTFOLIO_STATS_STATEMENT,
+                    deltas=deltas[start : start + self.batch_size],
+                    database_=self.database,
+                )
+        await self._bump_generations(counts)
+        logger.info(f"Rebuilt the portfolio statistics of {len(counts)} accounts")
 
     async def generate_embeddings(self):
         """Generate embeddings for contract excerpts"""
         logger.info("Generating Embeddings for Contract Excerpts...")
         try:
-            self.driver.execute_query(
-                self.EMBEDDINGS_STATEMENT, token=self.openai_api_key
-            )
+            if self.store is not None:
+                await self.store.generate_embeddings(self.webhook_service)
+            else:
+                await ExcerptEmbeddingPipeline(
+                    self.driver, self.database, self.webhook_service
+                ).run()
+            # Similarity search results change with the new embeddings
+            await self._bump_generations(self.written_accounts)
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             raise
@@ -300,14 +966,14 @@ class Neo4jIndexer:
     async def index_documents(
         self, base_dir: str | Path = "./data", account_id: str = None
     ):
-        """Main method to process documents and create indices"""
+        """Main method to process documents and generate embeddings"""
         try:
+            # Constraints and indexes must exist before any MERGE runs
+            await self._ensure_schema()
+
             # Process all JSON files
             await self.process_json_files(base_dir, account_id)
 
-            # Create indices
-            await self.create_indices()
-
             # Generate embeddings
             await self.generate_embeddings()
 
@@ -315,19 +981,41 @@ class Neo4jIndexer:
             logger.error(f"Error indexing documents: {e}")
             raise
 
-    def close(self):
+    async def close(self):
         """Close the Neo4j driver connection"""
         if self.driver:
-            self.driver.close()
+            await self.driver.close()
+        if self.store:
+            await self.store.close()
 
 
-def main():
+async def main():
     indexer = Neo4jIndexer()
     try:
-        indexer.index_documents()
+        # `python -m services.ai.neo4j.neo4j_indexer compact` collapses duplicates
+        if len(sys.argv) > 1 and sys.argv[1] == "compact":
+            await indexer.compact_graph()
+        elif len(sys.argv) > 1 and sys.argv[1] == "migrate":
+            await SchemaManager(indexer.driver, indexer.database).migrate()
+        # `... summarize` stores summaries on agreements ingested without one
+        elif len(sys.argv) > 1 and sys.argv[1] == "summarize":
+            await indexer.summarize_agreements()
+            await indexer.rebuild_portfolio_stats()
+        # `... portfolio` recounts the portfolio statistics, after bulk imports
+        elif len(sys.argv) > 1 and sys.argv[1] == "portfolio":
+            await indexer.rebuild_portfolio_stats()
+        # `... export <account_id>` writes bulk import CSVs, `verify` checks them
+        elif len(sys.argv) > 2 and sys.argv[1] == "export":
+            indexer.export_bulk_import("./data", sys.argv[2])
+        elif len(sys.argv) > 2 and sys.argv[1] == "verify":
+            await indexer.verify_bulk_import(
+                sys.argv[2], Path("./data") / "bulk_import" / sys.argv[2]
+            )
+        else:
+            await indexer.index_documents()
     finally:
-        indexer.close()
+        await indexer.close()
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -0,0 +1,264 @@
+from neo4j import AsyncDriver, AsyncGraphDatabase
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple, Union
+
+from core.settings import get_settings
+from utils import parse_date
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SchemaNotReadyError(RuntimeError):
+    """Raised when the graph schema is older than the code expects"""
+
+
+# (label, extracted date string, native date) properties
+DATE_PROPERTIES = [
+    ("Agreement", "effective_date", "effective_on"),
+    ("Agreement", "expiration_date", "expires_on"),
+    ("Obligation", "due_date", "due_on"),
+]
+
+DATE_WRITE_BATCH_SIZE = 10000
+
+
+async def parse_stored_dates(driver: AsyncDriver, database: str):
+    """
+    Set the native dates of stored nodes from their date strings.
+
+    Strings are parsed as ingestion parses them; unreadable ones, including
+    invalid ISO-like dates such as 2024-13-45, leave the native date unset.
+    """
+    for label, source, target in DATE_PROPERTIES:
+        records, _, _ = await driver.execute_query(
+            f"MATCH (n:{label}) WHERE n.{source} IS NOT NULL AND n.{target} IS NULL "
+            f"RETURN elementId(n) AS id, n.{source} AS text",
+            database_=database,
+        )
+        rows = [
+            {"id": record["id"], "date": parse_date(record["text"])}
+            for record in records
+        ]
+        rows = [row for row in rows if row["date"]]
+        for start in range(0, len(rows), DATE_WRITE_BATCH_SIZE):
+            await driver.execute_query(
+                f"UNWIND $rows AS row MATCH (n:{label}) WHERE elementId(n) = row.id "
+                f"SET n.{target} = date(row.date)",
+                rows=rows[start : start + DATE_WRITE_BATCH_SIZE],
+                database_=database,
+            )
+
+
+# Cypher statement, or a function run with the driver and database
+Statement = Union[str, Callable[[AsyncDriver, str], Awaitable[None]]]
+
+
+class SchemaManager:
+    """
+    Versioned schema migrations for the contract graph.
+
+    Every migration runs once; the applied version is recorded on a
+    SchemaVersion node so later startups only need a single lookup.
+    """
+
+    # (version, description, statements). The vector index is not versioned:
+    # its dimensionality follows the EMBEDDING_DIMENSIONS setting.
+    MIGRATIONS: List[Tuple[int, str, List[Statement]]] = [
+        (
+            1,
+            "Uniqueness constraints for every MERGE key and search indexes",
+            [
+                # Replaced by the uniqueness constraint on the same property
+                "DROP INDEX agreementContractId IF EXISTS",
+                "CREATE CONSTRAINT accountIdUnique IF NOT EXISTS FOR (n:Account) REQUIRE n.account_id IS UNIQUE",
+                "CREATE CONSTRAINT agreementEnvelopeIdUnique IF NOT EXISTS FOR (n:Agreement) REQUIRE n.envelope_id IS UNIQUE",
+                "CREATE CONSTRAINT organizationNameUnique IF NOT EXISTS FOR (n:Organization) REQUIRE n.name IS UNIQUE",
+                "CREATE CONSTRAINT countryNameUnique IF NOT EXISTS FOR (n:Country) REQUIRE n.name IS UNIQUE",
+                "CREATE CONSTRAINT clauseTypeNameUnique IF NOT EXISTS FOR (n:ClauseType) REQUIRE n.name IS UNIQUE",
+                "CREATE CONSTRAINT contractClauseKeyUnique IF NOT EXISTS FOR (n:ContractClause) REQUIRE n.key IS UNIQUE",
+                "CREATE CONSTRAINT riskKeyUnique IF NOT EXISTS FOR (n:Risk) REQUIRE n.key IS UNIQUE",
+                "CREATE CONSTRAINT obligationKeyUnique IF NOT EXISTS FOR (n:Obligation) REQUIRE n.key IS UNIQUE",
+                "CREATE FULLTEXT INDEX excerptTextIndex IF NOT EXISTS FOR (e:Excerpt) ON EACH [e.text]",
+                "CREATE FULLTEXT INDEX agreementTypeTextIndex IF NOT EXISTS FOR (a:Agreement) ON EACH [a.agreement_type]",
+                "CREATE FULLTEXT INDEX clauseTypeNameTextIndex IF NOT EXISTS FOR (ct:ClauseType) ON EACH [ct.name]",
+                "CREATE FULLTEXT INDEX contractClauseTypeTextIndex IF NOT EXISTS FOR (c:ContractClause) ON EACH [c.type]",
+                "CREATE FULLTEXT INDEX organizationNameTextIndex IF NOT EXISTS FOR (o:Organization) ON EACH [o.name]",
+                "CREATE INDEX riskTypeIndex IF NOT EXISTS FOR (r:Risk) ON (r.risk_type)",
+                "CREATE INDEX riskLevelIndex IF NOT EXISTS FOR (r:Risk) ON (r.level)",
+                "CREATE INDEX obligationStatusIndex IF NOT EXISTS FOR (o:Obligation) ON (o.status)",
+                "CREATE INDEX obligationDueDateIndex IF NOT EXISTS FOR (o:Obligation) ON (o.due_date)",
+            ],
+        ),
+        (
+            2,
+            "Excerpts keyed by normalized text hash",
+            [
+                "CREATE CONSTRAINT excerptKeyUnique IF NOT EXISTS FOR (n:Excerpt) REQUIRE n.key IS UNIQUE",
+            ],
+        ),
+        (
+            3,
+            "Native dates parsed from the extracted date strings, with range indexes",
+            [
+                "CREATE RANGE INDEX agreementEffectiveOnIndex IF NOT EXISTS FOR (a:Agreement) ON (a.effective_on)",
+                "CREATE RANGE INDEX agreementExpiresOnIndex IF NOT EXISTS FOR (a:Agreement) ON (a.expires_on)",
+                "CREATE RANGE INDEX obligationDueOnIndex IF NOT EXISTS FOR (o:Obligation) ON (o.due_on)",
+                # Parsed in Python, so an invalid date cannot abort the migration
+                parse_stored_dates,
+            ],
+        ),
+        (
+            4,
+            "Per-account portfolio statistics",
+            [
+                "CREATE CONSTRAINT portfolioStatKeyUnique IF NOT EXISTS FOR (n:PortfolioStat) REQUIRE n.key IS UNIQUE",
+                "CREATE RANGE INDEX portfolioStatKindIndex IF NOT EXISTS FOR (n:PortfolioStat) ON (n.account_id, n.kind, n.scope)",
+            ],
+        ),
+    ]
+
+    LATEST_VERSION = max(version for version, _, _ in MIGRATIONS)
+
+    GET_VERSION_QUERY = """
+    OPTIONAL MATCH (s:SchemaVersion {name: 'contract_graph'})
+    RETURN coalesce(s.version, 0) AS version
+    """
+
+    VECTOR_INDEX_NAME = "excerpt_embedding"
+
+    GET_VECTOR_DIMENSIONS_QUERY = """
+    SHOW VECTOR INDEXES YIELD name, options
+    WHERE name = $name
+    RETURN options.indexConfig.`vector.dimensions` AS dimensions
+    """
+
+    # Index options do not accept parameters, the dimensions are formatted in
+    CREATE_VECTOR_INDEX_STATEMENT = """
+    CREATE VECTOR INDEX excerpt_embedding IF NOT EXISTS
+        FOR (e:Excerpt) ON (e.embedding)
+        OPTIONS {indexConfig: {`vector.dimensions`: %d, `vector.similarity_function`:'cosine'}}
+    """
+
+    DROP_VECTOR_INDEX_STATEMENT = "DROP INDEX excerpt_embedding IF EXISTS"
+
+    # Embeddings of another dimensionality cannot be indexed, so they are dropped
+    # and recomputed by the embedding pipeline
+    CLEAR_EMBEDDINGS_STATEMENT = """
+    MATCH (e:Excerpt) WHERE e.embedding IS NOT NULL
+    CALL { WITH e REMOVE e.embedding } IN TRANSACTIONS OF 10000 ROWS
+    """
+
+    SET_VERSION_QUERY = """
+    MERGE (s:SchemaVersion {name: 'contract_graph'})
+    SET s.version = $version, s.description = $description, s.applied_at = datetime()
+    """
+
+    def __init__(
+        self,
+        driver: AsyncDriver,
+        database: str = "neo4j",
+        embedding_dimensions: Optional[int] = None,
+    ):
+        self.driver = driver
+        self.database = database
+        self.embedding_dimensions = (
+            embedding_dimensions or get_settings().embedding_dimensions
+        )
+
+    async def current_version(self) -> int:
+        """Get the schema version recorded in the database"""
+        records, _, _ = await self.driver.execute_query(
+            self.GET_VERSION_QUERY, database_=self.database
+        )
+        return records[0]["version"] if records else 0
+
+    async def migrate(self) -> int:
+        """Apply every migration newer than the recorded version"""
+        current = await self.current_version()
+
+        for version, description, statements in self.MIGRATIONS:
+            if version <= current:
+                continue
+
+            logger.info(f"Applying graph schema migration {version}: {description}")
+            for statement in statements:
+                if callable(statement):
+                    await statement(self.driver, self.database)
+                else:
+                    await self.driver.execute_query(statement, database_=self.database)
+
+            await self.driver.execute_query(
+                self.SET_VERSION_QUERY,
+                version=version,
+                description=description,
+                database_=self.database,
+            )
+            current = version
+
+        await self.ensure_vector_index()
+
+        logger.info(f"Graph schema is at version {current}")
+        return current
+
+    async def vector_index_dimensions(self) -> Optional[int]:
+        """Get the dimensionality of the excerpt vector index, if it exists"""
+        records, _, _ = await self.driver.execute_query(
+            self.GET_VECTOR_DIMENSIONS_QUERY,
+            name=self.VECTOR_INDEX_NAME,
+            database_=self.database,
+        )
+        return records[0]["dimensions"] if records else None
+
+    async def ensure_vector_index(self):
+        """Create the vector index, rebuilding it if the configured dimensions changed"""
+        dimensions = await self.vector_index_dimensions()
+        if dimensions == self.embedding_dimensions:
+            return
+
+        if dimensions is not None:
+            logger.info(
+                f"Rebuilding vector index {self.VECTOR_INDEX_NAME}: "
+                f"{dimensions} -> {self.embedding_dimensions} dimensions"
+            )
+            await self.driver.execute_query(
+                self.DROP_VECTOR_INDEX_STATEMENT, database_=self.database
+            )
+            # CALL ... IN TRANSACTIONS needs an auto-commit transaction
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(self.CLEAR_EMBEDDINGS_STATEMENT)
+                await result.consume()
+
+        await self.driver.execute_query(
+            self.CREATE_VECTOR_INDEX_STATEMENT % int(self.embedding_dimensions),
+            database_=self.database,
+        )
+
+    async def ensure_current(self):
+        """Fail fast if the schema has not been migrated to the latest version"""
+        current = await self.current_version()
+        if current < self.LATEST_VERSION:
+            raise SchemaNotReadyError(
+                f"Graph schema is at version {current}, expected "
+                f"{self.LATEST_VERSION}. Run the schema migrations first."
+            )
+
+        dimensions = await self.vector_index_dimensions()
+        if dimensions != self.embedding_dimensions:
+            raise SchemaNotReadyError(
+                f"Vector index has {dimensions} dimensions, expected "
+                f"{self.embedding_dimensions}. Run the schema migrations first."
+            )
+
+
+async def migrate_schema():
+    """Apply pending schema migrations using the configured Neo4j connection"""
+    config = get_settings().get_neo4j_config()
+    driver = AsyncGraphDatabase.driver(
+        config["uri"], auth=(config["user"], config["password"])
+    )
+    try:
+        return await SchemaManager(driver, config["database"]).migrate()
+    finally:
+        await driver.close()
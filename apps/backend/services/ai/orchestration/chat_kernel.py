@@ -8,21 +8,31 @@ from semantic_kernel.connectors.ai.function_choice_behavior import (
 )
 from semantic_kernel.functions.kernel_arguments import KernelArguments
 from semantic_kernel.contents.chat_history import ChatHistory
-from services.ai import ContractPlugin, ContractSearchService
-from typing import Dict
+from services.ai import ContractPlugin
+from typing import Dict, Optional
 import os
 from dotenv import load_dotenv
 
+from .contract_service import get_contract_service
+
 load_dotenv()
 
 
 class ChatService:
     def __init__(self):
         self._openai_api_key = os.getenv("OPENAI_API_KEY")
-        self._neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-        self._neo4j_user = os.getenv("NEO4J_USER", "neo4j")
-        self._neo4j_password = os.getenv("NEO4J_PASSWORD")
         self._chat_histories: Dict[str, ChatHistory] = {}
+        # Created on first use, then shared by every kernel
+        self._chat_completion: Optional[OpenAIChatCompletion] = None
+
+    def _get_chat_completion(self) -> OpenAIChatCompletion:
+        if self._chat_completion is None:
+            self._chat_completion = OpenAIChatCompletion(
+                ai_model_id="gpt-4o",
+                api_key=self._openai_api_key,
+                service_id="contract_search",
+            )
+        return self._chat_completion
 
     def get_or_create_history(self, user_id: str) -> ChatHistory:
         """Get existing chat history or create new one for user"""
@@ -39,13 +49,8 @@ class ChatService:
         """Initialize and configure the semantic kernel"""
         kernel = Kernel()
 
-        # Initialize ContractSearchService
-        contract_search_neo4j = ContractSearchService(
-            uri=self._neo4j_uri,
-            user=self._neo4j_user,
-            pwd=self._neo4j_password,
-            account_id=account_id,
-        )
+        # Cached ContractSearchService of the account, shared with the API routes
+        contract_search_neo4j = get_contract_service(account_id)
 
         # Add ContractPlugin to kernel
         kernel.add_plugin(
@@ -54,13 +59,7 @@ class ChatService:
         )
 
         # Add OpenAI chat completion service
-        kernel.add_service(
-            OpenAIChatCompletion(
-                ai_model_id="gpt-4o",
-                api_key=self._openai_api_key,
-                service_id="contract_search",
-            )
-        )
+        kernel.add_service(self._get_chat_completion())
 
         # Configure function calling settings
         settings = kernel.get_prompt_execution_settings_from_service_id(
@@ -1,5 +1,6 @@
-from typing import List, Annotated, Tuple
-from schemas import Agreement, ClauseType, Risk, Obligation, ContractClause
+from datetime import date
+from typing import List, Annotated, Optional
+from schemas import Agreement, ClauseType, Risk, Page
 from semantic_kernel.functions import kernel_function
 from .contract_service import ContractSearchService
 
@@ -14,31 +15,35 @@ class ContractPlugin:
         self, envelope_id: str
     ) -> Annotated[Agreement, "A contract"]:
         """Gets details about a contract with the given id."""
-        return await self.contract_search_service.get_contract(envelope_id)
+        return await self.contract_search_service.cached_call(
+            "get_contract", envelope_id=envelope_id
+        )
 
     @kernel_function
     async def get_contracts(
-        self, organization_name: str
-    ) -> Annotated[List[Agreement], "A list of contracts"]:
-        """Gets basic details about all contracts where one of the parties has a name similar to the given organization name."""
-        return await self.contract_search_service.get_contracts(organization_name)
+        self, organization_name: str, cursor: Optional[str] = None
+    ) -> Annotated[Page, "A page of contracts"]:
+        """Gets basic details about all contracts where one of the parties has a name similar to the given organization name. Returns a page of results: pass its next_cursor as cursor to get the next page."""
+        return await self.contract_search_service.cached_call(
+            "get_contracts", organization_name=organization_name, cursor=cursor
+        )
 
     @kernel_function
     async def get_contracts_without_clause(
-        self, clause_type: ClauseType
-    ) -> Annotated[List[Agreement], "A list of contracts"]:
-        """Gets basic details from contracts without a clause of the given type."""
-        return await self.contract_search_service.get_contracts_without_clause(
-            clause_type=clause_type
+        self, clause_type: ClauseType, cursor: Optional[str] = None
+    ) -> Annotated[Page, "A page of contracts"]:
+        """Gets basic details from contracts without a clause of the given type. Returns a page of results: pass its next_cursor as cursor to get the next page."""
+        return await self.contract_search_service.cached_call(
+            "get_contracts_without_clause", clause_type=clause_type, cursor=cursor
         )
 
     @kernel_function
     async def get_contracts_with_clause_type(
-        self, clause_type: ClauseType
-    ) -> Annotated[List[Agreement], "A list of contracts"]:
-        """Gets basic details from contracts with a clause of the given type."""
-        return await self.contract_search_service.get_contracts_with_clause_type(
-            clause_type=clause_type
+        self, clause_type: ClauseType, cursor: Optional[str] = None
+    ) -> Annotated[Page, "A page of contracts"]:
+        """Gets basic details from contracts with a clause of the given type. Returns a page of results: pass its next_cursor as cursor to get the next page."""
+        return await self.contract_search_service.cached_call(
+            "get_contracts_with_clause_type", clause_type=clause_type, cursor=cursor
         )
 
     @kernel_function
@@ -48,8 +53,18 @@ class ContractPlugin:
         List[Agreement], "A list of contracts with similar text in one of their clauses"
     ]:
         """Gets basic details from contracts having semantically similar text in one of their clauses to the to the 'clause_text' provided."""
-        return await self.contract_search_service.get_contracts_similar_text(
-            clause_text=clause_text
+        return await self.contract_search_service.cached_call(
+            "get_contracts_similar_text", clause_text=clause_text
+        )
+
+    @kernel_function
+    async def search_contract_excerpts(self, text: str) -> Annotated[
+        List[Agreement],
+        "A list of contracts with the matching excerpts of their clauses",
+    ]:
+        """Finds the clause excerpts best matching 'text', by keywords and by meaning, in a single search. Returns them grouped by contract and clause type. Prefer this over several separate searches when looking for a clause or specific wording."""
+        return await self.contract_search_service.cached_call(
+            "search_contract_excerpts", text=text
         )
 
     @kernel_function
@@ -66,50 +81,83 @@ class ContractPlugin:
         self, envelope_id: str
     ) -> Annotated[Agreement, "A contract"]:
         """Gets basic contract details and its excerpts."""
-        return await self.contract_search_service.get_contract_excerpts(
-            envelope_id=envelope_id
+        return await self.contract_search_service.cached_call(
+            "get_contract_excerpts", envelope_id=envelope_id
         )
 
     @kernel_function
     async def get_high_risk_clauses(
-        self,
-    ) -> Annotated[
-        List[Tuple[ContractClause, Risk]], "High risk clauses across all contracts"
-    ]:
-        """Gets all contract clauses that have been marked as high risk."""
-        return await self.contract_search_service.get_high_risk_clauses()
+        self, cursor: Optional[str] = None
+    ) -> Annotated[Page, "A page of high risks with their contract and clause types"]:
+        """Gets all risks marked as high, with the contract they belong to and its clause types. Returns a page of results: pass its next_cursor as cursor to get the next page."""
+        return await self.contract_search_service.cached_call(
+            "get_high_risk_clauses", cursor=cursor
+        )
 
     @kernel_function
     async def get_contract_risks(
         self, envelope_id: str
     ) -> Annotated[List[Risk], "Risks for a specific contract"]:
         """Gets all risks associated with a specific contract."""
-        return await self.contract_search_service.get_contract_risks(envelope_id)
+        return await self.contract_search_service.cached_call(
+            "get_contract_risks", envelope_id=envelope_id
+        )
 
     @kernel_function
     async def compare_contracts_by_party(
         self, party_name: str
     ) -> Annotated[dict, "Analysis of contracts by party"]:
         """Analyzes patterns in clauses across all contracts with a specific party."""
-        return await self.contract_search_service.compare_contracts_by_party(party_name)
+        return await self.contract_search_service.cached_call(
+            "compare_contracts_by_party", party_name=party_name
+        )
 
     @kernel_function
     async def analyze_industry_patterns(
         self, industry: str
     ) -> Annotated[dict, "Analysis of contracts by industry"]:
         """Analyzes common clause patterns within an industry."""
-        return await self.contract_search_service.analyze_industry_patterns(industry)
+        return await self.contract_search_service.cached_call(
+            "analyze_industry_patterns", industry=industry
+        )
+
+    @kernel_function
+    async def get_portfolio_overview(
+        self,
+    ) -> Annotated[dict, "Statistics of the account's contract portfolio"]:
+        """Gets how many contracts the account has, by agreement type, industry, clause type, risk level and party."""
+        return await self.contract_search_service.cached_call("get_portfolio_overview")
 
     @kernel_function
     async def get_upcoming_obligations(
-        self, days_ahead: int = 30
-    ) -> Annotated[List[Obligation], "Upcoming obligations"]:
-        """Gets all obligations due within the specified number of days."""
-        return await self.contract_search_service.get_upcoming_obligations(days_ahead)
+        self, days_ahead: int = 30, cursor: Optional[str] = None
+    ) -> Annotated[Page, "A page of upcoming obligations"]:
+        """Gets all obligations due within the specified number of days. Returns a page of results: pass its next_cursor as cursor to get the next page."""
+        # Cached per day, as the window starts from today
+        return await self.contract_search_service.cached_call(
+            "get_upcoming_obligations",
+            days_ahead=days_ahead,
+            cursor=cursor,
+            today=date.today().isoformat(),
+        )
+
+    @kernel_function
+    async def get_expiring_contracts(
+        self, days_ahead: int = 90, cursor: Optional[str] = None
+    ) -> Annotated[Page, "A page of expiring agreements"]:
+        """Gets the agreements expiring within the specified number of days. Returns a page of results: pass its next_cursor as cursor to get the next page."""
+        return await self.contract_search_service.cached_call(
+            "get_expiring_contracts",
+            days_ahead=days_ahead,
+            cursor=cursor,
+            today=date.today().isoformat(),
+        )
 
     @kernel_function
     async def track_recurring_obligations(
-        self,
-    ) -> Annotated[List[Obligation], "Recurring obligations"]:
-        """Gets all recurring obligations."""
-        return await self.contract_search_service.track_recurring_obligations()
+        self, cursor: Optional[str] = None
+    ) -> Annotated[Page, "A page of recurring obligations"]:
+        """Gets all recurring obligations. Returns a page of results: pass its next_cursor as cursor to get the next page."""
+        return await self.contract_search_service.cached_call(
+            "track_recurring_obligations", cursor=cursor
+        )
@@ -1,214 +1,188 @@
-from neo4j import GraphDatabase
-from typing import List
-from neo4j_graphrag.retrievers import VectorCypherRetriever, Text2CypherRetriever
-from neo4j_graphrag.embeddings import OpenAIEmbeddings
-from neo4j_graphrag.llm import OpenAILLM
+from datetime import date
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
 
 from schemas import (
     Agreement,
     ClauseType,
-    Party,
     ContractClause,
     Risk,
     RiskLevel,
     RiskType,
     Obligation,
     ObligationStatus,
+    AgreementRisk,
+    Page,
 )
-from utils import my_vector_search_excerpt_record_formatter
+from core.settings import get_settings
+from ..storage import (
+    ContractStore,
+    current_generation,
+    get_contract_store,
+    load_summary,
+)
+from .pagination import decode_cursor, encode_cursor
+from .result_cache import get_tool_result_cache
+from .service_cache import ServiceCache
 
 
 class ContractSearchService:
-    def __init__(self, uri, user, pwd, account_id: str):
-        driver = GraphDatabase.driver(uri, auth=(user, pwd))
-        self._driver = driver
+    def __init__(
+        self,
+        uri,
+        user,
+        pwd,
+        account_id: str,
+        database: str = "neo4j",
+        store: Optional[ContractStore] = None,
+    ):
+        # Queries go through the configured storage backend
+        self._store = store or get_contract_store(uri, user, pwd, database)
         self._account_id = account_id  # Store account_id
-        self._openai_embedder = OpenAIEmbeddings(model="text-embedding-3-small")
-        # Create LLM object. Used to generate the CYPHER queries
-        self._llm = OpenAILLM(model_name="gpt-4o", model_params={"temperature": 0})
-
-    async def get_contract(self, envelope_id: int) -> Agreement:
-
-        GET_CONTRACT_BY_ID_QUERY = """
-            MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement {envelope_id: $envelope_id})
-            MATCH (a)-[:HAS_CLAUSE]->(clause:ContractClause)
-            WITH a, collect(clause) as clauses
-            MATCH (country:Country)-[i:INCORPORATED_IN]-(p:Organization)-[r:IS_PARTY_TO]-(a)
-            WITH a, clauses, collect(p) as parties, collect(country) as countries, collect(r) as roles, collect(i) as states
-            RETURN a as agreement, clauses, parties, countries, roles, states
+        # Tool results shared by every user of the account
+        self._result_cache = get_tool_result_cache()
+        # Tool results are paginated to keep the chat context small
+        settings = get_settings()
+        self._page_size = settings.tool_page_size
+        self._max_excerpts = settings.tool_max_excerpts
+
+    async def cached_call(self, name: str, **arguments):
+        """
+        Result of the named method, reused until the account's data changes.
+        The result is shared between callers and must not be modified.
         """
+        generation = await current_generation(self._store, self._account_id)
+        found, result = self._result_cache.get(
+            self._account_id, generation, name, arguments
+        )
+        if not found:
+            result = await getattr(self, name)(**arguments)
+            self._result_cache.put(
+                self._account_id, generation, name, arguments, result
+            )
+        return result
 
-        agreement_node = {}
+    def _page(self, records: list, sort_key: Callable) -> Tuple[list, Optional[str]]:
+        """
+        Records of a page fetched with one extra record, and the cursor of the
+        next page if that extra record exists
+        """
+        if len(records) <= self._page_size:
+            return records, None
+        records = records[: self._page_size]
+        return records, encode_cursor(sort_key(records[-1]))
 
-        records, _, _ = self._driver.execute_query(
-            GET_CONTRACT_BY_ID_QUERY,
-            {"envelope_id": envelope_id, "account_id": self._account_id},
-        )
+    @staticmethod
+    def _agreement_sort_key(record) -> list:
+        return [record["envelope_id"]]
 
-        if len(records) == 1:
-            agreement_node = records[0].get("agreement")
-            party_list = records[0].get("parties")
-            role_list = records[0].get("roles")
-            country_list = records[0].get("countries")
-            state_list = records[0].get("states")
-            clause_list = records[0].get("clauses")
-
-        return await self._get_agreement(
-            agreement_node,
-            format="long",
-            party_list=party_list,
-            role_list=role_list,
-            country_list=country_list,
-            state_list=state_list,
-            clause_list=clause_list,
-        )
+    @staticmethod
+    def _obligation_sort_key(record) -> list:
+        return [str(record["o"].get("due_on") or ""), record["o"]["key"]]
 
-    async def get_contracts(self, organization_name: str) -> List[Agreement]:
-        GET_CONTRACTS_BY_PARTY_NAME = """
-            MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)
-            CALL db.index.fulltext.queryNodes('organizationNameTextIndex', $organization_name)
-            YIELD node AS o, score
-            WITH o, score
-            ORDER BY score DESC
-            LIMIT 1
-            WITH o
-            MATCH (o)-[:IS_PARTY_TO]->(a:Agreement)
-            WITH a
-            MATCH (country:Country)-[i:INCORPORATED_IN]-(p:Organization)-[r:IS_PARTY_TO]-(a:Agreement)
-            RETURN a as agreement, collect(p) as parties, collect(r) as roles, collect(country) as countries, collect(i) as states
-        """
+    @staticmethod
+    def _expiry_sort_key(record) -> list:
+        return [record["expires_on"], record["envelope_id"]]
 
-        # run the Cypher query
-        records, _, _ = self._driver.execute_query(
-            GET_CONTRACTS_BY_PARTY_NAME,
-            {"organization_name": organization_name, "account_id": self._account_id},
+    async def get_contract(self, envelope_id: int) -> Agreement:
+        records = await self._store.get_contract(self._account_id, envelope_id)
+        if len(records) != 1:
+            return {}
+        return self._summary_agreement(records[0], format="long")
+
+    async def get_contracts(
+        self, organization_name: str, cursor: Optional[str] = None
+    ) -> Page:
+        records, next_cursor = self._page(
+            await self._store.get_contracts_by_party(
+                self._account_id,
+                organization_name,
+                after=decode_cursor(cursor),
+                limit=self._page_size + 1,
+            ),
+            self._agreement_sort_key,
         )
 
         # Build the result
         all_aggrements = []
         for row in records:
-            agreement_node = row["agreement"]
-            party_list = row["parties"]
-            role_list = row["roles"]
-            country_list = row["countries"]
-            state_list = row["states"]
-
-            agreement: Agreement = await self._get_agreement(
-                format="short",
-                agreement_node=agreement_node,
-                party_list=party_list,
-                role_list=role_list,
-                country_list=country_list,
-                state_list=state_list,
-            )
-            all_aggrements.append(agreement)
+            all_aggrements.append(self._summary_agreement(row))
 
-        return all_aggrements
+        return {"items": all_aggrements, "next_cursor": next_cursor}
 
     async def get_contracts_with_clause_type(
-        self, clause_type: ClauseType
-    ) -> List[Agreement]:
-        GET_CONTRACT_WITH_CLAUSE_TYPE_QUERY = """
-            MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)
-            MATCH (a)-[:HAS_CLAUSE]->(cc:ContractClause {type: $clause_type})
-            WITH a
-            MATCH (country:Country)-[i:INCORPORATED_IN]-(p:Organization)-[r:IS_PARTY_TO]-(a:Agreement)
-            RETURN a as agreement, collect(p) as parties, collect(r) as roles, collect(country) as countries, collect(i) as states
-            
-        """
-        # run the Cypher query
-        records, _, _ = self._driver.execute_query(
-            GET_CONTRACT_WITH_CLAUSE_TYPE_QUERY,
-            {"clause_type": str(clause_type.value), "account_id": self._account_id},
+        self, clause_type: ClauseType, cursor: Optional[str] = None
+    ) -> Page:
+        records, next_cursor = self._page(
+            await self._store.get_contracts_with_clause_type(
+                self._account_id,
+                str(clause_type.value),
+                after=decode_cursor(cursor),
+                limit=self._page_size + 1,
+            ),
+            self._agreement_sort_key,
         )
         # Process the results
 
         all_agreements = []
         for row in records:
-            agreement_node = row["agreement"]
-            party_list = row["parties"]
-            role_list = row["roles"]
-            country_list = row["countries"]
-            state_list = row["states"]
-            agreement: Agreement = await self._get_agreement(
-                format="short",
-                agreement_node=agreement_node,
-                party_list=party_list,
-                role_list=role_list,
-                country_list=country_list,
-                state_list=state_list,
-            )
-
-            all_agreements.append(agreement)
+            all_agreements.append(self._summary_agreement(row))
 
-        return all_agreements
+        return {"items": all_agreements, "next_cursor": next_cursor}
 
     async def get_contracts_without_clause(
-        self, clause_type: ClauseType
-    ) -> List[Agreement]:
-        GET_CONTRACT_WITHOUT_CLAUSE_TYPE_QUERY = """
-            MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)
-            OPTIONAL MATCH (a)-[:HAS_CLAUSE]->(cc:ContractClause {type: $clause_type})
-            WITH a,cc
-            WHERE cc is NULL
-            WITH a
-            MATCH (country:Country)-[i:INCORPORATED_IN]-(p:Organization)-[r:IS_PARTY_TO]-(a)
-            RETURN a as agreement, collect(p) as parties, collect(r) as roles, collect(country) as countries, collect(i) as states
-        """
-
-        # run the Cypher query
-        records, _, _ = self._driver.execute_query(
-            GET_CONTRACT_WITHOUT_CLAUSE_TYPE_QUERY,
-            {"clause_type": clause_type.value, "account_id": self._account_id},
+        self, clause_type: ClauseType, cursor: Optional[str] = None
+    ) -> Page:
+        records, next_cursor = self._page(
+            await self._store.get_contracts_without_clause_type(
+                self._account_id,
+                clause_type.value,
+                after=decode_cursor(cursor),
+                limit=self._page_size + 1,
+            ),
+            self._agreement_sort_key,
         )
 
         all_agreements = []
         for row in records:
-            agreement_node = row["agreement"]
-            party_list = row["parties"]
-            role_list = row["roles"]
-            country_list = row["countries"]
-            state_list = row["states"]
-            agreement: Agreement = await self._get_agreement(
-                format="short",
-                agreement_node=agreement_node,
-                party_list=party_list,
-                role_list=role_list,
-                country_list=country_list,
-                state_list=state_list,
-            )
-            all_agreements.append(agreement)
-        return all_agreements
+            all_agreements.append(self._summary_agreement(row))
+        return {"items": all_agreements, "next_cursor": next_cursor}
 
-    async def get_contracts_similar_text(self, clause_text: str) -> List[Agreement]:
+    async def get_expiring_contracts(
+        self,
+        days_ahead: int = 90,
+        cursor: Optional[str] = None,
+        today: Optional[str] = None,
+    ) -> Page:
+        """Gets the agreements expiring within the specified number of days."""
+        records, next_cursor = self._page(
+            await self._store.get_expiring_agreements(
+                self._account_id,
+                days_ahead,
+                today or date.today().isoformat(),
+                after=decode_cursor(cursor),
+                limit=self._page_size + 1,
+            ),
+            self._expiry_sort_key,
+        )
 
-        # Cypher to traverse from the semantically similar excerpts back to the agreement
-        EXCERPT_TO_AGREEMENT_TRAVERSAL_QUERY = """
-            MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)
-            MATCH (a)-[:HAS_CLAUSE]->(cc:ContractClause)-[:HAS_EXCERPT]-(node) 
-            RETURN a.name as agreement_name, a.envelope_id as envelope_id, cc.type as clause_type, node.text as excerpt
-        """
+        expiring = []
+        for row in records:
+            agreement = self._summary_agreement(row)
+            agreement["expiration_date"] = row["expires_on"]
+            expiring.append(agreement)
+        return {"items": expiring, "next_cursor": next_cursor}
 
-        # Set up vector Cypher retriever
-        retriever = VectorCypherRetriever(
-            driver=self._driver,
-            index_name="excerpt_embedding",
-            embedder=self._openai_embedder,
-            retrieval_query=EXCERPT_TO_AGREEMENT_TRAVERSAL_QUERY,
-            result_formatter=my_vector_search_excerpt_record_formatter,
-        )
+    async def get_contracts_similar_text(self, clause_text: str) -> List[Agreement]:
 
-        # run vector search query on excerpts and get results containing the relevant agreement and clause
-        retriever_result = retriever.search(
-            query_text=clause_text,
-            top_k=3,
-            query_params={"account_id": self._account_id},
+        # Excerpts semantically similar to the text, with their agreement and clause
+        results = await self._store.search_similar_excerpts(
+            self._account_id, clause_text, top_k=3
         )
 
         # set up List of Agreements (with partial data) to be returned
         agreements = []
-        for item in retriever_result.items:
-            content = item.content
+        for content in results:
             a: Agreement = {
                 "agreement_name": content["agreement_name"],
                 "envelope_id": content["envelope_id"],
@@ -222,172 +196,103 @@ class ContractSearchService:
 
         return agreements
 
-    async def answer_aggregation_question(self, user_question) -> str:
-        answer = ""
-
-        NEO4J_SCHEMA = """
-            Node properties:
-            Account {account_id: STRING}
-            Agreement {agreement_type: STRING, envelope_id: INTEGER,effective_date: STRING,renewal_term: STRING, name: STRING}
-            ContractClause {type: STRING}
-            ClauseType {name: STRING}
-            Country {name: STRING}
-            Excerpt {text: STRING}
-            Organization {name: STRING}
-
-            Relationship properties:
-            IS_PARTY_TO {role: STRING}
-            GOVERNED_BY_LAW {state: STRING}
-            HAS_CLAUSE {type: STRING}
-            INCORPORATED_IN {state: STRING}
-
-            The relationships:
-            (:Agreement)-[:HAS_CLAUSE]->(:ContractClause)
-            (:ContractClause)-[:HAS_EXCERPT]->(:Excerpt)
-            (:ContractClause)-[:HAS_TYPE]->(:ClauseType)
-            (:Agreement)-[:GOVERNED_BY_LAW]->(:Country)
-            (:Organization)-[:IS_PARTY_TO]->(:Agreement)
-            (:Organization)-[:INCORPORATED_IN]->(:Country)
-
-        """
+    async def search_contract_excerpts(self, text: str) -> List[Agreement]:
 
-        # Initialize the retriever
-        retriever = Text2CypherRetriever(
-            driver=self._driver, llm=self._llm, neo4j_schema=NEO4J_SCHEMA
+        # Excerpts matching the words or meaning of the text, best first
+        results = await self._store.search_excerpts_hybrid(
+            self._account_id, text, top_k=5
         )
 
-        # Generate a Cypher query using the LLM, send it to the Neo4j database, and return the results
-        retriever_result = retriever.search(query_text=user_question)
-
-        for item in retriever_result.items:
-            content = str(item.content)
-            if content:
-                answer += content + "\n\n"
-
-        return answer
-
-    async def _get_agreement(
-        self,
-        agreement_node,
-        format="short",
-        party_list=None,
-        role_list=None,
-        country_list=None,
-        state_list=None,
-        clause_list=None,
-        clause_dict=None,
-    ):
-        agreement: Agreement = {}
-
-        if format == "short" and agreement_node:
-            agreement: Agreement = {
-                "envelope_id": agreement_node.get("envelope_id"),
-                "name": agreement_node.get("name"),
-                "agreement_type": agreement_node.get("agreement_type"),
-            }
-            agreement["parties"] = await self._get_parties(
-                party_list=party_list,
-                role_list=role_list,
-                country_list=country_list,
-                state_list=state_list,
+        # Group the excerpts by agreement and clause, keeping the ranking order
+        agreements = {}
+        for content in results:
+            a: Agreement = agreements.setdefault(
+                content["envelope_id"],
+                {
+                    "agreement_name": content["agreement_name"],
+                    "envelope_id": content["envelope_id"],
+                    "clauses": [],
+                },
             )
-
-        elif format == "long" and agreement_node:
-            agreement: Agreement = {
-                "envelope_id": agreement_node.get("envelope_id"),
-                "name": agreement_node.get("name"),
-                "agreement_type": agreement_node.get("agreement_type"),
-                "agreement_date": agreement_node.get("agreement_date"),
-                "expiration_date": agreement_node.get("expiration_date"),
-                "renewal_term": agreement_node.get("renewal_term"),
-            }
-            agreement["parties"] = await self._get_parties(
-                party_list=party_list,
-                role_list=role_list,
-                country_list=country_list,
-                state_list=state_list,
+            c: ContractClause = next(
+                (
+                    clause
+                    for clause in a["clauses"]
+                    if clause["clause_type"] == content["clause_type"]
+                ),
+                None,
             )
+            if c is None:
+                c = {"clause_type": content["clause_type"], "excerpts": []}
+                a["clauses"].append(c)
+            if content["excerpt"] not in c["excerpts"]:
+                c["excerpts"].append(content["excerpt"])
 
-            clauses = []
-            if clause_list:
-                for clause in clause_list:
-                    clause: ContractClause = {"clause_type": clause.get("type")}
-                    clauses.append(clause)
-
-            elif clause_dict:
-
-                for clause_type_key in clause_dict:
-                    clause: ContractClause = {
-                        "clause_type": clause_type_key,
-                        "excerpts": clause_dict[clause_type_key],
-                    }
-                    clauses.append(clause)
+        return list(agreements.values())
 
-            agreement["clauses"] = clauses
+    async def answer_aggregation_question(self, user_question) -> str:
+        return await self._store.answer_aggregation_question(
+            self._account_id, user_question
+        )
 
+    @staticmethod
+    def _summary_agreement(record, format="short") -> Agreement:
+        """Agreement read from the summary stored with it at ingestion"""
+        summary = load_summary(record["summary"])
+        if summary is None:
+            # Ingested before summaries, until `neo4j_indexer summarize` runs
+            return {"envelope_id": record["envelope_id"]}
+
+        agreement: Agreement = {
+            "envelope_id": summary["envelope_id"],
+            "name": summary["name"],
+            "agreement_type": summary["agreement_type"],
+        }
+        if format == "long":
+            agreement["agreement_date"] = summary["effective_date"]
+            agreement["expiration_date"] = summary["expiration_date"]
+            agreement["renewal_term"] = summary["renewal_term"]
+        agreement["parties"] = summary["parties"]
+        if format == "long":
+            agreement["clauses"] = [
+                {"clause_type": clause_type} for clause_type in summary["clause_types"]
+            ]
+            agreement["risk_counts"] = summary["risk_counts"]
         return agreement
 
-    async def _get_parties(
-        self, party_list=None, role_list=None, country_list=None, state_list=None
-    ):
-        parties = []
-        if party_list:
-            for i in range(len(party_list)):
-                p: Party = {
-                    "name": party_list[i].get("name"),
-                    "role": role_list[i].get("role"),
-                    "incorporation_country": country_list[i].get("name"),
-                    "incorporation_state": state_list[i].get("state"),
-                }
-                parties.append(p)
-
-        return parties
-
     async def get_contract_excerpts(self, envelope_id: int):
 
-        GET_CONTRACT_CLAUSES_QUERY = """
-        MATCH (a:Agreement {envelope_id: $envelope_id})-[:HAS_CLAUSE]->(cc:ContractClause)-[:HAS_EXCERPT]->(e:Excerpt)
-        RETURN a as agreement, cc.type as contract_clause_type, collect(e.text) as excerpts 
-        """
-        # run CYPHER query
-        clause_records, _, _ = self._driver.execute_query(
-            GET_CONTRACT_CLAUSES_QUERY, {"envelope_id": envelope_id}
-        )
-
-        # get a dict d[clause_type]=list(Excerpt)
-        clause_dict = {}
-        for row in clause_records:
-            agreement_node = row["agreement"]
-            clause_type = row["contract_clause_type"]
-            relevant_excerpts = row["excerpts"]
-            clause_dict[clause_type] = relevant_excerpts
-
-        # Agreement to return
-        agreement = await self._get_agreement(
-            format="long", agreement_node=agreement_node, clause_dict=clause_dict
+        clause_records = await self._store.get_contract_excerpts(
+            self._account_id, envelope_id
         )
-
+        if not clause_records:
+            return {}
+
+        # The agreement with the excerpts of each of its clauses
+        agreement = self._summary_agreement(clause_records[0], format="long")
+        agreement["clauses"] = [
+            {
+                "clause_type": row["contract_clause_type"],
+                "excerpts": row["excerpts"],
+            }
+            for row in clause_records
+        ]
         return agreement
 
-    async def get_high_risk_clauses(self) -> List[tuple[ContractClause, Risk]]:
-        """Gets all contract clauses and high risks from agreements."""
-        HIGH_RISK_QUERY = """
-            MATCH (a:Agreement)-[:HAS_CLAUSE]->(c:ContractClause)
-            MATCH (a)-[:HAS_RISK]->(r:Risk)
-            WHERE r.level = 'HIGH'
-            RETURN c as clause, r as risk, a.name as agreement_name
-            ORDER BY r.impact DESC
-            """
-        records, _, _ = self._driver.execute_query(HIGH_RISK_QUERY)
+    async def get_high_risk_clauses(self, cursor: Optional[str] = None) -> Page:
+        """Gets the high risks of the account's agreements, with their clause types."""
+        records, next_cursor = self._page(
+            await self._store.get_high_risk_clauses(
+                self._account_id,
+                after=decode_cursor(cursor),
+                limit=self._page_size + 1,
+            ),
+            lambda record: [record["risk"]["key"]],
+        )
         results = []
         for record in records:
-            clause_node = record["clause"]
             risk_node = record["risk"]
 
-            clause = ContractClause(
-                type=clause_node["type"]  # We only store 'type' in our graph
-            )
-
             risk = Risk(
                 risk_type=RiskType(risk_node["risk_type"]),
                 description=risk_node["description"],
@@ -395,18 +300,20 @@ class ContractSearchService:
                 impact=risk_node["impact"],
             )
 
-            results.append((clause, risk))
-        return results
+            results.append(
+                AgreementRisk(
+                    agreement_name=record["agreement_name"],
+                    envelope_id=record["envelope_id"],
+                    clause_types=record["clause_types"],
+                    risk=risk,
+                )
+            )
+        return {"items": results, "next_cursor": next_cursor}
 
     async def get_contract_risks(self, envelope_id: int) -> List[Risk]:
         """Gets all risks associated with a specific contract."""
-        CONTRACT_RISKS_QUERY = """
-            MATCH (a:Agreement {envelope_id: $envelope_id})-[:HAS_RISK]->(r:Risk)
-            RETURN r as risk
-            ORDER BY r.level DESC
-            """
-        records, _, _ = self._driver.execute_query(
-            CONTRACT_RISKS_QUERY, {"envelope_id": envelope_id}
+        records = await self._store.get_contract_risks(
+            self._account_id, envelope_id, limit=self._page_size
         )
 
         return [
@@ -421,21 +328,11 @@ class ContractSearchService:
 
     async def compare_contracts_by_party(self, party_name: str) -> dict:
         """Analyzes patterns in clauses across all contracts with a specific party."""
-        PARTY_ANALYSIS_QUERY = """
-        MATCH (p:Organization)-[:IS_PARTY_TO]->(a:Agreement)
-        WHERE p.name CONTAINS $party_name
-        WITH a, p
-        MATCH (a)-[:HAS_CLAUSE]->(c:ContractClause)-[:HAS_EXCERPT]->(e:Excerpt)
-        WITH c.type as clause_type, collect(DISTINCT e.text) as excerpts, p.name as party_name
-        RETURN 
-            clause_type,
-            excerpts,
-            size(excerpts) as frequency,
-            party_name
-        ORDER BY frequency DESC
-        """
-        records, _, _ = self._driver.execute_query(
-            PARTY_ANALYSIS_QUERY, {"party_name": party_name}
+        records = await self._store.compare_contracts_by_party(
+            self._account_id,
+            party_name,
+            limit=self._page_size,
+            max_excerpts=self._max_excerpts,
         )
 
         party_analysis = {}
@@ -450,32 +347,48 @@ class ContractSearchService:
 
     async def analyze_industry_patterns(self, industry: str) -> dict:
         """Analyzes common clause patterns for agreements with specified industry patterns."""
-        INDUSTRY_ANALYSIS_QUERY = """
-        MATCH (a:Agreement)
-        WHERE a.industry = $industry
-        WITH a
-        MATCH (a)-[:HAS_CLAUSE]->(c:ContractClause)
-        WITH c.type as clause_type, collect(DISTINCT c) as clauses
-        RETURN 
-            clause_type,
-            size(clauses) as frequency
-        ORDER BY frequency DESC
-        """
-        records, _, _ = self._driver.execute_query(
-            INDUSTRY_ANALYSIS_QUERY, {"industry": industry}
+        records = await self._store.analyze_industry_patterns(
+            self._account_id, industry, limit=self._page_size
         )
         return {r["clause_type"]: {"frequency": r["frequency"]} for r in records}
 
-    async def get_upcoming_obligations(self, days_ahead: int = 30) -> List[Obligation]:
+    async def get_portfolio_overview(self) -> dict:
+        """Gets the account's portfolio statistics maintained at ingestion."""
+
+        async def counts(kind: str) -> Dict[str, int]:
+            records = await self._store.get_portfolio_stats(
+                self._account_id, kind, limit=self._page_size
+            )
+            return {r["name"]: r["count"] for r in records}
+
+        agreements = await counts("agreements")
+        return {
+            "agreements": agreements.get("", 0),
+            "agreement_types": await counts("agreement_type"),
+            "industries": await counts("industry"),
+            "clause_types": await counts("clause_type"),
+            "risk_levels": await counts("risk_level"),
+            "top_parties": await counts("party"),
+        }
+
+    async def get_upcoming_obligations(
+        self,
+        days_ahead: int = 30,
+        cursor: Optional[str] = None,
+        today: Optional[str] = None,
+    ) -> Page:
         """Gets all obligations due within the specified number of days."""
-        UPCOMING_OBLIGATIONS_QUERY = """
-        MATCH (a:Agreement)-[:HAS_OBLIGATION]->(o:Obligation)
-        WHERE o.status = 'PENDING'
-        RETURN o, a.name as agreement_name
-        ORDER BY o.due_date
-        """
-        records, _, _ = self._driver.execute_query(UPCOMING_OBLIGATIONS_QUERY)
-        return [
+        records, next_cursor = self._page(
+            await self._store.get_pending_obligations(
+                self._account_id,
+                days_ahead,
+                today or date.today().isoformat(),
+                after=decode_cursor(cursor),
+                limit=self._page_size + 1,
+            ),
+            self._obligation_sort_key,
+        )
+        obligations = [
             Obligation(
                 description=f"{r['agreement_name']}: {r['o']['description']}",
                 due_date=r["o"]["due_date"],
@@ -486,18 +399,19 @@ class ContractSearchService:
             )
             for r in records
         ]
+        return {"items": obligations, "next_cursor": next_cursor}
 
-    async def track_recurring_obligations(self) -> List[Obligation]:
+    async def track_recurring_obligations(self, cursor: Optional[str] = None) -> Page:
         """Gets all recurring obligations."""
-        RECURRING_OBLIGATIONS_QUERY = """
-        MATCH (a:Agreement)-[:HAS_OBLIGATION]->(o:Obligation)
-        WHERE o.recurring = true
-        RETURN o, a.name as agreement_name
-        ORDER BY o.due_date
-        """
-        records, _, _ = self._driver.execute_query(RECURRING_OBLIGATIONS_QUERY)
-        print(records)
-        return [
+        records, next_cursor = self._page(
+            await self._store.get_recurring_obligations(
+                self._account_id,
+                after=decode_cursor(cursor),
+                limit=self._page_size + 1,
+            ),
+            self._obligation_sort_key,
+        )
+        obligations = [
             Obligation(
                 description=f"{r['agreement_name']}: {r['o']['description']}",
                 due_date=r["o"]["due_date"],
@@ -508,3 +422,25 @@ class ContractSearchService:
             )
             for r in records
         ]
+        return {"items": obligations, "next_cursor": next_cursor}
+
+
+def get_contract_service(account_id: str) -> ContractSearchService:
+    """Cached service of the account on the process-wide store"""
+    return _get_contract_services().get(account_id)
+
+
+@lru_cache()
+def _get_contract_services() -> ServiceCache[ContractSearchService]:
+    settings = get_settings()
+    return ServiceCache(
+        lambda account_id: ContractSearchService(
+            uri=None,
+            user=None,
+            pwd=None,
+            account_id=account_id,
+            store=get_contract_store(),
+        ),
+        max_size=settings.chat_service_cache_size,
+        idle_ttl=settings.chat_service_idle_ttl,
+    )
@@ -0,0 +1,26 @@
+import base64
+import binascii
+import json
+from typing import Optional
+
+
+def encode_cursor(sort_key: list) -> str:
+    """Opaque cursor of the last item of a page"""
+    return base64.urlsafe_b64encode(json.dumps(sort_key).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[list]:
+    """Sort key to continue after, None for the first page"""
+    if not cursor:
+        return None
+    try:
+        sort_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(
+            "Invalid cursor; pass next_cursor from the previous page unchanged"
+        )
+    if not isinstance(sort_key, list):
+        raise ValueError(
+            "Invalid cursor; pass next_cursor from the previous page unchanged"
+        )
+    return sort_key
@@ -0,0 +1,112 @@
+import json
+from collections import OrderedDict
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+from core.settings import get_settings
+
+
+class ToolResultCache:
+    """
+    Results of contract tool calls, shared by every user of an account.
+
+    Entries are keyed by account, function name and normalized arguments, and
+    belong to the account's data generation they were computed at: when the
+    generation changes, the account's entries are dropped. The cache is
+    bounded by the approximate serialized size of its results, evicting the
+    least recently used. Cached results are returned as is and must not be
+    modified.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # (account_id, name, arguments) -> (result, size), least recently used first
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[Any, int]]" = (
+            OrderedDict()
+        )
+        # account_id -> generation of its entries
+        self._generations: Dict[str, int] = {}
+
+    @staticmethod
+    def _normalize(value):
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, str):
+            return " ".join(value.split())
+        return value
+
+    @classmethod
+    def _key(cls, account_id: str, name: str, arguments: dict) -> Tuple[str, str, str]:
+        normalized = {
+            argument: cls._normalize(value) for argument, value in arguments.items()
+        }
+        return account_id, name, json.dumps(normalized, sort_keys=True, default=str)
+
+    def _check_generation(self, account_id: str, generation: int):
+        """Drop the account's entries computed at another generation"""
+        if self._generations.get(account_id, generation) != generation:
+            for key in [key for key in self._entries if key[0] == account_id]:
+                _, size = self._entries.pop(key)
+                self.size -= size
+                self.invalidations += 1
+        self._generations[account_id] = generation
+
+    def get(
+        self, account_id: str, generation: int, name: str, arguments: dict
+    ) -> Tuple[bool, Any]:
+        """(found, result) of a call at the account's current generation"""
+        self._check_generation(account_id, generation)
+        key = self._key(account_id, name, arguments)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[0]
+
+    def put(self, account_id: str, generation: int, name: str, arguments: dict, result):
+        """Store a result computed at the given generation, unless outdated"""
+        if self._generations.get(account_id) != generation:
+            # The account's data changed while the result was computed
+            return
+        size = len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            return
+
+        key = self._key(account_id, name, arguments)
+        previous = self._entries.pop(key, None)
+        if previous:
+            self.size -= previous[1]
+        self._entries[key] = (result, size)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+@lru_cache()
+def get_tool_result_cache() -> ToolResultCache:
+    """Process-wide tool result cache"""
+    return ToolResultCache(get_settings().tool_result_cache_max_mb * 2**20)
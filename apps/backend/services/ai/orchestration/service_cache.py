@@ -0,0 +1,49 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class ServiceCache(Generic[T]):
+    """
+    Per-account service instances, bounded by count and idle time.
+
+    Beyond max_size entries the least recently used one is evicted, and
+    entries unused for idle_ttl seconds are evicted on the next access.
+    Services must not own connections: they share the process-wide stores.
+    """
+
+    def __init__(self, factory: Callable[[str], T], max_size: int, idle_ttl: float):
+        self._factory = factory
+        self._max_size = max_size
+        self._idle_ttl = idle_ttl
+        # account_id -> (service, last use), least recently used first
+        self._entries: "OrderedDict[str, Tuple[T, float]]" = OrderedDict()
+
+    def get(self, account_id: str) -> T:
+        """Cached service of the account, created on first use"""
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        entry = self._entries.pop(account_id, None)
+        service = entry[0] if entry else self._factory(account_id)
+        self._entries[account_id] = (service, now)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        return service
+
+    def _evict_idle(self, now: float):
+        # Entries are in order of last use, so the idle ones come first
+        while self._entries:
+            _, last_used = next(iter(self._entries.values()))
+            if now - last_used < self._idle_ttl:
+                break
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
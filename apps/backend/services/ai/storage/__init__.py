@@ -0,0 +1,27 @@
+from .base import ContractStore
+from .neo4j_store import Neo4jContractStore
+from .sqlite_store import SQLiteContractStore
+from .registry import get_contract_store, close_contract_stores
+from .generations import current_generation, record_generation
+from .summary import (
+    agreement_summary,
+    load_summary,
+    portfolio_change,
+    portfolio_counts,
+    portfolio_deltas,
+)
+
+__all__ = [
+    "ContractStore",
+    "Neo4jContractStore",
+    "SQLiteContractStore",
+    "get_contract_store",
+    "close_contract_stores",
+    "current_generation",
+    "record_generation",
+    "agreement_summary",
+    "load_summary",
+    "portfolio_change",
+    "portfolio_counts",
+    "portfolio_deltas",
+]
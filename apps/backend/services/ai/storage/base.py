@@ -0,0 +1,195 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from ...notification import WebhookService
+
+
+class ContractStore(ABC):
+    """
+    Storage backend behind ContractSearchService and Neo4jIndexer.
+
+    Reads return records shaped like the rows of the original Cypher queries:
+    agreement, clause, risk and obligation entries are mappings with the node
+    properties, so ContractSearchService formats every backend the same way.
+    Agreements are returned as envelope_id and the JSON summary stored with
+    them (see agreement_summary), None for agreements stored before
+    summaries existed. Writes take agreements keyed and summarized by
+    Neo4jIndexer.
+
+    Reads whose results grow with the account are paginated by keyset: they
+    return at most limit records in a fixed order, starting after the sort
+    key given as after (the list documented on each method, with dates as ISO
+    strings).
+    """
+
+    # Reads
+
+    @abstractmethod
+    async def get_contract(self, account_id: str, envelope_id: str) -> List[dict]:
+        """envelope_id and summary of the agreement"""
+
+    @abstractmethod
+    async def get_contracts_by_party(
+        self,
+        account_id: str,
+        organization_name: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        """
+        envelope_id and summary of the agreements of the organization whose
+        name best matches, by [envelope_id]
+        """
+
+    @abstractmethod
+    async def get_contracts_with_clause_type(
+        self,
+        account_id: str,
+        clause_type: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        """
+        envelope_id and summary of agreements having a clause of the given
+        type, by [envelope_id]
+        """
+
+    @abstractmethod
+    async def get_contracts_without_clause_type(
+        self,
+        account_id: str,
+        clause_type: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        """
+        envelope_id and summary of agreements without a clause of the given
+        type, by [envelope_id]
+        """
+
+    @abstractmethod
+    async def search_similar_excerpts(
+        self, account_id: str, text: str, top_k: int = 3
+    ) -> List[dict]:
+        """agreement_name, envelope_id, clause_type and excerpt of similar excerpts"""
+
+    @abstractmethod
+    async def search_excerpts_hybrid(
+        self, account_id: str, text: str, top_k: int = 5
+    ) -> List[dict]:
+        """
+        Like search_similar_excerpts, ranking excerpts by reciprocal rank fusion
+        of a keyword and a vector search
+        """
+
+    @abstractmethod
+    async def answer_aggregation_question(self, account_id: str, question: str) -> str:
+        """Answer a free-form aggregation question over the account's contracts"""
+
+    @abstractmethod
+    async def get_contract_excerpts(
+        self, account_id: str, envelope_id: str
+    ) -> List[dict]:
+        """envelope_id, summary, contract_clause_type and excerpts per clause"""
+
+    @abstractmethod
+    async def get_high_risk_clauses(
+        self, account_id: str, after: Optional[list] = None, limit: int = 25
+    ) -> List[dict]:
+        """
+        risk, agreement_name, envelope_id and the agreement's clause_types for
+        every high risk, by [risk key]
+        """
+
+    @abstractmethod
+    async def get_contract_risks(
+        self, account_id: str, envelope_id: str, limit: int = 25
+    ) -> List[dict]:
+        """risk of an agreement, at most limit"""
+
+    @abstractmethod
+    async def compare_contracts_by_party(
+        self, account_id: str, party_name: str, limit: int = 25, max_excerpts: int = 3
+    ) -> List[dict]:
+        """
+        clause_type, excerpts (at most max_excerpts), frequency (agreements
+        having the clause type) and party_name of the limit most frequent
+        clause types of parties whose name contains party_name
+        """
+
+    @abstractmethod
+    async def analyze_industry_patterns(
+        self, account_id: str, industry: str, limit: int = 25
+    ) -> List[dict]:
+        """
+        clause_type and frequency of the limit most frequent clause types of
+        the industry, matched as normalized at ingestion
+        """
+
+    @abstractmethod
+    async def get_portfolio_stats(
+        self, account_id: str, kind: str, limit: int = 25
+    ) -> List[dict]:
+        """
+        name and count of the limit largest portfolio statistics of a kind
+        (see portfolio_counts), kept up to date by write_agreements
+        """
+
+    @abstractmethod
+    async def get_pending_obligations(
+        self,
+        account_id: str,
+        days_ahead: int,
+        today: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        """
+        o and agreement_name of pending obligations due from today (an ISO date)
+        to days_ahead days after it, by [due_on, key]
+        """
+
+    @abstractmethod
+    async def get_expiring_agreements(
+        self,
+        account_id: str,
+        days_ahead: int,
+        today: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        """
+        envelope_id, expires_on and summary of agreements expiring from today
+        (an ISO date) to days_ahead days after it, by [expires_on, envelope_id]
+        """
+
+    @abstractmethod
+    async def get_recurring_obligations(
+        self, account_id: str, after: Optional[list] = None, limit: int = 25
+    ) -> List[dict]:
+        """o and agreement_name of recurring obligations, by [due_on or "", key]"""
+
+    # Data generations
+
+    @abstractmethod
+    async def get_generation(self, account_id: str) -> int:
+        """Counter of changes to the account's data, 0 before any ingestion"""
+
+    @abstractmethod
+    async def bump_generation(self, account_id: str) -> int:
+        """Record a change to the account's data and return the new generation"""
+
+    # Writes
+
+    @abstractmethod
+    async def write_agreements(self, agreements: List[dict]):
+        """Upsert keyed agreements, replacing what they previously held"""
+
+    @abstractmethod
+    async def generate_embeddings(
+        self, webhook_service: Optional[WebhookService] = None
+    ):
+        """Embed every excerpt that has no embedding yet"""
+
+    async def close(self):
+        """Release connections"""
@@ -0,0 +1,156 @@
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from utils import content_hash, normalize_text
+
+
+class CypherCache:
+    """
+    Cypher generated for aggregation questions, so repeated questions skip
+    the LLM round trip.
+
+    Entries are keyed by the normalized question and belong to a schema hash,
+    computed from the schema description and model the Cypher was generated
+    with; entries of any other hash are dropped on open. A question without an
+    exact entry can reuse the query of a close enough question, found by
+    embedding similarity, provided every string literal of that query also
+    appears in the question: "non-compete" and "exclusivity" questions embed
+    closely but need different queries.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS queries (
+        question_key TEXT PRIMARY KEY,
+        schema_hash TEXT NOT NULL,
+        question TEXT NOT NULL,
+        cypher TEXT NOT NULL,
+        embedding BLOB,
+        hits INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL
+    )
+    """
+
+    def __init__(self, path: str | Path, schema_hash: str, similarity: float):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute(self.SCHEMA)
+        self._lock = threading.Lock()
+        self.schema_hash = schema_hash
+        self.similarity = similarity
+
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM queries WHERE schema_hash != ?", (schema_hash,)
+            )
+        # Normalized question embeddings, for similarity lookups
+        self._keys: List[str] = []
+        self._cyphers: List[str] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._load_vectors()
+
+    @staticmethod
+    def _question_key(question: str) -> str:
+        return content_hash(question.strip().rstrip("?.!"))
+
+    def _load_vectors(self):
+        rows = self._db.execute(
+            "SELECT question_key, cypher, embedding FROM queries "
+            "WHERE embedding IS NOT NULL"
+        ).fetchall()
+        self._keys = [row[0] for row in rows]
+        self._cyphers = [row[1] for row in rows]
+        self._vectors = (
+            np.vstack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+            if rows
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _hit(self, question_key: str):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE queries SET hits = hits + 1 WHERE question_key = ?",
+                (question_key,),
+            )
+
+    def get(self, question: str) -> Optional[str]:
+        """Cypher of the same question, after normalization"""
+        question_key = self._question_key(question)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT cypher FROM queries WHERE question_key = ?", (question_key,)
+            ).fetchone()
+        if row:
+            self._hit(question_key)
+            return row[0]
+        return None
+
+    @staticmethod
+    def _words(text: str) -> str:
+        return " ".join(re.findall(r"\w+", normalize_text(text)))
+
+    @classmethod
+    def _literals_in_question(cls, cypher: str, question: str) -> bool:
+        """Whether every string literal of the query occurs in the question"""
+        question_words = f" {cls._words(question)} "
+        literals = re.findall(r"'([^']*)'|\"([^\"]*)\"", cypher)
+        return all(
+            f" {cls._words(single or double)} " in question_words
+            for single, double in literals
+            if single or double
+        )
+
+    def find_similar(self, question: str, embedding: Sequence[float]) -> Optional[str]:
+        """Cypher of the closest question above the similarity threshold"""
+        if self._vectors is None:
+            return None
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query)
+        scores = self._vectors @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None
+        cypher = self._cyphers[best]
+        if not self._literals_in_question(cypher, question):
+            return None
+        self._hit(self._keys[best])
+        return cypher
+
+    def put(self, question: str, cypher: str, embedding: Optional[Sequence[float]]):
+        """Store the validated Cypher of a question"""
+        vector = None
+        if embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            vector /= np.linalg.norm(vector)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO queries "
+                "(question_key, schema_hash, question, cypher, embedding, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self._question_key(question),
+                    self.schema_hash,
+                    question,
+                    cypher,
+                    None if vector is None else vector.tobytes(),
+                    time.time(),
+                ),
+            )
+            self._load_vectors()
+
+    def discard(self, cypher: str):
+        """Drop every entry of a query that no longer runs"""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM queries WHERE cypher = ?", (cypher,))
+            self._load_vectors()
+
+    def close(self):
+        self._db.close()
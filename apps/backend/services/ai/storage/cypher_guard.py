@@ -0,0 +1,301 @@
+import re
+from typing import List, Optional, Tuple
+
+from neo4j import AsyncDriver, Query, READ_ACCESS, Record
+from neo4j.exceptions import ClientError
+
+
+class CypherRejectedError(ValueError):
+    """Generated Cypher that was not run, with a reason the model can act on"""
+
+
+class CypherGuard:
+    """
+    Validates and runs LLM-generated Cypher against the multi-tenant graph.
+
+    Every node pattern of an account-owned label gets an inline predicate
+    limiting it to the account, and the query gets a row limit. Node patterns
+    without a label are only allowed for variables already matched by a
+    scoped pattern: Organization and Excerpt nodes are shared between
+    accounts, so anything reached from them through an unlabeled node could
+    belong to another account. For the same reason variable-length
+    relationships are rejected. The plan is then checked with EXPLAIN:
+    writes, procedure calls, unlabeled scans and plans estimated above
+    max_estimated_rows are rejected. Queries that pass run in a read
+    transaction with a timeout.
+    """
+
+    # label -> predicate keeping a node pattern within the account's data
+    SCOPE_PREDICATES = {
+        "Account": "{node}.account_id = $account_id",
+        "Agreement": (
+            "EXISTS {{ (:Account {{account_id: $account_id}})"
+            "-[:HAS_AGREEMENT]->({node}) }}"
+        ),
+        "ContractClause": (
+            "EXISTS {{ (:Account {{account_id: $account_id}})"
+            "-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_CLAUSE]->({node}) }}"
+        ),
+        "Risk": (
+            "EXISTS {{ (:Account {{account_id: $account_id}})"
+            "-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_RISK]->({node}) }}"
+        ),
+        "Obligation": (
+            "EXISTS {{ (:Account {{account_id: $account_id}})"
+            "-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_OBLIGATION]->({node}) }}"
+        ),
+        "Excerpt": (
+            "EXISTS {{ (:Account {{account_id: $account_id}})"
+            "-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_CLAUSE]->(:ContractClause)"
+            "-[:HAS_EXCERPT]->({node}) }}"
+        ),
+        "Organization": (
+            "EXISTS {{ (:Account {{account_id: $account_id}})"
+            "-[:HAS_AGREEMENT]->(:Agreement)<-[:IS_PARTY_TO]-({node}) }}"
+        ),
+    }
+
+    # Labels of nodes holding no account data, matched as they are
+    SHARED_LABELS = ("Country", "ClauseType")
+
+    # Node patterns of an owned label, any other node pattern, the clauses
+    # changing which variables are in scope, and nested scopes
+    TOKEN = re.compile(
+        r"(?P<owned>\(\s*(?P<variable>\w*)\s*:\s*(?P<label>"
+        + "|".join(SCOPE_PREDICATES)
+        + r")\b(?P<properties>\s*\{[^{}]*\})?\s*(?P<where>WHERE\b)?)"
+        r"|(?P<node>(?<![\w.])\(\s*(?P<node_variable>\w*)\s*(?=[:{)]|(?i:WHERE)\b))"
+        r"|(?P<with>\b(?i:WITH)\b)"
+        r"|(?P<union>\b(?i:UNION)\b)"
+        r"|(?P<open>[{\[])|(?P<close>[}\]])"
+    )
+    STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+    LITERAL_OR_COMMENT = re.compile(
+        STRING_LITERAL.pattern + r"|//[^\n]*|/\*.*?\*/", re.DOTALL
+    )
+    # -[*1..3]- and quantified relationships such as -[:R]->{1,3} or -->+
+    VARIABLE_LENGTH = re.compile(
+        r"<?-\s*\[[^\[\]]*\*[^\[\]]*\]"
+        r"|[\]-]\s*->?\s*(?:\{\s*\d*\s*,?\s*\d*\s*\}|\+(?!\s*\d)|\*)"
+    )
+    # End of the projection of a WITH clause
+    WITH_END = re.compile(
+        r"\b(?i:WHERE|ORDER|SKIP|LIMIT|MATCH|OPTIONAL|UNWIND|RETURN|WITH|CALL|UNION)\b"
+        r"|[{}]|$"
+    )
+    PROJECTION_ITEM = re.compile(r"(\w+)(?:\s+(?i:AS)\s+(\w+))?")
+    TRAILING_LIMIT = re.compile(r"\bLIMIT\s+(\d+)\s*$", re.IGNORECASE)
+
+    # Plan operators that reach outside the account's data
+    FORBIDDEN_OPERATORS = ("AllNodesScan", "ProcedureCall")
+
+    def __init__(
+        self,
+        driver: AsyncDriver,
+        database: str,
+        max_estimated_rows: int,
+        row_limit: int,
+        timeout: float,
+    ):
+        self._driver = driver
+        self._database = database
+        self.max_estimated_rows = max_estimated_rows
+        self.row_limit = row_limit
+        self.timeout = timeout
+
+    @staticmethod
+    def _closing_paren(cypher: str, start: int) -> Optional[int]:
+        """Index of the parenthesis closing the one opened before start"""
+        depth = 0
+        quote = None
+        for i in range(start, len(cypher)):
+            char = cypher[i]
+            if quote:
+                if char == quote and cypher[i - 1] != "\\":
+                    quote = None
+            elif char in "'\"":
+                quote = char
+            elif char == "(":
+                depth += 1
+            elif char == ")":
+                if depth == 0:
+                    return i
+                depth -= 1
+        return None
+
+    def _carried(self, cypher: str, start: int, bound: set) -> set:
+        """Scoped variables still bound after the WITH projection at start"""
+        items = cypher[start : self.WITH_END.search(cypher, start).start()]
+        items = re.sub(r"^\s*(?i:DISTINCT)\b", "", items)
+        carried = set()
+        for item in items.split(","):
+            if item.strip() == "*":
+                carried |= bound
+                continue
+            match = self.PROJECTION_ITEM.fullmatch(item.strip())
+            if match and match.group(1) in bound:
+                carried.add(match.group(2) or match.group(1))
+        return carried
+
+    def scope(self, cypher: str) -> str:
+        """
+        Add the account predicate to every node pattern of an owned label, and
+        reject node patterns that could reach the data of other accounts
+        """
+        # Comments could hide a label from the patterns below
+        cypher = self.LITERAL_OR_COMMENT.sub(
+            lambda match: match.group(0) if match.group(0)[0] in "'\"" else " ",
+            cypher,
+        )
+        # Same positions, with string literals blanked out
+        bare = self.STRING_LITERAL.sub(lambda match: " " * len(match.group(0)), cypher)
+        if "`" in bare:
+            raise CypherRejectedError(
+                "Quoted names are not supported; use the labels and properties "
+                "of the schema as they are"
+            )
+        if self.VARIABLE_LENGTH.search(bare):
+            raise CypherRejectedError(
+                "Variable-length relationships are not supported; match each "
+                "hop with a labeled node pattern"
+            )
+
+        insertions = []
+        # Variables matched by a scoped pattern, and those of enclosing scopes
+        bound = set()
+        enclosing = []
+        for i, match in enumerate(self.TOKEN.finditer(bare)):
+            if match.group("owned"):
+                end = self._closing_paren(bare, match.end())
+                if end is None or (
+                    not match.group("where") and bare[match.end() : end].strip()
+                ):
+                    raise CypherRejectedError(
+                        "Could not parse the node pattern at "
+                        f"'{cypher[match.start() : match.end()]}'"
+                    )
+                variable = match.group("variable")
+                if variable:
+                    bound.add(variable)
+                else:
+                    variable = f"scoped_{i}"
+                    insertions.append((match.start("variable"), variable))
+                predicate = self.SCOPE_PREDICATES[match.group("label")].format(
+                    node=variable
+                )
+                if match.group("where"):
+                    insertions.append((match.end(), f" {predicate} AND ("))
+                    insertions.append((end, ")"))
+                else:
+                    insertions.append((end, f" WHERE {predicate}"))
+
+            elif match.group("node"):
+                end = self._closing_paren(bare, match.end())
+                if end is None:
+                    raise CypherRejectedError(
+                        "Could not parse the node pattern at "
+                        f"'{cypher[match.start() : match.end()]}'"
+                    )
+                pattern = cypher[match.start() : end + 1]
+                labels = re.split(r"\{|\b(?i:WHERE)\b", bare[match.end() : end])
+                labels = labels[0].strip()
+                if not labels:
+                    if match.group("node_variable") not in bound:
+                        raise CypherRejectedError(
+                            f"The node pattern '{pattern}' has no label; label "
+                            "every node, or reuse a variable matched with a "
+                            "label earlier in the query"
+                        )
+                elif re.sub(r":\s*", "", labels, count=1) not in self.SHARED_LABELS:
+                    raise CypherRejectedError(
+                        f"The node pattern '{pattern}' does not use a single "
+                        "label of the schema"
+                    )
+
+            elif match.group("with"):
+                # STARTS WITH and ENDS WITH compare strings
+                if not re.search(r"\b(?i:STARTS|ENDS)\s*$", bare[: match.start()]):
+                    bound = self._carried(bare, match.end(), bound)
+            elif match.group("union"):
+                bound = set()
+            elif match.group("open"):
+                enclosing.append(bound)
+                bound = set(bound)
+            elif enclosing:
+                bound = enclosing.pop()
+
+        scoped = []
+        position = 0
+        for at, text in sorted(insertions, key=lambda insertion: insertion[0]):
+            scoped.append(cypher[position:at])
+            scoped.append(text)
+            position = at
+        scoped.append(cypher[position:])
+        return "".join(scoped)
+
+    def limit(self, cypher: str) -> str:
+        """Cap the rows returned by the query"""
+        cypher = cypher.strip().rstrip(";").rstrip()
+        match = self.TRAILING_LIMIT.search(cypher)
+        if match:
+            if int(match.group(1)) <= self.row_limit:
+                return cypher
+            cypher = cypher[: match.start()].rstrip()
+        return f"{cypher}\nLIMIT {self.row_limit}"
+
+    def _walk_plan(self, plan: dict) -> Tuple[float, List[str]]:
+        """Highest estimated row count and operator names of a plan"""
+        estimated = float(plan.get("args", {}).get("EstimatedRows", 0))
+        operators = [plan.get("operatorType", "").split("@")[0]]
+        for child in plan.get("children", []):
+            child_estimated, child_operators = self._walk_plan(child)
+            estimated = max(estimated, child_estimated)
+            operators += child_operators
+        return estimated, operators
+
+    async def check(self, cypher: str, parameters: dict):
+        """Reject queries that write or whose plan is too expensive"""
+        try:
+            _, summary, _ = await self._driver.execute_query(
+                f"EXPLAIN {cypher}", parameters, database_=self._database
+            )
+        except ClientError as e:
+            raise CypherRejectedError(f"The query is not valid: {e.message}")
+
+        if summary.query_type != "r":
+            raise CypherRejectedError("Only read queries are allowed")
+
+        estimated, operators = self._walk_plan(summary.plan or {})
+        forbidden = sorted(set(operators) & set(self.FORBIDDEN_OPERATORS))
+        if forbidden:
+            raise CypherRejectedError(
+                f"The query uses {', '.join(forbidden)}; match labeled nodes "
+                "with MATCH patterns instead"
+            )
+        if estimated > self.max_estimated_rows:
+            raise CypherRejectedError(
+                f"The query would process about {estimated:,.0f} rows, above the "
+                f"limit of {self.max_estimated_rows:,}; filter earlier or "
+                "aggregate fewer nodes"
+            )
+
+    async def run(self, cypher: str, account_id: str) -> List[Record]:
+        """Scope, check and run generated Cypher for an account"""
+        query = self.limit(self.scope(cypher))
+        parameters = {"account_id": account_id}
+        await self.check(query, parameters)
+
+        try:
+            async with self._driver.session(
+                database=self._database, default_access_mode=READ_ACCESS
+            ) as session:
+                result = await session.run(
+                    Query(query, timeout=self.timeout), parameters
+                )
+                return await result.fetch(self.row_limit)
+        except ClientError as e:
+            if "TransactionTimedOut" in (e.code or ""):
+                raise CypherRejectedError(
+                    f"The query did not finish within {self.timeout:g} seconds"
+                )
+            raise CypherRejectedError(f"The query failed: {e.message}")
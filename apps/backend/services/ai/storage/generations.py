@@ -0,0 +1,30 @@
+import time
+from typing import Dict, Tuple
+
+from core.settings import get_settings
+from .base import ContractStore
+
+# account_id -> (generation, when it was last read or recorded)
+_generations: Dict[str, Tuple[int, float]] = {}
+
+
+def record_generation(account_id: str, generation: int):
+    """Make a generation known in this process, e.g. right after an ingestion"""
+    _generations[account_id] = (generation, time.monotonic())
+
+
+async def current_generation(store: ContractStore, account_id: str) -> int:
+    """
+    Generation of the account's data.
+
+    Ingestions in this process are seen immediately. Ingestions by other
+    processes are seen once the generation is re-read from the store, at most
+    ACCOUNT_GENERATION_CHECK_INTERVAL seconds later.
+    """
+    entry = _generations.get(account_id)
+    interval = get_settings().account_generation_check_interval
+    if entry and time.monotonic() - entry[1] < interval:
+        return entry[0]
+    generation = await store.get_generation(account_id)
+    record_generation(account_id, generation)
+    return generation
@@ -0,0 +1,641 @@
+import asyncio
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from neo4j import AsyncGraphDatabase
+from neo4j_graphrag.embeddings import Embedder
+from neo4j_graphrag.llm import OpenAILLM
+from neo4j_graphrag.generation.prompts import Text2CypherTemplate
+
+from core.settings import get_settings
+from utils import content_hash, normalize_text
+from ...notification import WebhookService
+from ..embeddings import CachedOpenAIEmbeddings, ExcerptEmbeddingPipeline
+from .base import ContractStore
+from .cypher_cache import CypherCache
+from .cypher_guard import CypherGuard, CypherRejectedError
+from .generations import current_generation
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Neo4jContractStore(ContractStore):
+    """Contract graph stored in a Neo4j server"""
+
+    # Agreement queries return the summary stored at ingestion (see
+    # AgreementSummary) instead of collecting parties and clauses per query
+    GET_CONTRACT_BY_ID_QUERY = """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement {envelope_id: $envelope_id})
+        RETURN a.envelope_id as envelope_id, a.summary as summary
+    """
+
+    GET_CONTRACTS_BY_PARTY_NAME = """
+        CALL db.index.fulltext.queryNodes('organizationNameTextIndex', $organization_name)
+        YIELD node AS o, score
+        WHERE EXISTS { (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)<-[:IS_PARTY_TO]-(o) }
+        WITH o, score
+        ORDER BY score DESC
+        LIMIT 1
+        WITH o
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)<-[:IS_PARTY_TO]-(o)
+        WHERE $after IS NULL OR a.envelope_id > $after[0]
+        WITH DISTINCT a
+        ORDER BY a.envelope_id
+        LIMIT $limit
+        RETURN a.envelope_id as envelope_id, a.summary as summary
+    """
+
+    GET_CONTRACT_WITH_CLAUSE_TYPE_QUERY = """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)
+        WHERE ($after IS NULL OR a.envelope_id > $after[0])
+            AND EXISTS { (a)-[:HAS_CLAUSE]->(:ContractClause {type: $clause_type}) }
+        WITH a
+        ORDER BY a.envelope_id
+        LIMIT $limit
+        RETURN a.envelope_id as envelope_id, a.summary as summary
+    """
+
+    GET_CONTRACT_WITHOUT_CLAUSE_TYPE_QUERY = """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)
+        WHERE ($after IS NULL OR a.envelope_id > $after[0])
+            AND NOT EXISTS { (a)-[:HAS_CLAUSE]->(:ContractClause {type: $clause_type}) }
+        WITH a
+        ORDER BY a.envelope_id
+        LIMIT $limit
+        RETURN a.envelope_id as envelope_id, a.summary as summary
+    """
+
+    # The vector index covers every account: it is asked for $candidates
+    # nearest excerpts, of which the $top_k closest in the account are kept
+    VECTOR_SEARCH_EXCERPTS_QUERY = """
+        CALL db.index.vector.queryNodes('excerpt_embedding', $candidates, $embedding)
+        YIELD node, score
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)-[:HAS_CLAUSE]->(cc:ContractClause)-[:HAS_EXCERPT]->(node)
+        WITH node, score, collect([a.name, a.envelope_id, cc.type]) as matches
+        ORDER BY score DESC
+        LIMIT $top_k
+        UNWIND matches as m
+        RETURN m[0] as agreement_name, m[1] as envelope_id, m[2] as clause_type, node.text as excerpt
+    """
+
+    # Exact search over the account's own excerpts, for accounts whose
+    # excerpts are too rare in the shared index to be found by oversampling
+    EXACT_SEARCH_EXCERPTS_QUERY = """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)-[:HAS_CLAUSE]->(cc:ContractClause)-[:HAS_EXCERPT]->(node:Excerpt)
+        WHERE node.embedding IS NOT NULL
+        WITH node, vector.similarity.cosine(node.embedding, $embedding) as score, collect([a.name, a.envelope_id, cc.type]) as matches
+        ORDER BY score DESC
+        LIMIT $top_k
+        UNWIND matches as m
+        RETURN m[0] as agreement_name, m[1] as envelope_id, m[2] as clause_type, node.text as excerpt
+    """
+
+    # Keyword and vector searches ranked separately within the account, then
+    # fused: each excerpt scores the sum of 1 / ($rrf_k + rank) over both lists
+    HYBRID_SEARCH_EXCERPTS_QUERY = """
+        CALL {
+            CALL db.index.fulltext.queryNodes('excerptTextIndex', $keywords, {limit: $candidates})
+            YIELD node, score
+            WHERE EXISTS { (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_CLAUSE]->(:ContractClause)-[:HAS_EXCERPT]->(node) }
+            WITH node ORDER BY score DESC
+            WITH collect(node) as nodes
+            UNWIND range(0, size(nodes) - 1) as rank
+            RETURN nodes[rank] as node, 1.0 / ($rrf_k + rank + 1) as fused
+            UNION ALL
+            CALL db.index.vector.queryNodes('excerpt_embedding', $candidates, $embedding)
+            YIELD node, score
+            WHERE EXISTS { (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(:Agreement)-[:HAS_CLAUSE]->(:ContractClause)-[:HAS_EXCERPT]->(node) }
+            WITH node ORDER BY score DESC
+            WITH collect(node) as nodes
+            UNWIND range(0, size(nodes) - 1) as rank
+            RETURN nodes[rank] as node, 1.0 / ($rrf_k + rank + 1) as fused
+        }
+        WITH node, sum(fused) as score
+        ORDER BY score DESC
+        LIMIT $top_k
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)-[:HAS_CLAUSE]->(cc:ContractClause)-[:HAS_EXCERPT]->(node)
+        WITH node, score, collect([a.name, a.envelope_id, cc.type]) as matches
+        ORDER BY score DESC
+        UNWIND matches as m
+        RETURN m[0] as agreement_name, m[1] as envelope_id, m[2] as clause_type, node.text as excerpt
+    """
+
+    NEO4J_SCHEMA = """
+        Node properties:
+        Account {account_id: STRING}
+        Agreement {agreement_type: STRING, envelope_id: INTEGER,effective_date: STRING,renewal_term: STRING, name: STRING, effective_on: DATE, expires_on: DATE, industry: STRING}
+        ContractClause {type: STRING}
+        ClauseType {name: STRING}
+        Country {name: STRING}
+        Excerpt {text: STRING}
+        Organization {name: STRING}
+
+        Relationship properties:
+        IS_PARTY_TO {role: STRING}
+        GOVERNED_BY_LAW {state: STRING}
+        HAS_CLAUSE {type: STRING}
+        INCORPORATED_IN {state: STRING}
+
+        The relationships:
+        (:Agreement)-[:HAS_CLAUSE]->(:ContractClause)
+        (:ContractClause)-[:HAS_EXCERPT]->(:Excerpt)
+        (:ContractClause)-[:HAS_TYPE]->(:ClauseType)
+        (:Agreement)-[:GOVERNED_BY_LAW]->(:Country)
+        (:Organization)-[:IS_PARTY_TO]->(:Agreement)
+        (:Organization)-[:INCORPORATED_IN]->(:Country)
+
+    """
+
+    GET_CONTRACT_CLAUSES_QUERY = """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement {envelope_id: $envelope_id})
+        MATCH (a)-[:HAS_CLAUSE]->(cc:ContractClause)-[:HAS_EXCERPT]->(e:Excerpt)
+        RETURN a.envelope_id as envelope_id, a.summary as summary, cc.type as contract_clause_type, collect(e.text) as excerpts
+    """
+
+    # One row per risk: risks are not linked to clauses, so pairing every clause
+    # of the agreement with every risk only multiplied the rows
+    HIGH_RISK_QUERY = """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)-[:HAS_RISK]->(r:Risk)
+        WHERE r.level = 'HIGH' AND ($after IS NULL OR r.key > $after[0])
+        WITH a, r
+        ORDER BY r.key
+        LIMIT $limit
+        RETURN r as risk, a.name as agreement_name, a.envelope_id as envelope_id, [(a)-[:HAS_CLAUSE]->(c:ContractClause) | c.type] as clause_types
+        ORDER BY risk.key
+    """
+
+    CONTRACT_RISKS_QUERY = """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement {envelope_id: $envelope_id})
+        MATCH (a)-[:HAS_RISK]->(r:Risk)
+        RETURN r as risk
+        ORDER BY r.level DESC
+        LIMIT $limit
+    """
+
+    # Analytics read the PortfolioStat counters Neo4jIndexer keeps up to date
+    # on every write, instead of scanning the account's clauses
+    PORTFOLIO_STATS_QUERY = """
+        MATCH (s:PortfolioStat {account_id: $account_id, kind: $kind, scope: ''})
+        RETURN s.name as name, s.count as count
+        ORDER BY count DESC, name
+        LIMIT $limit
+    """
+
+    # Excerpts are sampled for the counters returned only
+    PARTY_ANALYSIS_QUERY = """
+        MATCH (s:PortfolioStat {account_id: $account_id, kind: 'party_clause_type'})
+        WHERE s.scope CONTAINS $party_name
+        WITH s
+        ORDER BY s.count DESC, s.scope, s.name
+        LIMIT $limit
+        CALL {
+            WITH s
+            MATCH (o:Organization {name: s.scope})-[:IS_PARTY_TO]->(a:Agreement)<-[:HAS_AGREEMENT]-(:Account {account_id: $account_id})
+            MATCH (a)-[:HAS_CLAUSE]->(:ContractClause {type: s.name})-[:HAS_EXCERPT]->(e:Excerpt)
+            WITH DISTINCT e.text as text
+            LIMIT $max_excerpts
+            RETURN collect(text) as excerpts
+        }
+        RETURN
+            s.name as clause_type,
+            excerpts,
+            s.count as frequency,
+            s.scope as party_name
+        ORDER BY frequency DESC, party_name, clause_type
+    """
+
+    INDUSTRY_ANALYSIS_QUERY = """
+        MATCH (s:PortfolioStat {account_id: $account_id, kind: 'industry_clause_type', scope: $industry})
+        RETURN s.name as clause_type, s.count as frequency
+        ORDER BY frequency DESC, clause_type
+        LIMIT $limit
+    """
+
+    # Date windows start from the range index on the date, then check the account
+    UPCOMING_OBLIGATIONS_QUERY = """
+        MATCH (o:Obligation)
+        USING INDEX o:Obligation(due_on)
+        WHERE o.due_on >= date($today) AND o.due_on <= date($today) + duration({days: $days_ahead})
+            AND o.status = 'PENDING'
+            AND ($after IS NULL
+                OR o.due_on > date($after[0])
+                OR (o.due_on = date($after[0]) AND o.key > $after[1]))
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)-[:HAS_OBLIGATION]->(o)
+        WITH o, a
+        ORDER BY o.due_on, o.key
+        LIMIT $limit
+        RETURN o, a.name as agreement_name
+        ORDER BY o.due_on, o.key
+    """
+
+    EXPIRING_AGREEMENTS_QUERY = """
+        MATCH (a:Agreement)
+        USING INDEX a:Agreement(expires_on)
+        WHERE a.expires_on >= date($today) AND a.expires_on <= date($today) + duration({days: $days_ahead})
+            AND ($after IS NULL
+                OR a.expires_on > date($after[0])
+                OR (a.expires_on = date($after[0]) AND a.envelope_id > $after[1]))
+            AND EXISTS { (:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a) }
+        WITH a
+        ORDER BY a.expires_on, a.envelope_id
+        LIMIT $limit
+        RETURN a.envelope_id as envelope_id, toString(a.expires_on) as expires_on, a.summary as summary
+    """
+
+    # Obligations without a due date sort first
+    RECURRING_OBLIGATIONS_QUERY = """
+        MATCH (acc:Account {account_id: $account_id})-[:HAS_AGREEMENT]->(a:Agreement)
+        MATCH (a)-[:HAS_OBLIGATION]->(o:Obligation)
+        WHERE o.recurring = true
+            AND ($after IS NULL
+                OR coalesce(toString(o.due_on), '') > $after[0]
+                OR (coalesce(toString(o.due_on), '') = $after[0] AND o.key > $after[1]))
+        WITH o, a
+        ORDER BY coalesce(toString(o.due_on), ''), o.key
+        LIMIT $limit
+        RETURN o, a.name as agreement_name
+        ORDER BY coalesce(toString(o.due_on), ''), o.key
+    """
+
+    # Incremented by Neo4jIndexer after every ingestion into the account
+    GET_GENERATION_QUERY = """
+        OPTIONAL MATCH (acc:Account {account_id: $account_id})
+        RETURN coalesce(acc.generation, 0) AS generation
+    """
+
+    BUMP_GENERATION_QUERY = """
+        MERGE (acc:Account {account_id: $account_id})
+        SET acc.generation = coalesce(acc.generation, 0) + 1
+        RETURN acc.generation AS generation
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        pwd: str,
+        database: str = "neo4j",
+        embedder: Optional[Embedder] = None,
+    ):
+        # Async driver for our own queries, so Cypher never blocks the event loop
+        self._driver = AsyncGraphDatabase.driver(uri, auth=(user, pwd))
+        self._database = database
+        # Query embeddings go through the persistent embedding cache
+        self._embedder = embedder or CachedOpenAIEmbeddings()
+        # Create LLM object. Used to generate the CYPHER queries
+        self._llm = OpenAILLM(model_name="gpt-4o", model_params={"temperature": 0})
+        self._text2cypher_prompt = Text2CypherTemplate()
+        self._cypher_cache = None
+        self._cypher_guard = None
+        # account_id -> (generation, vector index candidates its last search
+        # needed), above vector_search_max_candidates for accounts searched
+        # exactly. Forgotten once an ingestion advances the generation
+        self._vector_candidates: Dict[str, Tuple[int, int]] = {}
+
+    async def _query(self, query: str, **params) -> List[dict]:
+        records, _, _ = await self._driver.execute_query(
+            query, params, database_=self._database
+        )
+        return records
+
+    async def get_contract(self, account_id: str, envelope_id: str) -> List[dict]:
+        return await self._query(
+            self.GET_CONTRACT_BY_ID_QUERY,
+            envelope_id=envelope_id,
+            account_id=account_id,
+        )
+
+    async def get_contracts_by_party(
+        self,
+        account_id: str,
+        organization_name: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        return await self._query(
+            self.GET_CONTRACTS_BY_PARTY_NAME,
+            organization_name=organization_name,
+            after=after,
+            limit=limit,
+            account_id=account_id,
+        )
+
+    async def get_contracts_with_clause_type(
+        self,
+        account_id: str,
+        clause_type: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        return await self._query(
+            self.GET_CONTRACT_WITH_CLAUSE_TYPE_QUERY,
+            clause_type=clause_type,
+            after=after,
+            limit=limit,
+            account_id=account_id,
+        )
+
+    async def get_contracts_without_clause_type(
+        self,
+        account_id: str,
+        clause_type: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        return await self._query(
+            self.GET_CONTRACT_WITHOUT_CLAUSE_TYPE_QUERY,
+            clause_type=clause_type,
+            after=after,
+            limit=limit,
+            account_id=account_id,
+        )
+
+    async def _known_candidates(self, account_id: str) -> Tuple[int, int]:
+        """Current generation of the account and the candidates it needed"""
+        generation = await current_generation(self, account_id)
+        known = self._vector_candidates.get(account_id)
+        # Ingestions change the account's share of the index, so after one
+        # oversampling is tried again for accounts that were searched exactly
+        if known is None or known[0] != generation:
+            return generation, 0
+        return known
+
+    async def search_similar_excerpts(
+        self, account_id: str, text: str, top_k: int = 3
+    ) -> List[dict]:
+        embedding = await asyncio.to_thread(self._embedder.embed_query, text)
+        settings = get_settings()
+
+        # Oversample the shared index, starting from what the account needed
+        # last time, until top_k of the account's excerpts are among the hits
+        generation, known = await self._known_candidates(account_id)
+        candidates = max(known, top_k * settings.vector_search_oversample)
+        while candidates <= settings.vector_search_max_candidates:
+            records = await self._query(
+                self.VECTOR_SEARCH_EXCERPTS_QUERY,
+                embedding=embedding,
+                candidates=candidates,
+                top_k=top_k,
+                account_id=account_id,
+            )
+            if len({record["excerpt"] for record in records}) >= top_k:
+                self._vector_candidates[account_id] = (generation, candidates)
+                return records
+            candidates *= 2
+
+        # The account's excerpts are rare in the index: score them all, and
+        # skip the index for its next searches
+        self._vector_candidates[account_id] = (generation, candidates)
+        return await self._query(
+            self.EXACT_SEARCH_EXCERPTS_QUERY,
+            embedding=embedding,
+            top_k=top_k,
+            account_id=account_id,
+        )
+
+    @staticmethod
+    def _keywords(text: str) -> str:
+        # Plain terms, so Lucene operators and special characters in the text
+        # cannot make the full-text query invalid
+        return " ".join(re.findall(r"\w+", text))
+
+    async def search_excerpts_hybrid(
+        self, account_id: str, text: str, top_k: int = 5
+    ) -> List[dict]:
+        keywords = self._keywords(text)
+        if not keywords:
+            return await self.search_similar_excerpts(account_id, text, top_k)
+
+        embedding = await asyncio.to_thread(self._embedder.embed_query, text)
+        settings = get_settings()
+        # Both searches in one round trip, so the vector side cannot refill;
+        # it starts from what the account's similarity searches needed
+        _, known = await self._known_candidates(account_id)
+        candidates = min(
+            max(known, top_k * settings.vector_search_oversample),
+            settings.vector_search_max_candidates,
+        )
+        return await self._query(
+            self.HYBRID_SEARCH_EXCERPTS_QUERY,
+            keywords=keywords,
+            embedding=embedding,
+            candidates=candidates,
+            rrf_k=settings.hybrid_search_rrf_k,
+            top_k=top_k,
+            account_id=account_id,
+        )
+
+    @property
+    def cypher_cache(self) -> CypherCache:
+        # Generated queries are only valid for the schema and model they came from
+        if self._cypher_cache is None:
+            settings = get_settings()
+            self._cypher_cache = CypherCache(
+                settings.cypher_cache_path,
+                content_hash(self.NEO4J_SCHEMA, self._llm.model_name),
+                settings.cypher_cache_similarity,
+            )
+        return self._cypher_cache
+
+    @staticmethod
+    def _format_answer(contents) -> str:
+        answer = ""
+        for content in contents:
+            content = str(content)
+            if content:
+                answer += content + "\n\n"
+        return answer
+
+    @property
+    def cypher_guard(self) -> CypherGuard:
+        # Generated queries only run scoped to the account and within budget
+        if self._cypher_guard is None:
+            settings = get_settings()
+            self._cypher_guard = CypherGuard(
+                self._driver,
+                self._database,
+                max_estimated_rows=settings.generated_cypher_max_estimated_rows,
+                row_limit=settings.generated_cypher_row_limit,
+                timeout=settings.generated_cypher_timeout,
+            )
+        return self._cypher_guard
+
+    async def _generate_cypher(self, question: str) -> str:
+        prompt = self._text2cypher_prompt.format(
+            schema=self.NEO4J_SCHEMA, examples="", query_text=question
+        )
+        response = await self._llm.ainvoke(prompt)
+        return response.content.strip()
+
+    async def answer_aggregation_question(self, account_id: str, question: str) -> str:
+        # The Cypher of a repeated or close enough question runs without the LLM
+        cypher = self.cypher_cache.get(question)
+        embedding = None
+        if cypher is None and len(self.cypher_cache):
+            embedding = await asyncio.to_thread(self._embedder.embed_query, question)
+            cypher = self.cypher_cache.find_similar(question, embedding)
+        if cypher is not None:
+            try:
+                return self._format_answer(
+                    await self.cypher_guard.run(cypher, account_id)
+                )
+            except CypherRejectedError as e:
+                logger.warning(f"Cached Cypher failed, generating it again: {e}")
+                self.cypher_cache.discard(cypher)
+
+        # Generate a Cypher query using the LLM, then run it through the guard
+        cypher = await self._generate_cypher(question)
+        try:
+            records = await self.cypher_guard.run(cypher, account_id)
+        except CypherRejectedError as e:
+            logger.info(f"Rejected generated Cypher {cypher!r}: {e}")
+            # Returned as the tool result, so the chat model can rephrase
+            return (
+                f"The query generated for this question was rejected: {e}. "
+                "Ask a narrower question, or use another contract function."
+            )
+
+        # The query ran, so it is kept for the next time
+        if embedding is None:
+            embedding = await asyncio.to_thread(self._embedder.embed_query, question)
+        self.cypher_cache.put(question, cypher, embedding)
+
+        return self._format_answer(records)
+
+    async def get_contract_excerpts(
+        self, account_id: str, envelope_id: str
+    ) -> List[dict]:
+        return await self._query(
+            self.GET_CONTRACT_CLAUSES_QUERY,
+            envelope_id=envelope_id,
+            account_id=account_id,
+        )
+
+    async def get_high_risk_clauses(
+        self, account_id: str, after: Optional[list] = None, limit: int = 25
+    ) -> List[dict]:
+        return await self._query(
+            self.HIGH_RISK_QUERY, after=after, limit=limit, account_id=account_id
+        )
+
+    async def get_contract_risks(
+        self, account_id: str, envelope_id: str, limit: int = 25
+    ) -> List[dict]:
+        return await self._query(
+            self.CONTRACT_RISKS_QUERY,
+            envelope_id=envelope_id,
+            limit=limit,
+            account_id=account_id,
+        )
+
+    async def compare_contracts_by_party(
+        self, account_id: str, party_name: str, limit: int = 25, max_excerpts: int = 3
+    ) -> List[dict]:
+        return await self._query(
+            self.PARTY_ANALYSIS_QUERY,
+            party_name=party_name,
+            limit=limit,
+            max_excerpts=max_excerpts,
+            account_id=account_id,
+        )
+
+    async def analyze_industry_patterns(
+        self, account_id: str, industry: str, limit: int = 25
+    ) -> List[dict]:
+        return await self._query(
+            self.INDUSTRY_ANALYSIS_QUERY,
+            industry=normalize_text(industry),
+            limit=limit,
+            account_id=account_id,
+        )
+
+    async def get_portfolio_stats(
+        self, account_id: str, kind: str, limit: int = 25
+    ) -> List[dict]:
+        return await self._query(
+            self.PORTFOLIO_STATS_QUERY, kind=kind, limit=limit, account_id=account_id
+        )
+
+    async def get_pending_obligations(
+        self,
+        account_id: str,
+        days_ahead: int,
+        today: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        return await self._query(
+            self.UPCOMING_OBLIGATIONS_QUERY,
+            days_ahead=days_ahead,
+            today=today,
+            after=after,
+            limit=limit,
+            account_id=account_id,
+        )
+
+    async def get_expiring_agreements(
+        self,
+        account_id: str,
+        days_ahead: int,
+        today: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        return await self._query(
+            self.EXPIRING_AGREEMENTS_QUERY,
+            days_ahead=days_ahead,
+            today=today,
+            after=after,
+            limit=limit,
+            account_id=account_id,
+        )
+
+    async def get_recurring_obligations(
+        self, account_id: str, after: Optional[list] = None, limit: int = 25
+    ) -> List[dict]:
+        return await self._query(
+            self.RECURRING_OBLIGATIONS_QUERY,
+            after=after,
+            limit=limit,
+            account_id=account_id,
+        )
+
+    async def get_generation(self, account_id: str) -> int:
+        records = await self._query(self.GET_GENERATION_QUERY, account_id=account_id)
+        return records[0]["generation"]
+
+    async def bump_generation(self, account_id: str) -> int:
+        records = await self._query(self.BUMP_GENERATION_QUERY, account_id=account_id)
+        return records[0]["generation"]
+
+    async def write_agreements(self, agreements: List[dict]):
+        # Bulk ingestion goes through Neo4jIndexer's batched, sharded writers;
+        # this is the single-transaction path for small writes
+        from ..neo4j.neo4j_indexer import Neo4jIndexer
+
+        # The accounts' share of the index changes, so oversampling is tried
+        # again for accounts that were searched exactly
+        for agreement in agreements:
+            self._vector_candidates.pop(agreement["account_id"], None)
+
+        async with self._driver.session(database=self._database) as session:
+            async with await session.begin_transaction() as tx:
+                await Neo4jIndexer._run_batch(
+                    tx, [{"agreement": agreement} for agreement in agreements]
+                )
+                await tx.commit()
+
+    async def generate_embeddings(
+        self, webhook_service: Optional[WebhookService] = None
+    ):
+        await ExcerptEmbeddingPipeline(
+            self._driver, self._database, webhook_service
+        ).run()
+
+    async def close(self):
+        await self._driver.close()
+        if self._cypher_cache is not None:
+            self._cypher_cache.close()
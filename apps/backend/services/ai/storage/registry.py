@@ -0,0 +1,53 @@
+import logging
+from typing import Dict, Optional, Tuple
+
+from core.settings import get_settings
+from .base import ContractStore
+from .neo4j_store import Neo4jContractStore
+from .sqlite_store import SQLiteContractStore
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Process-wide stores, each owning one driver and connection pool
+_stores: Dict[Tuple, ContractStore] = {}
+
+
+def get_contract_store(
+    uri: Optional[str] = None,
+    user: Optional[str] = None,
+    pwd: Optional[str] = None,
+    database: Optional[str] = None,
+) -> ContractStore:
+    """Process-wide contract store of the configured storage backend"""
+    settings = get_settings()
+    if settings.storage_backend == "sqlite":
+        key = ("sqlite", settings.sqlite_store_path)
+    elif settings.storage_backend == "neo4j":
+        key = (
+            "neo4j",
+            uri or settings.neo4j_uri,
+            user or settings.neo4j_user,
+            pwd or settings.neo4j_password,
+            database or settings.neo4j_database,
+        )
+    else:
+        raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+
+    if key not in _stores:
+        if key[0] == "sqlite":
+            _stores[key] = SQLiteContractStore(settings.sqlite_store_path)
+        else:
+            _stores[key] = Neo4jContractStore(*key[1:4], database=key[4])
+    return _stores[key]
+
+
+async def close_contract_stores():
+    """Close the process-wide stores, at application shutdown"""
+    while _stores:
+        _, store = _stores.popitem()
+        try:
+            await store.close()
+        except Exception as e:
+            logger.error(f"Error closing contract store: {e}")
@@ -0,0 +1,892 @@
+import asyncio
+import bisect
+import difflib
+import logging
+import re
+import sqlite3
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from neo4j_graphrag.embeddings import Embedder
+
+from core.settings import get_settings
+from utils import normalize_text
+from ...notification import WebhookService
+from ..embeddings import CachedOpenAIEmbeddings
+from .base import ContractStore
+from .summary import (
+    load_summary,
+    portfolio_change,
+    portfolio_deltas,
+)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _Indexes:
+    """In-memory adjacency indexes and excerpt vectors loaded from SQLite"""
+
+    def __init__(self, db: sqlite3.Connection):
+        self.agreements: Dict[str, dict] = {}
+        self.by_account: Dict[str, List[str]] = {}
+        self.parties: Dict[str, List[dict]] = {}
+        self.by_organization: Dict[str, List[str]] = {}
+        self.clauses: Dict[str, List[dict]] = {}
+        self.by_clause_type: Dict[str, set] = {}
+        self.excerpts: Dict[str, List[dict]] = {}
+        self.excerpt_clauses: Dict[str, List[dict]] = {}
+        self.risks: Dict[str, List[dict]] = {}
+        self.obligations: Dict[str, List[dict]] = {}
+
+        for row in db.execute("SELECT * FROM agreements ORDER BY rowid"):
+            agreement = dict(row)
+            self.agreements[agreement["envelope_id"]] = agreement
+            self.by_account.setdefault(agreement["account_id"], []).append(
+                agreement["envelope_id"]
+            )
+        for row in db.execute("SELECT * FROM parties ORDER BY rowid"):
+            party = dict(row)
+            self.parties.setdefault(party["envelope_id"], []).append(party)
+            self.by_organization.setdefault(party["name"], []).append(
+                party["envelope_id"]
+            )
+        for row in db.execute("SELECT * FROM clauses ORDER BY rowid"):
+            clause = dict(row)
+            self.clauses.setdefault(clause["envelope_id"], []).append(clause)
+            self.by_clause_type.setdefault(clause["type"], set()).add(
+                clause["envelope_id"]
+            )
+        for row in db.execute(
+            "SELECT ce.clause_key, e.key, e.text FROM clause_excerpts ce "
+            "JOIN excerpts e ON e.key = ce.excerpt_key ORDER BY ce.rowid"
+        ):
+            self.excerpts.setdefault(row["clause_key"], []).append(
+                {"key": row["key"], "text": row["text"]}
+            )
+        for clauses in self.clauses.values():
+            for clause in clauses:
+                for excerpt in self.excerpts.get(clause["key"], []):
+                    self.excerpt_clauses.setdefault(excerpt["key"], []).append(clause)
+        for row in db.execute("SELECT * FROM risks ORDER BY rowid"):
+            risk = dict(row)
+            self.risks.setdefault(risk["envelope_id"], []).append(risk)
+        for row in db.execute("SELECT * FROM obligations ORDER BY rowid"):
+            obligation = dict(row)
+            if obligation["recurring"] is not None:
+                obligation["recurring"] = bool(obligation["recurring"])
+            self.obligations.setdefault(obligation["envelope_id"], []).append(
+                obligation
+            )
+
+        # account_id -> (sort keys, items) of dated agreements and obligations,
+        # ordered by date for date window lookups. Keys are unique, so items
+        # are never compared when sorting.
+        self.by_expiry: Dict[str, Tuple[List[tuple], List[str]]] = {}
+        self.by_due_date: Dict[str, Tuple[List[tuple], List[tuple]]] = {}
+        for agreement in self.agreements.values():
+            if agreement["expires_on"]:
+                self._add_dated(
+                    self.by_expiry,
+                    agreement["account_id"],
+                    (agreement["expires_on"], agreement["envelope_id"]),
+                    agreement["envelope_id"],
+                )
+            for obligation in self.obligations.get(agreement["envelope_id"], []):
+                if obligation["due_on"]:
+                    self._add_dated(
+                        self.by_due_date,
+                        agreement["account_id"],
+                        (obligation["due_on"], obligation["key"]),
+                        (agreement["envelope_id"], obligation),
+                    )
+        for dated in (self.by_expiry, self.by_due_date):
+            for account_id, (keys, items) in dated.items():
+                pairs = sorted(zip(keys, items))
+                dated[account_id] = ([key for key, _ in pairs], [i for _, i in pairs])
+
+        # Normalized excerpt vectors, one row per embedded excerpt
+        keys, vectors = [], []
+        for row in db.execute("SELECT key, embedding FROM excerpt_embeddings"):
+            keys.append(row["key"])
+            vectors.append(np.frombuffer(row["embedding"], dtype=np.float32))
+        self.vector_keys = np.array(keys)
+        self.vectors = (
+            np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        )
+        if len(vectors):
+            self.vectors /= np.linalg.norm(self.vectors, axis=1, keepdims=True)
+
+        # account_id -> rows of its excerpts in the vector matrix, so searches
+        # only score the account's own excerpts
+        accounts_by_key: Dict[str, set] = {}
+        for key, clauses in self.excerpt_clauses.items():
+            accounts_by_key[key] = {
+                self.agreements[clause["envelope_id"]]["account_id"]
+                for clause in clauses
+                if clause["envelope_id"] in self.agreements
+            }
+        rows_by_account: Dict[str, List[int]] = {}
+        for row, key in enumerate(keys):
+            for account_id in accounts_by_key.get(key, ()):
+                rows_by_account.setdefault(account_id, []).append(row)
+        self.vector_rows = {
+            account_id: np.array(rows) for account_id, rows in rows_by_account.items()
+        }
+
+    @staticmethod
+    def _add_dated(dated: dict, account_id: str, key: tuple, item):
+        keys, items = dated.setdefault(account_id, ([], []))
+        keys.append(key)
+        items.append(item)
+
+    @staticmethod
+    def date_window(
+        dated: Tuple[list, list], today: str, days_ahead: int, after: Optional[list]
+    ):
+        """Items dated from today to days_ahead days after it, after a sort key"""
+        keys, items = dated
+        end = (date.fromisoformat(today) + timedelta(days=days_ahead)).isoformat()
+        start = bisect.bisect_left(keys, (today,))
+        if after is not None:
+            start = max(start, bisect.bisect_right(keys, tuple(after)))
+        for i in range(start, len(keys)):
+            if keys[i][0] > end:
+                break
+            yield items[i]
+
+
+class SQLiteContractStore(ContractStore):
+    """
+    In-process contract store for small single-tenant deployments, tests and
+    benchmarks, with no database server.
+
+    Agreements are kept in SQLite tables mirroring the graph. Reads are served
+    from adjacency indexes and a NumPy matrix of excerpt vectors held in
+    memory; they are reloaded whenever the SQLite file changes.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS accounts (
+        account_id TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS agreements (
+        envelope_id TEXT PRIMARY KEY,
+        account_id TEXT NOT NULL,
+        name TEXT,
+        agreement_type TEXT,
+        effective_date TEXT,
+        expiration_date TEXT,
+        renewal_term TEXT,
+        most_favored_country TEXT,
+        governing_country TEXT,
+        governing_state TEXT,
+        industry TEXT,
+        effective_on TEXT,
+        expires_on TEXT,
+        summary TEXT
+    );
+    CREATE INDEX IF NOT EXISTS agreements_account ON agreements (account_id);
+    CREATE TABLE IF NOT EXISTS parties (
+        envelope_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        role TEXT,
+        incorporation_country TEXT,
+        incorporation_state TEXT
+    );
+    CREATE INDEX IF NOT EXISTS parties_envelope ON parties (envelope_id);
+    CREATE TABLE IF NOT EXISTS clauses (
+        key TEXT PRIMARY KEY,
+        envelope_id TEXT NOT NULL,
+        type TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS clauses_envelope ON clauses (envelope_id);
+    CREATE TABLE IF NOT EXISTS excerpts (
+        key TEXT PRIMARY KEY,
+        text TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS clause_excerpts (
+        clause_key TEXT NOT NULL,
+        excerpt_key TEXT NOT NULL,
+        PRIMARY KEY (clause_key, excerpt_key)
+    );
+    CREATE TABLE IF NOT EXISTS excerpt_embeddings (
+        key TEXT PRIMARY KEY,
+        embedding BLOB NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS risks (
+        key TEXT PRIMARY KEY,
+        envelope_id TEXT NOT NULL,
+        risk_type TEXT,
+        description TEXT,
+        level TEXT,
+        impact TEXT
+    );
+    CREATE INDEX IF NOT EXISTS risks_envelope ON risks (envelope_id);
+    CREATE TABLE IF NOT EXISTS obligations (
+        key TEXT PRIMARY KEY,
+        envelope_id TEXT NOT NULL,
+        description TEXT,
+        due_date TEXT,
+        recurring INTEGER,
+        recurrence_pattern TEXT,
+        status TEXT,
+        reminder_days INTEGER,
+        due_on TEXT
+    );
+    CREATE INDEX IF NOT EXISTS obligations_envelope ON obligations (envelope_id);
+    CREATE TABLE IF NOT EXISTS portfolio_stats (
+        key TEXT PRIMARY KEY,
+        account_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        name TEXT NOT NULL,
+        count INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS portfolio_stats_kind
+        ON portfolio_stats (account_id, kind, scope, count);
+    """
+
+    def __init__(self, path: str | Path, embedder: Optional[Embedder] = None):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+        self._embedder = embedder
+        self._indexes: Optional[_Indexes] = None
+        self._data_version = None
+
+    def _update_portfolio(self, deltas: List[dict]):
+        self._db.executemany(
+            "INSERT INTO portfolio_stats VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET count = count + excluded.count",
+            [
+                (
+                    delta["key"],
+                    delta["account_id"],
+                    delta["kind"],
+                    delta["scope"],
+                    delta["name"],
+                    delta["count"],
+                )
+                for delta in deltas
+            ],
+        )
+        self._db.executemany(
+            "DELETE FROM portfolio_stats WHERE key = ? AND count <= 0",
+            [(delta["key"],) for delta in deltas],
+        )
+
+    @property
+    def embedder(self) -> Embedder:
+        # Created on first use, so reads that never embed need no API key
+        if self._embedder is None:
+            self._embedder = CachedOpenAIEmbeddings()
+        return self._embedder
+
+    def _get_indexes(self) -> _Indexes:
+        """Indexes of the current data, reloaded after any commit to the file"""
+        with self._lock:
+            data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            if self._indexes is None or data_version != self._data_version:
+                self._indexes = _Indexes(self._db)
+                self._data_version = data_version
+            return self._indexes
+
+    # Record builders, shaped like the Cypher query results
+
+    @staticmethod
+    def _summary_record(indexes: _Indexes, envelope_id: str) -> dict:
+        return {
+            "envelope_id": envelope_id,
+            "summary": indexes.agreements[envelope_id]["summary"],
+        }
+
+    @staticmethod
+    def _page(items, sort_key, after: Optional[list], limit: int) -> list:
+        """The limit first items by sort key, after the given key"""
+        if after is not None:
+            items = [item for item in items if sort_key(item) > tuple(after)]
+        return sorted(items, key=sort_key)[:limit]
+
+    def _agreement_records(
+        self, indexes: _Indexes, envelope_ids, after: Optional[list], limit: int
+    ) -> List[dict]:
+        envelope_ids = self._page(
+            list(envelope_ids), lambda envelope_id: (envelope_id,), after, limit
+        )
+        return [
+            self._summary_record(indexes, envelope_id) for envelope_id in envelope_ids
+        ]
+
+    # Reads
+
+    async def get_contract(self, account_id: str, envelope_id: str) -> List[dict]:
+        indexes = self._get_indexes()
+        if envelope_id not in indexes.by_account.get(account_id, []):
+            return []
+        return [self._summary_record(indexes, envelope_id)]
+
+    async def get_contracts_by_party(
+        self,
+        account_id: str,
+        organization_name: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        envelope_ids = indexes.by_account.get(account_id, [])
+        organizations = {
+            party["name"]
+            for envelope_id in envelope_ids
+            for party in indexes.parties.get(envelope_id, [])
+        }
+        if not organizations:
+            return []
+
+        # Closest to the full-text ranking: shared words first, then similarity
+        words = set(re.findall(r"\w+", organization_name.lower()))
+
+        def score(name):
+            shared = len(words & set(re.findall(r"\w+", name.lower())))
+            ratio = difflib.SequenceMatcher(
+                None, organization_name.lower(), name.lower()
+            ).ratio()
+            return shared, ratio
+
+        best = max(organizations, key=score)
+        if score(best)[0] == 0:
+            return []
+        in_account = set(envelope_ids)
+        return self._agreement_records(
+            indexes,
+            dict.fromkeys(
+                envelope_id
+                for envelope_id in indexes.by_organization[best]
+                if envelope_id in in_account
+            ),
+            after,
+            limit,
+        )
+
+    async def get_contracts_with_clause_type(
+        self,
+        account_id: str,
+        clause_type: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        with_clause = indexes.by_clause_type.get(clause_type, set())
+        return self._agreement_records(
+            indexes,
+            [
+                envelope_id
+                for envelope_id in indexes.by_account.get(account_id, [])
+                if envelope_id in with_clause
+            ],
+            after,
+            limit,
+        )
+
+    async def get_contracts_without_clause_type(
+        self,
+        account_id: str,
+        clause_type: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        with_clause = indexes.by_clause_type.get(clause_type, set())
+        return self._agreement_records(
+            indexes,
+            [
+                envelope_id
+                for envelope_id in indexes.by_account.get(account_id, [])
+                if envelope_id not in with_clause
+            ],
+            after,
+            limit,
+        )
+
+    async def _nearest_excerpts(
+        self, indexes: _Indexes, account_id: str, text: str, limit: int
+    ) -> List[str]:
+        """Keys of the account's excerpts closest to the text, closest first"""
+        # Only the account's excerpts are candidates
+        rows = indexes.vector_rows.get(account_id)
+        if rows is None:
+            return []
+
+        query = np.asarray(
+            await asyncio.to_thread(self.embedder.embed_query, text), dtype=np.float32
+        )
+        query /= np.linalg.norm(query)
+        scores = indexes.vectors[rows] @ query
+        limit = min(limit, len(rows))
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        return [indexes.vector_keys[rows[i]] for i in best[np.argsort(-scores[best])]]
+
+    @staticmethod
+    def _keyword_excerpts(
+        indexes: _Indexes, account_id: str, text: str, limit: int
+    ) -> List[str]:
+        """Keys of the account's excerpts sharing most words with the text"""
+        words = set(re.findall(r"\w+", text.lower()))
+        scores = {}
+        for envelope_id in indexes.by_account.get(account_id, []):
+            for clause in indexes.clauses.get(envelope_id, []):
+                for excerpt in indexes.excerpts.get(clause["key"], []):
+                    shared = len(
+                        words & set(re.findall(r"\w+", excerpt["text"].lower()))
+                    )
+                    if shared:
+                        scores[excerpt["key"]] = shared
+        return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+    @staticmethod
+    def _excerpt_records(
+        indexes: _Indexes, account_id: str, keys: List[str]
+    ) -> List[dict]:
+        """One record per agreement of the account holding each excerpt"""
+        in_account = set(indexes.by_account.get(account_id, []))
+        results = []
+        for key in keys:
+            for clause in indexes.excerpt_clauses.get(key, []):
+                if clause["envelope_id"] not in in_account:
+                    continue
+                agreement = indexes.agreements[clause["envelope_id"]]
+                results.append(
+                    {
+                        "agreement_name": agreement["name"],
+                        "envelope_id": agreement["envelope_id"],
+                        "clause_type": clause["type"],
+                        "excerpt": next(
+                            excerpt["text"]
+                            for excerpt in indexes.excerpts[clause["key"]]
+                            if excerpt["key"] == key
+                        ),
+                    }
+                )
+        return results
+
+    async def search_similar_excerpts(
+        self, account_id: str, text: str, top_k: int = 3
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        keys = await self._nearest_excerpts(indexes, account_id, text, top_k)
+        return self._excerpt_records(indexes, account_id, keys)
+
+    async def search_excerpts_hybrid(
+        self, account_id: str, text: str, top_k: int = 5
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        settings = get_settings()
+        candidates = top_k * settings.vector_search_oversample
+
+        # Reciprocal rank fusion of the keyword and vector rankings
+        scores: Dict[str, float] = {}
+        for ranking in (
+            self._keyword_excerpts(indexes, account_id, text, candidates),
+            await self._nearest_excerpts(indexes, account_id, text, candidates),
+        ):
+            for rank, key in enumerate(ranking):
+                scores[key] = scores.get(key, 0.0) + 1.0 / (
+                    settings.hybrid_search_rrf_k + rank + 1
+                )
+        keys = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return self._excerpt_records(indexes, account_id, keys)
+
+    async def answer_aggregation_question(self, account_id: str, question: str) -> str:
+        # Free-form questions are answered by generating Cypher, which needs
+        # the Neo4j backend
+        return (
+            "Aggregation questions are not supported by the in-process store. "
+            "Use the other contract functions to answer this question."
+        )
+
+    @staticmethod
+    def _in_account(indexes: _Indexes, account_id: str, envelope_id: str) -> bool:
+        agreement = indexes.agreements.get(envelope_id)
+        return agreement is not None and agreement["account_id"] == account_id
+
+    async def get_contract_excerpts(
+        self, account_id: str, envelope_id: str
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        if not self._in_account(indexes, account_id, envelope_id):
+            return []
+        records = []
+        for clause in indexes.clauses.get(envelope_id, []):
+            excerpts = indexes.excerpts.get(clause["key"])
+            if excerpts:
+                records.append(
+                    {
+                        **self._summary_record(indexes, envelope_id),
+                        "contract_clause_type": clause["type"],
+                        "excerpts": [excerpt["text"] for excerpt in excerpts],
+                    }
+                )
+        return records
+
+    async def get_high_risk_clauses(
+        self, account_id: str, after: Optional[list] = None, limit: int = 25
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        risks = self._page(
+            [
+                (envelope_id, risk)
+                for envelope_id in indexes.by_account.get(account_id, [])
+                for risk in indexes.risks.get(envelope_id, [])
+                if risk["level"] == "HIGH"
+            ],
+            lambda item: (item[1]["key"],),
+            after,
+            limit,
+        )
+        return [
+            {
+                "risk": risk,
+                "agreement_name": indexes.agreements[envelope_id]["name"],
+                "envelope_id": envelope_id,
+                "clause_types": [
+                    clause["type"] for clause in indexes.clauses.get(envelope_id, [])
+                ],
+            }
+            for envelope_id, risk in risks
+        ]
+
+    async def get_contract_risks(
+        self, account_id: str, envelope_id: str, limit: int = 25
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        if not self._in_account(indexes, account_id, envelope_id):
+            return []
+        risks = sorted(
+            indexes.risks.get(envelope_id, []),
+            key=lambda risk: (risk["level"] is None, risk["level"] or ""),
+            reverse=True,
+        )
+        return [{"risk": risk} for risk in risks[:limit]]
+
+    def _portfolio_rows(self, sql: str, parameters: tuple) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, parameters).fetchall()
+
+    async def compare_contracts_by_party(
+        self, account_id: str, party_name: str, limit: int = 25, max_excerpts: int = 3
+    ) -> List[dict]:
+        rows = self._portfolio_rows(
+            "SELECT scope, name, count FROM portfolio_stats "
+            "WHERE account_id = ? AND kind = 'party_clause_type' "
+            "AND instr(scope, ?) > 0 ORDER BY count DESC, scope, name LIMIT ?",
+            (account_id, party_name, limit),
+        )
+
+        # Excerpts are sampled for the counters returned only
+        indexes = self._get_indexes()
+        records = []
+        for row in rows:
+            excerpts: Dict[str, None] = {}
+            for envelope_id in indexes.by_organization.get(row["scope"], []):
+                if indexes.agreements[envelope_id]["account_id"] != account_id:
+                    continue
+                for clause in indexes.clauses.get(envelope_id, []):
+                    if clause["type"] != row["name"]:
+                        continue
+                    for excerpt in indexes.excerpts.get(clause["key"], []):
+                        excerpts[excerpt["text"]] = None
+                if len(excerpts) >= max_excerpts:
+                    break
+            records.append(
+                {
+                    "clause_type": row["name"],
+                    "excerpts": list(excerpts)[:max_excerpts],
+                    "frequency": row["count"],
+                    "party_name": row["scope"],
+                }
+            )
+        return records
+
+    async def analyze_industry_patterns(
+        self, account_id: str, industry: str, limit: int = 25
+    ) -> List[dict]:
+        rows = self._portfolio_rows(
+            "SELECT name, count FROM portfolio_stats "
+            "WHERE account_id = ? AND kind = 'industry_clause_type' AND scope = ? "
+            "ORDER BY count DESC, name LIMIT ?",
+            (account_id, normalize_text(industry), limit),
+        )
+        return [{"clause_type": row["name"], "frequency": row["count"]} for row in rows]
+
+    async def get_portfolio_stats(
+        self, account_id: str, kind: str, limit: int = 25
+    ) -> List[dict]:
+        rows = self._portfolio_rows(
+            "SELECT name, count FROM portfolio_stats "
+            "WHERE account_id = ? AND kind = ? AND scope = '' "
+            "ORDER BY count DESC, name LIMIT ?",
+            (account_id, kind, limit),
+        )
+        return [{"name": row["name"], "count": row["count"]} for row in rows]
+
+    def _obligation_records(
+        self, account_id: str, include, after: Optional[list], limit: int
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        records = [
+            {"o": obligation, "agreement_name": indexes.agreements[envelope_id]["name"]}
+            for envelope_id in indexes.by_account.get(account_id, [])
+            for obligation in indexes.obligations.get(envelope_id, [])
+            if include(obligation)
+        ]
+        # Obligations without a due date first, as in the Cypher queries
+        return self._page(
+            records,
+            lambda record: (record["o"]["due_on"] or "", record["o"]["key"]),
+            after,
+            limit,
+        )
+
+    async def get_pending_obligations(
+        self,
+        account_id: str,
+        days_ahead: int,
+        today: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        records = []
+        for envelope_id, obligation in indexes.date_window(
+            indexes.by_due_date.get(account_id, ([], [])), today, days_ahead, after
+        ):
+            if obligation["status"] != "PENDING":
+                continue
+            records.append(
+                {
+                    "o": obligation,
+                    "agreement_name": indexes.agreements[envelope_id]["name"],
+                }
+            )
+            if len(records) == limit:
+                break
+        return records
+
+    async def get_expiring_agreements(
+        self,
+        account_id: str,
+        days_ahead: int,
+        today: str,
+        after: Optional[list] = None,
+        limit: int = 25,
+    ) -> List[dict]:
+        indexes = self._get_indexes()
+        records = []
+        for envelope_id in indexes.date_window(
+            indexes.by_expiry.get(account_id, ([], [])), today, days_ahead, after
+        ):
+            record = self._summary_record(indexes, envelope_id)
+            record["expires_on"] = indexes.agreements[envelope_id]["expires_on"]
+            records.append(record)
+            if len(records) == limit:
+                break
+        return records
+
+    async def get_recurring_obligations(
+        self, account_id: str, after: Optional[list] = None, limit: int = 25
+    ) -> List[dict]:
+        return self._obligation_records(
+            account_id,
+            lambda obligation: obligation["recurring"] is True,
+            after,
+            limit,
+        )
+
+    # Data generations
+
+    async def get_generation(self, account_id: str) -> int:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT generation FROM accounts WHERE account_id = ?", (account_id,)
+            ).fetchone()
+        return row["generation"] if row else 0
+
+    async def bump_generation(self, account_id: str) -> int:
+        with self._lock, self._db:
+            return self._db.execute(
+                "INSERT INTO accounts VALUES (?, 1) ON CONFLICT (account_id) "
+                "DO UPDATE SET generation = generation + 1 RETURNING generation",
+                (account_id,),
+            ).fetchone()["generation"]
+
+    # Writes
+
+    def _write_agreements(self, agreements: List[dict]):
+        with self._lock, self._db:
+            changes: Dict[str, Counter] = {}
+            for agreement in agreements:
+                envelope_id = agreement["envelope_id"]
+                governing_law = agreement.get("governing_law") or {}
+
+                previous = self._db.execute(
+                    "SELECT summary FROM agreements WHERE envelope_id = ?",
+                    (envelope_id,),
+                ).fetchone()
+                changes.setdefault(agreement["account_id"], Counter()).update(
+                    portfolio_change(
+                        load_summary(previous["summary"] if previous else None),
+                        load_summary(agreement.get("summary")),
+                    )
+                )
+
+                # Replace everything the agreement previously held
+                for table in ("parties", "risks", "obligations"):
+                    self._db.execute(
+                        f"DELETE FROM {table} WHERE envelope_id = ?", (envelope_id,)
+                    )
+                self._db.execute(
+                    "DELETE FROM clause_excerpts WHERE clause_key IN "
+                    "(SELECT key FROM clauses WHERE envelope_id = ?)",
+                    (envelope_id,),
+                )
+                self._db.execute(
+                    "DELETE FROM clauses WHERE envelope_id = ?", (envelope_id,)
+                )
+
+                self._db.execute(
+                    "INSERT OR REPLACE INTO agreements VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        envelope_id,
+                        agreement["account_id"],
+                        agreement.get("agreement_name"),
+                        agreement.get("agreement_type"),
+                        agreement.get("effective_date"),
+                        agreement.get("expiration_date"),
+                        agreement.get("renewal_term"),
+                        governing_law.get("most_favored_country"),
+                        governing_law.get("country"),
+                        governing_law.get("state"),
+                        agreement.get("industry"),
+                        agreement.get("effective_on"),
+                        agreement.get("expires_on"),
+                        agreement.get("summary"),
+                    ),
+                )
+                self._db.executemany(
+                    "INSERT INTO parties VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            envelope_id,
+                            party.get("name"),
+                            party.get("role"),
+                            party.get("incorporation_country"),
+                            party.get("incorporation_state"),
+                        )
+                        for party in agreement.get("parties") or []
+                    ],
+                )
+                for clause in agreement.get("clauses") or []:
+                    if clause.get("exists") is not True:
+                        continue
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO clauses VALUES (?, ?, ?)",
+                        (clause["key"], envelope_id, clause.get("clause_type")),
+                    )
+                    for excerpt in clause.get("excerpt_nodes") or []:
+                        self._db.execute(
+                            "INSERT OR IGNORE INTO excerpts VALUES (?, ?)",
+                            (excerpt["key"], excerpt["text"]),
+                        )
+                        self._db.execute(
+                            "INSERT OR IGNORE INTO clause_excerpts VALUES (?, ?)",
+                            (clause["key"], excerpt["key"]),
+                        )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO risks VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            risk["key"],
+                            envelope_id,
+                            risk.get("risk_type"),
+                            risk.get("description"),
+                            risk.get("level"),
+                            risk.get("impact"),
+                        )
+                        for risk in agreement.get("risks") or []
+                    ],
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO obligations "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            obligation["key"],
+                            envelope_id,
+                            obligation.get("description"),
+                            obligation.get("due_date"),
+                            obligation.get("recurring"),
+                            obligation.get("recurrence_pattern"),
+                            obligation.get("status"),
+                            obligation.get("reminder_days"),
+                            obligation.get("due_on"),
+                        )
+                        for obligation in agreement.get("obligations") or []
+                    ],
+                )
+
+            for account_id, counts in changes.items():
+                self._update_portfolio(portfolio_deltas(account_id, counts))
+
+            # Excerpts no clause refers to anymore
+            self._db.execute(
+                "DELETE FROM excerpts WHERE key NOT IN "
+                "(SELECT excerpt_key FROM clause_excerpts)"
+            )
+            self._db.execute(
+                "DELETE FROM excerpt_embeddings WHERE key NOT IN "
+                "(SELECT key FROM excerpts)"
+            )
+            # Our own commits do not change data_version
+            self._indexes = None
+
+    async def write_agreements(self, agreements: List[dict]):
+        await asyncio.to_thread(self._write_agreements, agreements)
+
+    def _generate_embeddings(self) -> int:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, text FROM excerpts WHERE key NOT IN "
+                "(SELECT key FROM excerpt_embeddings) ORDER BY key"
+            ).fetchall()
+        if not rows:
+            return 0
+
+        embeddings = self.embedder.embed_many([row["text"] for row in rows])
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO excerpt_embeddings VALUES (?, ?)",
+                [
+                    (row["key"], np.asarray(embedding, dtype=np.float32).tobytes())
+                    for row, embedding in zip(rows, embeddings)
+                ],
+            )
+            self._indexes = None
+        return len(rows)
+
+    async def generate_embeddings(
+        self, webhook_service: Optional[WebhookService] = None
+    ):
+        embedded = await asyncio.to_thread(self._generate_embeddings)
+        logger.info(f"Embedded {embedded} excerpts")
+
+    async def close(self):
+        self._db.close()
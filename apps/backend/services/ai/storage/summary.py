@@ -0,0 +1,107 @@
+import json
+from collections import Counter
+from typing import Optional
+
+from schemas.agreement import AgreementSummary
+from utils import content_hash
+
+
+def agreement_summary(agreement: dict) -> str:
+    """JSON summary of an extracted agreement, stored on it at ingestion"""
+    summary: AgreementSummary = {
+        "envelope_id": agreement.get("envelope_id"),
+        "name": agreement.get("agreement_name"),
+        "agreement_type": agreement.get("agreement_type"),
+        "effective_date": agreement.get("effective_date"),
+        "expiration_date": agreement.get("expiration_date"),
+        "renewal_term": agreement.get("renewal_term"),
+        "industry": agreement.get("industry"),
+        "parties": [
+            {
+                "name": party.get("name"),
+                "role": party.get("role"),
+                "incorporation_country": party.get("incorporation_country"),
+                "incorporation_state": party.get("incorporation_state"),
+            }
+            for party in agreement.get("parties") or []
+        ],
+        "clause_types": sorted(
+            {
+                clause.get("clause_type")
+                for clause in agreement.get("clauses") or []
+                if clause.get("exists") is True and clause.get("clause_type")
+            }
+        ),
+        "risk_counts": dict(
+            Counter(
+                risk.get("level")
+                for risk in agreement.get("risks") or []
+                if risk.get("level")
+            )
+        ),
+    }
+    return json.dumps(summary, separators=(",", ":"))
+
+
+def load_summary(summary: Optional[str]) -> Optional[AgreementSummary]:
+    """Summary stored on an agreement, None for agreements stored without one"""
+    return json.loads(summary) if summary else None
+
+
+def portfolio_counts(summary: Optional[AgreementSummary]) -> Counter:
+    """
+    What an agreement adds to the portfolio statistics of its account, as
+    (kind, scope, name) -> count. Clause type frequencies are also kept per
+    industry and per party, scoped by the industry or party name.
+    """
+    counts = Counter()
+    if summary is None:
+        return counts
+
+    clause_types = summary["clause_types"]
+    party_names = {party["name"] for party in summary["parties"] if party["name"]}
+    counts["agreements", "", ""] += 1
+    if summary["agreement_type"]:
+        counts["agreement_type", "", summary["agreement_type"]] += 1
+    for clause_type in clause_types:
+        counts["clause_type", "", clause_type] += 1
+    for level, count in summary["risk_counts"].items():
+        counts["risk_level", "", level] += count
+    for name in party_names:
+        counts["party", "", name] += 1
+        for clause_type in clause_types:
+            counts["party_clause_type", name, clause_type] += 1
+    if summary.get("industry"):
+        counts["industry", "", summary["industry"]] += 1
+        for clause_type in clause_types:
+            counts["industry_clause_type", summary["industry"], clause_type] += 1
+    return counts
+
+
+def portfolio_change(
+    previous: Optional[AgreementSummary], current: Optional[AgreementSummary]
+) -> Counter:
+    """Change to the portfolio statistics when an agreement's summary is replaced"""
+    counts = portfolio_counts(current)
+    counts.subtract(portfolio_counts(previous))
+    return counts
+
+
+def portfolio_deltas(account_id: str, counts: Counter) -> list:
+    """
+    Statistic updates of an account, sorted by key so concurrent writers lock
+    them in the same order
+    """
+    deltas = [
+        {
+            "key": content_hash(account_id, kind, scope, name),
+            "account_id": account_id,
+            "kind": kind,
+            "scope": scope,
+            "name": name,
+            "count": count,
+        }
+        for (kind, scope, name), count in counts.items()
+        if count
+    ]
+    return sorted(deltas, key=lambda delta: delta["key"])
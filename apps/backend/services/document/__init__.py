@@ -1,4 +1,11 @@
 from .downloader import DocumentDownloader
 from .stream import DocumentService
+from .similarity import NearDuplicateIndex
+from .preprocess import PDFPreprocessor
 
-__all__ = ["DocumentDownloader", "DocumentService"]
+__all__ = [
+    "DocumentDownloader",
+    "DocumentService",
+    "NearDuplicateIndex",
+    "PDFPreprocessor",
+]
@@ -1,9 +1,16 @@
 from typing import Optional
+from core.settings import get_settings
 from ..notification import WebhookService
-from ..tracking import ProgressTracker, BatchProgressTracker
+from ..tracking import ProgressTracker, BatchProgressTracker, WorkManifest
 from ..docusign import EnvelopeService
+from .preprocess import PDFPreprocessor
 import os
 import asyncio
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 
 class DocumentDownloader:
@@ -28,11 +35,15 @@ class DocumentDownloader:
         backend_dir = os.path.dirname(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         )
+        self.data_path = os.path.join(backend_dir, "data")
         self.download_path = os.path.join(
-            backend_dir, "data", "docusign_downloads", self.account_id
+            self.data_path, "docusign_downloads", self.account_id
         )
         os.makedirs(self.download_path, exist_ok=True)
 
+        # Later stages plan their work from the manifest
+        self.manifest = WorkManifest(self.data_path, self.account_id)
+
     async def download_envelope_documents(self, envelope_id: str):
         """Download all documents for an envelope"""
         try:
@@ -73,6 +84,7 @@ class DocumentDownloader:
                 else:
                     os.rename(temp_file_path, final_path)
                     downloaded_files.append(filename)
+                self.manifest.record_download(envelope_id, filename)
 
                 # Update progress
                 await self.progress_tracker.update_document_progress(
@@ -94,6 +106,7 @@ class DocumentDownloader:
                 self.completed_envelopes += 1
 
                 if self.completed_envelopes >= self.total_envelopes:
+                    await self.preprocess()
                     self._download_complete.set()
 
             return envelope_dir, {
@@ -105,6 +118,24 @@ class DocumentDownloader:
             await self.progress_tracker.mark_envelope_failed(envelope_id, str(e))
             raise
 
+    async def preprocess(self):
+        """
+        Build the sidecar index of the downloaded PDFs, so extraction finds
+        their hashes, page counts and text layers ready
+        """
+        try:
+            index = await PDFPreprocessor(
+                self.data_path,
+                self.account_id,
+                get_settings().preprocess_max_workers,
+            ).run()
+            for key, facts in index.entries.items():
+                envelope_id, document = key.split("/", 1)
+                self.manifest.record_hash(envelope_id, document, facts["sha256"])
+        except Exception as e:
+            # Extraction preprocesses whatever is missing from the index
+            logger.error(f"Error preprocessing downloads: {e}")
+
     async def wait_for_downloads(self):
         """Wait for all downloads to complete"""
         await self._download_complete.wait()
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from PyPDF2 import PdfReader
+
+logger = logging.getLogger(__name__)
+
+
+def extract_pdf_facts(pdf_path: str) -> dict:
+    """
+    Compute the CPU-bound facts about a PDF in a single pass.
+
+    Runs inside a worker process, so it must stay a module-level function.
+    """
+    with open(pdf_path, "rb") as pdf_file:
+        data = pdf_file.read()
+
+    facts = {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "size": len(data),
+        "page_count": 0,
+        "text": "",
+        "error": None,
+    }
+
+    try:
+        reader = PdfReader(BytesIO(data))
+        facts["page_count"] = len(reader.pages)
+        facts["text"] = "\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception as e:
+        facts["error"] = str(e)
+
+    return facts
+
+
+class PDFPreprocessor:
+    """
+    Preprocessing stage run after download.
+
+    Extracts content hash, size, page count and text layer once per PDF in a
+    process pool and keeps them in a per-account sidecar index next to
+    data/docusign_downloads, so later stages never reopen the PDF.
+    """
+
+    def __init__(
+        self,
+        base_dir: str | Path,
+        account_id: str,
+        max_workers: Optional[int] = None,
+    ):
+        base_path = Path(base_dir)
+        self.account_id = account_id
+        self.max_workers = max_workers
+        self.downloads_path = base_path / "docusign_downloads" / account_id
+        self.index_dir = base_path / "docusign_index"
+        self.index_file = self.index_dir / f"{account_id}.json"
+        self.text_dir = self.index_dir / account_id
+        self.entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.index_file.exists():
+            return {}
+        try:
+            with open(self.index_file, "r") as file:
+                return json.load(file)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Ignoring corrupt PDF index {self.index_file}: {e}")
+            return {}
+
+    def save(self):
+        """Persist the sidecar index"""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as file:
+            json.dump(self.entries, file, indent=2)
+        tmp_file.replace(self.index_file)
+
+    def _key(self, pdf_path: str | Path) -> str:
+        return Path(pdf_path).relative_to(self.downloads_path).as_posix()
+
+    def _is_fresh(self, pdf_path: Path) -> bool:
+        entry = self.entries.get(self._key(pdf_path))
+        if not entry:
+            return False
+        stat = pdf_path.stat()
+        return (
+            entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and Path(entry["text_file"]).exists()
+        )
+
+    async def run(
+        self, pdf_paths: Optional[Iterable[Path]] = None
+    ) -> "PDFPreprocessor":
+        """Preprocess the given PDFs, or every PDF of the account, if new or changed"""
+        if not self.downloads_path.exists():
+            logger.error(f"Account directory not found: {self.downloads_path}")
+            return self
+
+        if pdf_paths is None:
+            pdf_paths = sorted(self.downloads_path.glob("*/*.pdf"))
+        pending = [
+            pdf_path
+            for pdf_path in pdf_paths
+            if pdf_path.exists() and not self._is_fresh(pdf_path)
+        ]
+        if not pending:
+            return self
+
+        logger.info(f"Preprocessing {len(pending)} PDFs for account {self.account_id}")
+        self.text_dir.mkdir(parents=True, exist_ok=True)
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(pool, extract_pdf_facts, str(pdf_path))
+                    for pdf_path in pending
+                ),
+                return_exceptions=True,
+            )
+
+        for pdf_path, facts in zip(pending, results):
+            if isinstance(facts, Exception):
+                logger.error(f"Error preprocessing {pdf_path}: {facts}")
+                continue
+
+            text_file = self.text_dir / f"{facts['sha256']}.txt"
+            with open(text_file, "w") as file:
+                file.write(facts.pop("text"))
+
+            self.entries[self._key(pdf_path)] = {
+                **facts,
+                "mtime_ns": pdf_path.stat().st_mtime_ns,
+                "text_file": str(text_file),
+            }
+
+        self.save()
+        return self
+
+    def get(self, pdf_path: str | Path) -> Optional[dict]:
+        """Get the preprocessed facts of a PDF"""
+        return self.entries.get(self._key(pdf_path))
+
+    def read_text(self, pdf_path: str | Path) -> str:
+        """Get the text layer of a PDF from the index"""
+        facts = self.get(pdf_path)
+        if not facts or not os.path.exists(facts["text_file"]):
+            return ""
+        with open(facts["text_file"], "r") as file:
+            return file.read()
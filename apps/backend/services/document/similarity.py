@@ -0,0 +1,184 @@
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+# Mersenne prime used as the modulus of the MinHash permutations
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class NearDuplicateIndex:
+    """
+    Local MinHash/LSH index over word shingles of PDF text layers.
+
+    One index is kept per account and persisted as JSON so template-heavy
+    accounts can reuse prior extractions for near-identical documents.
+    """
+
+    def __init__(
+        self,
+        index_path: str | Path,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 5,
+        threshold: float = 0.9,
+    ):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.index_path = Path(index_path)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+
+        # Deterministic permutation parameters so signatures stay comparable
+        # across processes and restarts
+        self._permutations = [
+            (
+                int.from_bytes(self._digest(f"a{i}".encode()), "big")
+                % (_MERSENNE_PRIME - 1)
+                + 1,
+                int.from_bytes(self._digest(f"b{i}".encode()), "big") % _MERSENNE_PRIME,
+            )
+            for i in range(num_perm)
+        ]
+
+        self.entries: Dict[str, dict] = {}
+        self._buckets: Dict[Tuple[int, str], Set[str]] = {}
+        self._load()
+
+    @staticmethod
+    def _digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=8).digest()
+
+    @staticmethod
+    def normalize_text(text: str) -> List[str]:
+        """Lowercase and tokenize text, dropping punctuation and extra whitespace"""
+        return re.findall(r"\w+", text.lower())
+
+    def shingles(self, text: str) -> Set[int]:
+        """Hash word n-gram shingles of the text into 32-bit integers"""
+        tokens = self.normalize_text(text)
+        if len(tokens) < self.shingle_size:
+            tokens_iter = [" ".join(tokens)] if tokens else []
+        else:
+            tokens_iter = (
+                " ".join(tokens[i : i + self.shingle_size])
+                for i in range(len(tokens) - self.shingle_size + 1)
+            )
+        return {
+            int.from_bytes(self._digest(s.encode("utf-8")), "big") & _MAX_HASH
+            for s in tokens_iter
+        }
+
+    def signature(self, text: str) -> List[int]:
+        """Compute the MinHash signature of a text"""
+        shingles = self.shingles(text)
+        if not shingles:
+            return [_MAX_HASH] * self.num_perm
+
+        return [
+            min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+            for a, b in self._permutations
+        ]
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, str]]:
+        return [
+            (
+                band,
+                ",".join(
+                    str(v) for v in signature[band * self.rows : (band + 1) * self.rows]
+                ),
+            )
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        """Estimate Jaccard similarity from two MinHash signatures"""
+        if not sig_a or len(sig_a) != len(sig_b):
+            return 0.0
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+    def query(
+        self, text: str, signature: Optional[List[int]] = None
+    ) -> Optional[Tuple[str, dict, float]]:
+        """Return the most similar indexed document above the threshold, if any"""
+        signature = signature or self.signature(text)
+
+        candidates: Set[str] = set()
+        for key in self._band_keys(signature):
+            candidates |= self._buckets.get(key, set())
+
+        best = None
+        for doc_id in candidates:
+            entry = self.entries[doc_id]
+            score = self.similarity(signature, entry["signature"])
+            if score >= self.threshold and (best is None or score > best[2]):
+                best = (doc_id, entry, score)
+
+        return best
+
+    def add(
+        self,
+        doc_id: str,
+        text: str,
+        signature: Optional[List[int]] = None,
+        **metadata,
+    ):
+        """Add or replace a document in the index"""
+        self.remove(doc_id)
+        signature = signature or self.signature(text)
+        self.entries[doc_id] = {"signature": signature, **metadata}
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_id: str):
+        """Remove a document from the index if present"""
+        entry = self.entries.pop(doc_id, None)
+        if entry:
+            for key in self._band_keys(entry["signature"]):
+                self._buckets.get(key, set()).discard(doc_id)
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+
+        with open(self.index_path, "r") as file:
+            data = json.load(file)
+
+        params = data.get("params", {})
+        if (
+            params.get("num_perm") != self.num_perm
+            or params.get("bands") != self.bands
+            or params.get("shingle_size") != self.shingle_size
+        ):
+            # Signatures built with other parameters are not comparable
+            return
+
+        for doc_id, entry in data.get("entries", {}).items():
+            self.entries[doc_id] = entry
+            for key in self._band_keys(entry["signature"]):
+                self._buckets.setdefault(key, set()).add(doc_id)
+
+    def save(self):
+        """Persist the index to disk"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(
+                {
+                    "params": {
+                        "num_perm": self.num_perm,
+                        "bands": self.bands,
+                        "shingle_size": self.shingle_size,
+                    },
+                    "entries": self.entries,
+                },
+                file,
+            )
+        tmp_path.replace(self.index_path)
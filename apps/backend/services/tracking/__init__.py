@@ -1,4 +1,5 @@
 from .progress import ProgressTracker
 from .batch_progress import BatchProgressTracker
+from .manifest import WorkManifest, WorkStatus
 
-__all__ = ["ProgressTracker", "BatchProgressTracker"]
+__all__ = ["ProgressTracker", "BatchProgressTracker", "WorkManifest", "WorkStatus"]
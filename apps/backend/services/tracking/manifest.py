@@ -0,0 +1,184 @@
+# manifest.py
+import logging
+import sqlite3
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from schemas.webhook import ProcessingPhase
+
+logger = logging.getLogger(__name__)
+
+
+class WorkStatus(str, Enum):
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+class WorkManifest:
+    """
+    Per-account record of every envelope document and its status in each
+    processing phase.
+
+    Stages update the manifest as they finish a document and plan their work
+    from it, so finding work costs one indexed query instead of a walk of the
+    data directory. Kept in local SQLite under data/manifests/<account>.sqlite.
+    """
+
+    # Phase a document must have finished before it is ready for a phase
+    UPSTREAM = {
+        ProcessingPhase.PDF_TO_JSON: ProcessingPhase.DOWNLOAD,
+        ProcessingPhase.JSON_TO_GRAPH: ProcessingPhase.PDF_TO_JSON,
+    }
+
+    def __init__(self, base_dir: str | Path, account_id: str):
+        self.base_path = Path(base_dir)
+        self.account_id = account_id
+        self.downloads_path = self.base_path / "docusign_downloads" / account_id
+
+        manifest_dir = self.base_path / "manifests"
+        manifest_dir.mkdir(parents=True, exist_ok=True)
+        manifest_file = manifest_dir / f"{account_id}.sqlite"
+        is_new = not manifest_file.exists()
+
+        self._db = sqlite3.connect(manifest_file, check_same_thread=False, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "envelope_id TEXT NOT NULL, "
+            "document TEXT NOT NULL, "
+            "sha256 TEXT, "
+            "output_path TEXT, "
+            "download TEXT NOT NULL DEFAULT 'pending', "
+            "pdf_to_json TEXT NOT NULL DEFAULT 'pending', "
+            "json_to_graph TEXT NOT NULL DEFAULT 'pending', "
+            "error TEXT, "
+            "updated_at REAL, "
+            "PRIMARY KEY (envelope_id, document))"
+        )
+        for phase in self.UPSTREAM:
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS documents_{phase.value} "
+                f"ON documents ({phase.value})"
+            )
+        self._db.commit()
+
+        if is_new:
+            self._bootstrap()
+
+    def _bootstrap(self):
+        """Record documents downloaded and extracted before the manifest existed"""
+        output_path = self.base_path / "output" / self.account_id
+        count = 0
+        for pdf_path in sorted(self.downloads_path.glob("*/*.pdf")):
+            envelope_id = pdf_path.parent.name
+            self.record_download(envelope_id, pdf_path.name)
+            json_file = output_path / envelope_id / f"{pdf_path.name}.json"
+            if json_file.exists():
+                self.record_output(envelope_id, pdf_path.name, json_file)
+            count += 1
+        if count:
+            logger.info(f"Bootstrapped manifest of {self.account_id}: {count} PDFs")
+
+    def _upsert(self, envelope_id: str, document: str, **columns):
+        columns["updated_at"] = time.time()
+        names = ", ".join(columns)
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in columns)
+        self._db.execute(
+            f"INSERT INTO documents (envelope_id, document, {names}) "
+            f"VALUES (?, ?, {placeholders}) "
+            f"ON CONFLICT (envelope_id, document) DO UPDATE SET {updates}",
+            (envelope_id, document, *columns.values()),
+        )
+        self._db.commit()
+
+    def source_path(self, envelope_id: str, document: str) -> Path:
+        """Path of a downloaded document"""
+        return self.downloads_path / envelope_id / document
+
+    def record_download(self, envelope_id: str, document: str):
+        """Record a document present in the downloads directory"""
+        self._upsert(envelope_id, document, download=WorkStatus.DONE.value)
+
+    def record_hash(self, envelope_id: str, document: str, sha256: str):
+        """Record a document's content hash"""
+        self._upsert(envelope_id, document, sha256=sha256)
+
+    def record_output(self, envelope_id: str, document: str, output_path: str | Path):
+        """
+        Record a finished extraction, queuing the document for ingestion.
+
+        In pipeline mode the graph writer can ingest an agreement before its
+        file is written and recorded; it then stays ingested.
+        """
+        self._upsert(
+            envelope_id,
+            document,
+            output_path=str(output_path),
+            error=None,
+            **{ProcessingPhase.PDF_TO_JSON.value: WorkStatus.DONE.value},
+        )
+        self._db.execute(
+            f"UPDATE documents SET {ProcessingPhase.JSON_TO_GRAPH.value} = ? "
+            "WHERE envelope_id = ? AND document = ? "
+            f"AND {ProcessingPhase.JSON_TO_GRAPH.value} != ?",
+            (WorkStatus.PENDING.value, envelope_id, document, WorkStatus.DONE.value),
+        )
+        self._db.commit()
+
+    def mark(
+        self,
+        phase: ProcessingPhase,
+        envelope_id: str,
+        document: str,
+        status: WorkStatus,
+        error: Optional[str] = None,
+    ):
+        """Set a document's status in a phase"""
+        self._upsert(
+            envelope_id,
+            document,
+            error=error,
+            **{ProcessingPhase(phase).value: WorkStatus(status).value},
+        )
+
+    def pending(self, phase: ProcessingPhase) -> Dict[str, List[dict]]:
+        """Documents ready for a phase and not yet done, grouped by envelope"""
+        phase = ProcessingPhase(phase)
+        rows = self._db.execute(
+            "SELECT envelope_id, document, sha256, output_path FROM documents "
+            f"WHERE {self.UPSTREAM[phase].value} = ? AND {phase.value} IN (?, ?) "
+            "ORDER BY rowid",
+            (WorkStatus.DONE.value, WorkStatus.PENDING.value, WorkStatus.FAILED.value),
+        ).fetchall()
+
+        envelopes: Dict[str, List[dict]] = {}
+        for row in rows:
+            envelopes.setdefault(row["envelope_id"], []).append(dict(row))
+        return envelopes
+
+    def outputs(self) -> List[dict]:
+        """Documents with a finished extraction, in the order they were recorded"""
+        rows = self._db.execute(
+            "SELECT envelope_id, document, sha256, output_path FROM documents "
+            f"WHERE {ProcessingPhase.PDF_TO_JSON.value} = ? ORDER BY rowid",
+            (WorkStatus.DONE.value,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(
+        self, phase: ProcessingPhase, status: WorkStatus = WorkStatus.DONE
+    ) -> int:
+        """Number of documents with a status in a phase"""
+        row = self._db.execute(
+            f"SELECT COUNT(*) FROM documents WHERE {ProcessingPhase(phase).value} = ?",
+            (WorkStatus(status).value,),
+        ).fetchone()
+        return row[0]
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Settings are read on import. The tests never reach DocuSign, Neo4j or
+# OpenAI, but the required settings must be present.
+os.environ.setdefault("DS_CLIENT_ID", "test")
+os.environ.setdefault("DS_CLIENT_SECRET", "test")
+os.environ.setdefault("NEO4J_PASSWORD", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["EMBEDDING_CACHE_DIR"] = tempfile.mkdtemp(prefix="embedding_cache_")
@@ -0,0 +1,156 @@
+import copy
+import csv
+import json
+import re
+
+import pytest
+
+from services.ai.neo4j.bulk_import import BulkImportWriter
+from services.ai.neo4j.neo4j_indexer import Neo4jIndexer
+
+SHARED_EXCERPT = "Neither party may assign this agreement without consent."
+
+AGREEMENT = {
+    "agreement_name": "Supply Agreement",
+    "agreement_type": "Supply",
+    "effective_date": "2024-01-01",
+    "expiration_date": "2026-01-01",
+    "renewal_term": "1 year",
+    "governing_law": {
+        "country": "United States",
+        "state": "Delaware",
+        "most_favored_country": "",
+    },
+    "parties": [
+        {
+            "name": "Acme Corp",
+            "role": "Supplier",
+            "incorporation_country": "United States",
+            "incorporation_state": "Delaware",
+        },
+        {
+            "name": "Globex",
+            "role": "Buyer",
+            "incorporation_country": "Germany",
+            "incorporation_state": "",
+        },
+    ],
+    "clauses": [
+        {
+            "clause_type": "Anti-Assignment",
+            "exists": True,
+            "excerpts": [SHARED_EXCERPT, "Assignment by merger is\npermitted."],
+        },
+        {"clause_type": "Non-Compete", "exists": False, "excerpts": []},
+    ],
+    "risks": [
+        {
+            "risk_type": "Financial",
+            "description": "Uncapped liability",
+            "level": "HIGH",
+            "impact": "Large claims",
+        }
+    ],
+    "obligations": [
+        {
+            "description": "Quarterly report",
+            "due_date": "2025-03-31",
+            "recurring": True,
+            "recurrence_pattern": "quarterly",
+            "status": "PENDING",
+            "reminder_days": 7,
+        }
+    ],
+}
+
+
+def keyed_agreement(indexer: Neo4jIndexer, envelope_id: str) -> dict:
+    """The fixture agreement with the keys ingestion assigns"""
+    json_data = {"agreement": copy.deepcopy(AGREEMENT)}
+    indexer._tag_agreement("account-1", envelope_id, json_data)
+    return json_data["agreement"]
+
+
+def read_csv(path) -> list:
+    with open(path, newline="") as file:
+        return list(csv.reader(file))
+
+
+@pytest.fixture
+def exported(tmp_path):
+    # The driver of the indexer is never connected
+    indexer = Neo4jIndexer()
+    first = keyed_agreement(indexer, "envelope-1")
+    second = keyed_agreement(indexer, "envelope-2")
+    # Same organizations, countries, clause type and one excerpt as the first
+    second["clauses"][0]["excerpts"] = [SHARED_EXCERPT]
+    Neo4jIndexer._assign_keys(second)
+    invalid = keyed_agreement(indexer, "envelope-3")
+    invalid["governing_law"]["country"] = None
+
+    with BulkImportWriter(tmp_path) as writer:
+        writer.add_all([first, second, keyed_agreement(indexer, "envelope-1"), invalid])
+    return tmp_path, writer
+
+
+def test_writes_headers_in_import_format(exported):
+    output_dir, writer = exported
+    for name, header in {
+        **BulkImportWriter.NODE_FILES,
+        **BulkImportWriter.RELATIONSHIP_FILES,
+    }.items():
+        rows = read_csv(output_dir / f"{name}.csv")
+        assert rows[0] == header
+        # Every row ends with its label or relationship type
+        assert all(len(row) == len(header) and row[-1] == name for row in rows[1:])
+
+
+def test_relationships_reference_nodes_of_their_id_space(exported):
+    output_dir, _ = exported
+    ids = {}
+    for label, header in BulkImportWriter.NODE_FILES.items():
+        space = re.search(r":ID\((\w+)\)", header[0]).group(1)
+        ids[space] = {row[0] for row in read_csv(output_dir / f"{label}.csv")[1:]}
+        assert space == label
+
+    for rel_type, header in BulkImportWriter.RELATIONSHIP_FILES.items():
+        start_space = re.search(r":START_ID\((\w+)\)", header[0]).group(1)
+        end_space = re.search(r":END_ID\((\w+)\)", header[1]).group(1)
+        for row in read_csv(output_dir / f"{rel_type}.csv")[1:]:
+            assert row[0] in ids[start_space], (rel_type, row)
+            assert row[1] in ids[end_space], (rel_type, row)
+
+
+def test_deduplicates_shared_nodes_and_relationships(exported):
+    output_dir, writer = exported
+    rows = {
+        name: read_csv(output_dir / f"{name}.csv")[1:]
+        for name in [*BulkImportWriter.NODE_FILES, *BulkImportWriter.RELATIONSHIP_FILES]
+    }
+
+    # The repeated and the invalid agreement are skipped
+    assert writer.skipped_agreements == 2
+    assert [row[0] for row in rows["Agreement"]] == ["envelope-1", "envelope-2"]
+    assert len(rows["Account"]) == 1
+
+    # Shared nodes are written once across agreements
+    assert sorted(row[0] for row in rows["Organization"]) == ["Acme Corp", "Globex"]
+    assert sorted(row[0] for row in rows["Country"]) == ["Germany", "United States"]
+    assert [row[0] for row in rows["ClauseType"]] == ["Anti-Assignment"]
+    assert len(rows["Excerpt"]) == 2
+    assert len(rows["INCORPORATED_IN"]) == 2
+
+    # Relationships to shared nodes are kept once per agreement
+    assert len(rows["IS_PARTY_TO"]) == 4
+    assert len(rows["HAS_CLAUSE"]) == 2
+    assert len(rows["HAS_EXCERPT"]) == 3
+    assert len(rows["HAS_TYPE"]) == 2
+
+    # Clauses that do not exist are not written
+    assert {row[1] for row in rows["ContractClause"]} == {"Anti-Assignment"}
+
+    # Multi-line excerpts survive the round trip
+    assert "Assignment by merger is\npermitted." in {row[1] for row in rows["Excerpt"]}
+
+    with open(output_dir / "counts.json") as file:
+        assert json.load(file) == {name: len(rows[name]) for name in rows}
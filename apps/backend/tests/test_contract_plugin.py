@@ -0,0 +1,59 @@
+import asyncio
+from datetime import date
+
+from services.ai import ContractSearchService
+from services.ai.neo4j.neo4j_indexer import Neo4jIndexer
+from services.ai.orchestration import contract_plugin
+from services.ai.orchestration.contract_plugin import ContractPlugin
+from services.ai.storage import SQLiteContractStore
+
+# Cached tool results are shared by the process, so the account is unique
+ACCOUNT = "plugin-account"
+
+
+def test_date_windows_are_cached_per_day(tmp_path, monkeypatch):
+    json_data = {
+        "agreement": {
+            "agreement_name": "Supply Agreement",
+            "expiration_date": "2025-01-20",
+            "obligations": [
+                {
+                    "description": "Quarterly report",
+                    "due_date": "2025-01-20",
+                    "recurring": False,
+                    "status": "PENDING",
+                }
+            ],
+        }
+    }
+    Neo4jIndexer()._tag_agreement(ACCOUNT, "envelope-1", json_data)
+    store = SQLiteContractStore(tmp_path / "contracts.db")
+    asyncio.run(store.write_agreements([json_data["agreement"]]))
+    plugin = ContractPlugin(
+        ContractSearchService(
+            uri=None, user=None, pwd=None, account_id=ACCOUNT, store=store
+        )
+    )
+
+    class Today(date):
+        current = date(2025, 1, 19)
+
+        @classmethod
+        def today(cls):
+            return cls.current
+
+    monkeypatch.setattr(contract_plugin, "date", Today)
+
+    def window_sizes():
+        obligations = asyncio.run(plugin.get_upcoming_obligations(days_ahead=1))
+        expiring = asyncio.run(plugin.get_expiring_contracts(days_ahead=1))
+        return len(obligations["items"]), len(expiring["items"])
+
+    assert window_sizes() == (1, 1)
+    # Cached the same day
+    assert window_sizes() == (1, 1)
+
+    # Past the due and expiry dates without any ingestion in between
+    Today.current = date(2025, 1, 21)
+    assert window_sizes() == (0, 0)
+    asyncio.run(store.close())
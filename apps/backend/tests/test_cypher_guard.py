@@ -0,0 +1,88 @@
+import re
+
+import pytest
+
+from services.ai.storage.cypher_guard import CypherGuard, CypherRejectedError
+
+ACCOUNT_PREDICATE = "(:Account {account_id: $account_id})-[:HAS_AGREEMENT]->"
+
+
+@pytest.fixture
+def guard():
+    # scope and limit never reach the driver
+    return CypherGuard(None, "neo4j", max_estimated_rows=1000, row_limit=100, timeout=5)
+
+
+def test_scopes_owned_labels(guard):
+    # Unnamed nodes get a generated variable
+    scoped = guard.scope(
+        "MATCH (a:Agreement {name: 'Supply (2024)'})-[:HAS_CLAUSE]->"
+        "(:ContractClause WHERE true) RETURN a.name"
+    )
+    assert re.sub(r"scoped_\d+", "node", scoped) == (
+        "MATCH (a:Agreement {name: 'Supply (2024)'} WHERE EXISTS { "
+        f"{ACCOUNT_PREDICATE}(a) }})-[:HAS_CLAUSE]->(node:ContractClause "
+        f"WHERE EXISTS {{ {ACCOUNT_PREDICATE}(:Agreement)-[:HAS_CLAUSE]->"
+        "(node) } AND ( true)) RETURN a.name"
+    )
+
+
+@pytest.mark.parametrize(
+    "cypher",
+    [
+        # Shared organizations and excerpts lead to every account's agreements
+        "MATCH (o:Organization {name: 'Acme'})-[:IS_PARTY_TO]->(a) "
+        "RETURN a.agreement_name",
+        "MATCH (e:Excerpt)<-[:HAS_EXCERPT]-(c)<-[:HAS_CLAUSE]-(a) RETURN a.name",
+        "MATCH (e:Excerpt)<-[:HAS_EXCERPT]-(:ContractClause)<-[:HAS_CLAUSE]-(a) "
+        "RETURN a.name",
+        "MATCH (o:Organization {name: 'Acme'})-[:IS_PARTY_TO]->() RETURN count(*)",
+        "MATCH (c:Country)<-[:GOVERNED_BY_LAW]-(a {name: 'x'}) RETURN a",
+        # A variable scoped in a subquery or dropped by WITH is matched anew
+        "MATCH (o:Organization) WHERE EXISTS { (a:Agreement)<-[:IS_PARTY_TO]-(o) } "
+        "MATCH (o)-[:IS_PARTY_TO]->(a) RETURN a.name",
+        "MATCH (a:Agreement) WITH count(a) AS n "
+        "MATCH (a)<-[:IS_PARTY_TO]-(o:Organization) RETURN a.name",
+        "MATCH (a:Agreement) RETURN a.name UNION MATCH (a) RETURN a.name",
+        # Intermediate nodes of variable-length paths are not scoped
+        "MATCH p = (o:Organization)-[*2]-(x:Organization) RETURN nodes(p)",
+        "MATCH (o:Organization)-[:IS_PARTY_TO]->{1,3}(a:Agreement) RETURN a",
+        # Label expressions, quoted names and labels outside the schema
+        "MATCH (o:Organization)-[:IS_PARTY_TO]->(a:%) RETURN a",
+        "MATCH (o:Organization)-[:IS_PARTY_TO]->(`a`) RETURN `a`",
+        "MATCH (s:PortfolioStat) RETURN s",
+    ],
+)
+def test_rejects_patterns_reaching_other_accounts(guard, cypher):
+    with pytest.raises(CypherRejectedError):
+        guard.scope(cypher)
+
+
+@pytest.mark.parametrize(
+    "cypher",
+    [
+        "MATCH (o:Organization)-[:IS_PARTY_TO]->(a:Agreement) "
+        "WITH o, count(a) AS agreements "
+        "MATCH (o)-[:INCORPORATED_IN]->(c:Country) "
+        "RETURN o.name, agreements, c.name",
+        "MATCH (a:Agreement)-[:HAS_CLAUSE]->(cc:ContractClause) "
+        "WITH DISTINCT a AS agreement "
+        "MATCH (agreement)-[:GOVERNED_BY_LAW]->(c:Country) RETURN c.name",
+        "MATCH (a:Agreement) WHERE a.name STARTS WITH 'Supply' "
+        "MATCH (a)-[:HAS_CLAUSE]->(:ContractClause)-[:HAS_TYPE]->(t:ClauseType) "
+        "RETURN t.name, count(a) // excerpts (e)",
+        "MATCH (a:Agreement) WHERE NOT EXISTS { (a)-[:HAS_CLAUSE]->(:ContractClause) } "
+        "RETURN count(a)",
+        # Comments are dropped before the labels are read
+        "MATCH (o:Organization)-[:IS_PARTY_TO]->(a /* */ :Agreement) RETURN a",
+    ],
+)
+def test_allows_patterns_within_the_account(guard, cypher):
+    assert "$account_id" in guard.scope(cypher)
+
+
+def test_limits_returned_rows(guard):
+    assert guard.limit("MATCH (a:Agreement) RETURN a LIMIT 10;").endswith("LIMIT 10")
+    assert guard.limit("MATCH (a:Agreement) RETURN a LIMIT 1000") == (
+        "MATCH (a:Agreement) RETURN a\nLIMIT 100"
+    )
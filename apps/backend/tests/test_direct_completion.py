@@ -0,0 +1,36 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from services.ai.llm.pdf_to_json_converter import PDFProcessor
+from services.tracking import ProgressTracker
+
+
+def test_completions_leave_the_event_loop_free():
+    threads = []
+
+    def create(**params):
+        threads.append(threading.current_thread())
+        message = SimpleNamespace(content='{"agreement": {}}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    # The constructor registers an OpenAI assistant, so it is skipped
+    processor = PDFProcessor.__new__(PDFProcessor)
+    processor.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    processor.progress_tracker = ProgressTracker(None)
+    processor.batch_tracker = None
+    processor.system_instruction = "system"
+    processor.extraction_prompt = "extract"
+    processor.update_prompt = "update"
+
+    async def extract():
+        return (
+            await processor.process_text("envelope-1", "a.pdf", "text"),
+            await processor.update_extraction({"agreement": {}}, ["passage"]),
+        )
+
+    assert asyncio.run(extract()) == ('{"agreement": {}}', '{"agreement": {}}')
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
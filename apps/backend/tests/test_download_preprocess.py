@@ -0,0 +1,36 @@
+import asyncio
+import hashlib
+
+from PyPDF2 import PdfWriter
+
+from services.document import DocumentDownloader, PDFPreprocessor
+from services.tracking import WorkManifest
+
+ACCOUNT = "account-1"
+
+
+def test_indexes_pdfs_once_downloads_complete(tmp_path):
+    pdf_path = tmp_path / "docusign_downloads" / ACCOUNT / "envelope-1" / "a.pdf"
+    pdf_path.parent.mkdir(parents=True)
+    writer = PdfWriter()
+    writer.add_blank_page(width=612, height=792)
+    with open(pdf_path, "wb") as file:
+        writer.write(file)
+
+    # The constructor places downloads under the backend directory
+    downloader = DocumentDownloader.__new__(DocumentDownloader)
+    downloader.data_path = str(tmp_path)
+    downloader.account_id = ACCOUNT
+    downloader.manifest = WorkManifest(tmp_path, ACCOUNT)
+    downloader.manifest.record_download("envelope-1", "a.pdf")
+    asyncio.run(downloader.preprocess())
+
+    # Extraction finds the facts in the sidecar index and the manifest
+    sha256 = hashlib.sha256(pdf_path.read_bytes()).hexdigest()
+    facts = PDFPreprocessor(tmp_path, ACCOUNT).get(pdf_path)
+    assert (facts["sha256"], facts["page_count"]) == (sha256, 1)
+    row = downloader.manifest._db.execute(
+        "SELECT sha256 FROM documents WHERE envelope_id = ? AND document = ?",
+        ("envelope-1", "a.pdf"),
+    ).fetchone()
+    assert row["sha256"] == sha256
@@ -0,0 +1,143 @@
+import asyncio
+from types import SimpleNamespace
+
+from services.ai.embeddings import EmbeddingCache, ExcerptEmbeddingPipeline
+
+DIMENSIONS = 4
+
+
+class FakeEmbeddings:
+    """Embedding endpoint returning a vector derived from each text"""
+
+    def __init__(self, failing_texts=()):
+        self.calls = []
+        self.failing_texts = set(failing_texts)
+
+    @staticmethod
+    def vector(text):
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0, 0.0]
+
+    async def create(self, model, input, dimensions):
+        self.calls.append(list(input))
+        if self.failing_texts & set(input):
+            raise RuntimeError("embedding endpoint unavailable")
+        # Out of order, as the API does not promise the input order
+        data = [
+            SimpleNamespace(index=i, embedding=self.vector(text))
+            for i, text in enumerate(input)
+        ]
+        return SimpleNamespace(data=data[::-1])
+
+
+class FakeExcerptDriver:
+    """Answers the pipeline's queries from excerpts held in memory"""
+
+    def __init__(self, texts, embedded=()):
+        self.excerpts = {
+            f"key-{i:03d}": {
+                "text": text,
+                "embedding": [0.0] * DIMENSIONS if text in embedded else None,
+            }
+            for i, text in enumerate(texts)
+        }
+        self.writes = []
+
+    def _pending(self):
+        return sorted(
+            key
+            for key, excerpt in self.excerpts.items()
+            if excerpt["embedding"] is None
+        )
+
+    async def execute_query(self, query, database_=None, **params):
+        if query == ExcerptEmbeddingPipeline.COUNT_PENDING_QUERY:
+            return [{"pending": len(self._pending())}], None, None
+        if query == ExcerptEmbeddingPipeline.FETCH_PAGE_QUERY:
+            keys = [key for key in self._pending() if key > params["after"]]
+            page = keys[: params["page_size"]]
+            return (
+                [{"key": k, "text": self.excerpts[k]["text"]} for k in page],
+                None,
+                None,
+            )
+        if query == ExcerptEmbeddingPipeline.WRITE_EMBEDDINGS_STATEMENT:
+            self.writes.append([row["key"] for row in params["rows"]])
+            for row in params["rows"]:
+                self.excerpts[row["key"]]["embedding"] = row["embedding"]
+            return [], None, None
+        raise AssertionError(f"Unexpected query: {query}")
+
+
+def make_pipeline(driver, embeddings, tmp_path, batch_size=4, page_size=8):
+    pipeline = ExcerptEmbeddingPipeline(driver)
+    pipeline.client = SimpleNamespace(embeddings=embeddings)
+    pipeline.cache = EmbeddingCache(tmp_path, "fake-model", DIMENSIONS)
+    pipeline.dimensions = DIMENSIONS
+    pipeline.batch_size = batch_size
+    pipeline.page_size = page_size
+    pipeline.concurrency = 2
+    return pipeline
+
+
+def test_embeds_pending_excerpts_in_batches(tmp_path):
+    texts = [f"excerpt {i}" for i in range(10)]
+    driver = FakeExcerptDriver(texts)
+    embeddings = FakeEmbeddings()
+
+    embedded = asyncio.run(make_pipeline(driver, embeddings, tmp_path).run())
+
+    assert embedded == 10
+    # Pages of 8 split into batches of 4, one API call and one write each
+    assert [len(call) for call in embeddings.calls] == [4, 4, 2]
+    assert [len(write) for write in driver.writes] == [4, 4, 2]
+    for excerpt in driver.excerpts.values():
+        assert excerpt["embedding"] == FakeEmbeddings.vector(excerpt["text"])
+
+
+def test_resumes_after_partial_run(tmp_path):
+    texts = [f"excerpt {i}" for i in range(10)]
+    driver = FakeExcerptDriver(texts)
+
+    # The batch holding excerpt 5 fails, the others are written
+    embedded = asyncio.run(
+        make_pipeline(driver, FakeEmbeddings({"excerpt 5"}), tmp_path).run()
+    )
+    assert embedded == 6
+    assert [driver.excerpts[k]["text"] for k in driver._pending()] == texts[4:8]
+
+    # A rerun only picks up the excerpts left without embedding
+    embeddings = FakeEmbeddings()
+    embedded = asyncio.run(make_pipeline(driver, embeddings, tmp_path).run())
+    assert embedded == 4
+    assert embeddings.calls == [texts[4:8]]
+    assert driver._pending() == []
+
+
+def test_skips_embedded_and_cached_excerpts(tmp_path):
+    texts = [f"excerpt {i}" for i in range(6)]
+    driver = FakeExcerptDriver(texts, embedded=texts[:2])
+    pipeline = make_pipeline(driver, FakeEmbeddings(), tmp_path)
+    pipeline.cache.put_many(texts[2:4], [FakeEmbeddings.vector(t) for t in texts[2:4]])
+
+    embeddings = FakeEmbeddings()
+    pipeline.client = SimpleNamespace(embeddings=embeddings)
+    embedded = asyncio.run(pipeline.run())
+
+    # Embedded excerpts are not fetched and cached texts cost no API call
+    assert embedded == 4
+    assert embeddings.calls == [texts[4:6]]
+    assert sorted(key for write in driver.writes for key in write) == [
+        f"key-{i:03d}" for i in range(2, 6)
+    ]
+    assert driver.excerpts["key-000"]["embedding"] == [0.0] * DIMENSIONS
+
+
+def test_rewrites_rows_left_unready(tmp_path):
+    cache = EmbeddingCache(tmp_path, "fake-model", DIMENSIONS)
+    # A process stopped after allocating the row, before writing its vector
+    cache._db.execute("INSERT INTO entries (key) VALUES (?)", (cache.key("text"),))
+    cache._db.commit()
+    assert cache.get("text") is None
+
+    cache.put("text", FakeEmbeddings.vector("text"))
+    assert cache.get("text") == FakeEmbeddings.vector("text")
@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services.ai.llm.pdf_to_json_converter import PDFProcessor
+from services.ai.neo4j.neo4j_indexer import Neo4jIndexer
+
+ACCOUNT = "account-1"
+
+
+class FakeIndexer:
+    def __init__(self):
+        self.runs = []
+
+    async def index_documents(self, base_dir, account_id):
+        self.runs.append(account_id)
+
+
+def make_processor(ingest_handoff, waiting):
+    """Processor whose extraction creates files and leaves waiting pending"""
+    # The constructor registers an OpenAI assistant, so it is skipped
+    processor = PDFProcessor.__new__(PDFProcessor)
+    processor.settings = SimpleNamespace(ingest_handoff=ingest_handoff)
+    processor.manifest = SimpleNamespace(pending=lambda phase: waiting)
+    processor.neo4j_indexer = FakeIndexer()
+
+    async def process_directory(base_dir, account_id):
+        return True
+
+    processor.process_directory = process_directory
+    return processor
+
+
+@pytest.mark.parametrize(
+    "ingest_handoff, waiting, indexed",
+    [
+        # The stream already wrote every extraction
+        (True, {}, []),
+        # Agreements the stream failed to write are indexed again
+        (True, {"envelope-1": [{"document": "contract.pdf"}]}, [ACCOUNT]),
+        (False, {}, [ACCOUNT]),
+    ],
+)
+def test_indexes_what_the_stream_left(ingest_handoff, waiting, indexed):
+    processor = make_processor(ingest_handoff, waiting)
+    asyncio.run(processor.run(ACCOUNT))
+    assert processor.neo4j_indexer.runs == indexed
+
+
+def test_stream_embeds_once_it_ends(tmp_path):
+    indexer = Neo4jIndexer()
+    calls = []
+
+    async def ensure_schema():
+        pass
+
+    async def write_items(items):
+        calls.append(("write", [envelope_id for envelope_id, _, _ in items]))
+
+    async def generate_embeddings():
+        calls.append(("embed", None))
+
+    indexer._ensure_schema = ensure_schema
+    indexer._write_items = write_items
+    indexer.generate_embeddings = generate_embeddings
+
+    queue = asyncio.Queue()
+    for envelope_id in ["envelope-1", "envelope-2"]:
+        queue.put_nowait(
+            (envelope_id, tmp_path / f"{envelope_id}.json", {"agreement": {}})
+        )
+    queue.put_nowait(None)
+    asyncio.run(indexer.index_stream(tmp_path, ACCOUNT, queue, 2))
+
+    assert calls == [("write", ["envelope-1", "envelope-2"]), ("embed", None)]
@@ -0,0 +1,80 @@
+import asyncio
+
+from core.settings import get_settings
+from services.ai.storage import Neo4jContractStore, record_generation
+
+
+class FakeEmbedder:
+    def embed_query(self, text):
+        return [1.0, 0.0]
+
+
+def make_store(hits_per_candidates):
+    """Store whose vector search finds the account's excerpts as given"""
+    # The driver never connects, queries are answered below
+    store = Neo4jContractStore(
+        "neo4j://localhost", "neo4j", "test", embedder=FakeEmbedder()
+    )
+    store.queries = []
+
+    async def query(cypher, **params):
+        if cypher == store.GET_GENERATION_QUERY:
+            return [{"generation": 0}]
+        if cypher == store.VECTOR_SEARCH_EXCERPTS_QUERY:
+            store.queries.append(("vector", params["candidates"]))
+            hits = hits_per_candidates(params["candidates"])
+        else:
+            store.queries.append(("exact", None))
+            hits = params["top_k"]
+        return [{"excerpt": f"excerpt {i}"} for i in range(hits)]
+
+    store._query = query
+    return store
+
+
+def test_remembers_candidates_of_the_account():
+    settings = get_settings()
+    first = 3 * settings.vector_search_oversample
+    store = make_store(lambda candidates: 3 if candidates >= 4 * first else 1)
+
+    asyncio.run(store.search_similar_excerpts("account-1", "text"))
+    assert store.queries == [
+        ("vector", first),
+        ("vector", 2 * first),
+        ("vector", 4 * first),
+    ]
+
+    # The next search starts where the last one succeeded
+    store.queries.clear()
+    asyncio.run(store.search_similar_excerpts("account-1", "text"))
+    assert store.queries == [("vector", 4 * first)]
+
+
+def test_searches_rare_accounts_exactly():
+    store = make_store(lambda candidates: 0)
+
+    asyncio.run(store.search_similar_excerpts("account-1", "text"))
+    assert store.queries[-1] == ("exact", None)
+    assert len(store.queries) > 2
+
+    # Later searches of the account skip the index
+    store.queries.clear()
+    asyncio.run(store.search_similar_excerpts("account-1", "text"))
+    assert store.queries == [("exact", None)]
+
+    # Other accounts still oversample the index
+    store.queries.clear()
+    asyncio.run(store.search_similar_excerpts("account-2", "text"))
+    assert store.queries[0][0] == "vector"
+
+
+def test_oversamples_again_after_ingestion():
+    store = make_store(lambda candidates: 0)
+    asyncio.run(store.search_similar_excerpts("account-3", "text"))
+    assert store.queries[-1] == ("exact", None)
+
+    # The indexer advances the generation of the accounts it wrote
+    record_generation("account-3", 1)
+    store.queries.clear()
+    asyncio.run(store.search_similar_excerpts("account-3", "text"))
+    assert store.queries[0][0] == "vector"
@@ -0,0 +1,70 @@
+import asyncio
+
+import main
+from core.settings import get_settings
+from services.ai.neo4j.schema import SchemaManager
+
+
+class FakeDriver:
+    """Driver of a graph at schema version 2 holding the given date strings"""
+
+    def __init__(self, dates):
+        self.dates = dates
+        self.written = {}
+
+    async def execute_query(self, query, parameters=None, database_=None, **params):
+        if query == SchemaManager.GET_VERSION_QUERY:
+            return [{"version": 2}], None, None
+        if query == SchemaManager.GET_VECTOR_DIMENSIONS_QUERY:
+            return [{"dimensions": get_settings().embedding_dimensions}], None, None
+        if "RETURN elementId(n)" in query:
+            source = query.split(" AS text")[0].rsplit(".", 1)[1]
+            records = [
+                {"id": node_id, "text": text}
+                for node_id, text in self.dates.get(source, {}).items()
+            ]
+            return records, None, None
+        if query.startswith("UNWIND $rows"):
+            target = query.rsplit("SET n.", 1)[1].split(" ")[0]
+            for row in params["rows"]:
+                self.written[(row["id"], target)] = row["date"]
+        return [], None, None
+
+
+def test_invalid_dates_do_not_abort_the_migration():
+    driver = FakeDriver(
+        {
+            "effective_date": {"a1": "2024-01-15", "a2": "2024-13-45"},
+            "expiration_date": {"a1": "January 15, 2026"},
+            "due_date": {"o1": "not a date"},
+        }
+    )
+
+    assert asyncio.run(SchemaManager(driver).migrate()) == SchemaManager.LATEST_VERSION
+    # Dates are read as ingestion reads them; unreadable ones stay unset
+    assert driver.written == {
+        ("a1", "effective_on"): "2024-01-15",
+        ("a1", "expires_on"): "2026-01-15",
+    }
+
+
+def test_startup_migrates_only_the_graph_backend(monkeypatch):
+    runs = []
+
+    async def migrate_schema():
+        runs.append(get_settings().storage_backend)
+
+    async def close_contract_stores():
+        pass
+
+    monkeypatch.setattr(main, "migrate_schema", migrate_schema)
+    monkeypatch.setattr(main, "close_contract_stores", close_contract_stores)
+
+    async def start_and_stop():
+        async with main.lifespan(main.app):
+            pass
+
+    for backend in ["sqlite", "neo4j"]:
+        monkeypatch.setattr(get_settings(), "storage_backend", backend)
+        asyncio.run(start_and_stop())
+    assert runs == ["neo4j"]
@@ -0,0 +1,296 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from core.settings import get_settings
+from schemas import ClauseType
+from services.ai import ContractSearchService
+from services.ai.orchestration import contract_service
+from services.ai.neo4j.neo4j_indexer import Neo4jIndexer
+from services.ai.storage import (
+    SQLiteContractStore,
+    close_contract_stores,
+    get_contract_store,
+)
+
+ACCOUNT = "account-1"
+TODAY = "2025-01-15"
+
+
+class FakeEmbedder:
+    """Embedder placing texts by their first word"""
+
+    WORDS = ["assignment", "compete", "exclusive"]
+
+    def vector(self, text):
+        first = text.split()[0].lower()
+        return [1.0 if word == first else 0.01 for word in self.WORDS]
+
+    def embed_query(self, text):
+        return self.vector(text)
+
+    def embed_many(self, texts):
+        return [self.vector(text) for text in texts]
+
+
+def days_from_today(days: int) -> str:
+    return (date.fromisoformat(TODAY) + timedelta(days=days)).isoformat()
+
+
+def agreement(envelope_id, clause_types=("Anti-Assignment",), **fields):
+    """Agreement keyed and summarized as ingestion does"""
+    json_data = {
+        "agreement": {
+            "agreement_name": f"Agreement {envelope_id}",
+            "agreement_type": "Supply",
+            "parties": [{"name": "Acme Corp", "role": "Supplier"}],
+            "clauses": [
+                {
+                    "clause_type": clause_type,
+                    "exists": True,
+                    "excerpts": [f"{clause_type.split('-')[-1]} excerpt"],
+                }
+                for clause_type in clause_types
+            ],
+            "risks": [],
+            "obligations": [],
+            **fields,
+        }
+    }
+    Neo4jIndexer()._tag_agreement(ACCOUNT, envelope_id, json_data)
+    return json_data["agreement"]
+
+
+def obligation(description, due_date, status="PENDING"):
+    return {
+        "description": description,
+        "due_date": due_date,
+        "recurring": False,
+        "status": status,
+        "reminder_days": 7,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteContractStore(tmp_path / "contracts.db", embedder=FakeEmbedder())
+    yield store
+    asyncio.run(store.close())
+
+
+def envelope_ids(records):
+    return [record["envelope_id"] for record in records]
+
+
+def test_reloads_after_writes_of_other_connections(store, tmp_path):
+    asyncio.run(store.write_agreements([agreement("envelope-1")]))
+    assert envelope_ids(asyncio.run(store.get_contract(ACCOUNT, "envelope-2"))) == []
+
+    # Another process writing to the same file changes data_version
+    other = SQLiteContractStore(tmp_path / "contracts.db")
+    asyncio.run(other.write_agreements([agreement("envelope-2")]))
+    asyncio.run(other.close())
+
+    assert envelope_ids(asyncio.run(store.get_contract(ACCOUNT, "envelope-2"))) == [
+        "envelope-2"
+    ]
+
+
+def test_own_writes_reset_the_indexes(store, tmp_path):
+    asyncio.run(store.write_agreements([agreement("envelope-1")]))
+    data_version = store._db.execute("PRAGMA data_version").fetchone()[0]
+    assert asyncio.run(store.search_similar_excerpts(ACCOUNT, "assignment")) == []
+
+    # The store's own commits leave data_version as it is
+    asyncio.run(store.write_agreements([agreement("envelope-2")]))
+    assert store._db.execute("PRAGMA data_version").fetchone()[0] == data_version
+    assert envelope_ids(asyncio.run(store.get_contract(ACCOUNT, "envelope-2"))) == [
+        "envelope-2"
+    ]
+
+    # Excerpts shared by both agreements are embedded once
+    asyncio.run(store.generate_embeddings())
+    assert store._db.execute("PRAGMA data_version").fetchone()[0] == data_version
+    records = asyncio.run(store.search_similar_excerpts(ACCOUNT, "assignment"))
+    assert sorted(envelope_ids(records)) == ["envelope-1", "envelope-2"]
+    assert {record["excerpt"] for record in records} == {"Assignment excerpt"}
+
+
+def test_updates_portfolio_on_reingestion(store, tmp_path):
+    asyncio.run(
+        store.write_agreements(
+            [
+                agreement("envelope-1", ["Anti-Assignment", "Non-Compete"]),
+                agreement("envelope-2", ["Non-Compete"]),
+            ]
+        )
+    )
+
+    def clause_types():
+        stats = asyncio.run(store.get_portfolio_stats(ACCOUNT, "clause_type"))
+        return {stat["name"]: stat["count"] for stat in stats}
+
+    assert clause_types() == {"Non-Compete": 2, "Anti-Assignment": 1}
+
+    # Re-ingestion replaces what the agreement counted before
+    asyncio.run(store.write_agreements([agreement("envelope-1", ["Exclusivity"])]))
+    assert clause_types() == {"Exclusivity": 1, "Non-Compete": 1}
+    assert asyncio.run(store.get_portfolio_stats(ACCOUNT, "agreements")) == [
+        {"name": "", "count": 2}
+    ]
+    parties = asyncio.run(
+        store.compare_contracts_by_party(ACCOUNT, "Acme", max_excerpts=1)
+    )
+    assert {row["clause_type"]: row["frequency"] for row in parties} == {
+        "Exclusivity": 1,
+        "Non-Compete": 1,
+    }
+
+    # The statistics are stored with the agreements
+    reopened = SQLiteContractStore(tmp_path / "contracts.db")
+    stats = asyncio.run(reopened.get_portfolio_stats(ACCOUNT, "clause_type"))
+    asyncio.run(reopened.close())
+    assert {stat["name"]: stat["count"] for stat in stats} == clause_types()
+
+
+def test_date_window_bounds(store):
+    asyncio.run(
+        store.write_agreements(
+            [
+                agreement(
+                    f"envelope-{days}",
+                    expiration_date=days_from_today(days),
+                    obligations=[
+                        obligation(f"Report {days}", days_from_today(days)),
+                        obligation(f"Done {days}", days_from_today(days), "COMPLETED"),
+                    ],
+                )
+                for days in (-1, 0, 10, 30, 31)
+            ]
+        )
+    )
+
+    # From today to days_ahead days after it, both included
+    expiring = asyncio.run(store.get_expiring_agreements(ACCOUNT, 30, TODAY))
+    assert envelope_ids(expiring) == ["envelope-0", "envelope-10", "envelope-30"]
+    assert [record["expires_on"] for record in expiring] == [
+        days_from_today(0),
+        days_from_today(10),
+        days_from_today(30),
+    ]
+    pending = asyncio.run(store.get_pending_obligations(ACCOUNT, 30, TODAY))
+    assert [record["o"]["description"] for record in pending] == [
+        "Report 0",
+        "Report 10",
+        "Report 30",
+    ]
+    assert envelope_ids(
+        asyncio.run(store.get_expiring_agreements(ACCOUNT, 0, TODAY))
+    ) == ["envelope-0"]
+
+    # Continuing after a sort key
+    after = [expiring[0]["expires_on"], expiring[0]["envelope_id"]]
+    assert envelope_ids(
+        asyncio.run(
+            store.get_expiring_agreements(ACCOUNT, 30, TODAY, after=after, limit=1)
+        )
+    ) == ["envelope-10"]
+
+
+def test_pages_with_keyset_cursors(store):
+    asyncio.run(
+        store.write_agreements(
+            [
+                agreement(f"envelope-{i}", obligations=[obligation("Report", due)])
+                for i, due in enumerate(
+                    # Two obligations due on the same day and one without date
+                    [days_from_today(5), days_from_today(1), days_from_today(5), None]
+                )
+            ]
+            + [agreement("envelope-9", ["Non-Compete"])]
+        )
+    )
+
+    # Store pages continue after the sort key of the last item
+    first = asyncio.run(
+        store.get_contracts_with_clause_type(ACCOUNT, "Anti-Assignment", limit=2)
+    )
+    assert envelope_ids(first) == ["envelope-0", "envelope-1"]
+    rest = asyncio.run(
+        store.get_contracts_with_clause_type(
+            ACCOUNT, "Anti-Assignment", after=["envelope-1"], limit=2
+        )
+    )
+    assert envelope_ids(rest) == ["envelope-2", "envelope-3"]
+
+    service = ContractSearchService(
+        uri=None, user=None, pwd=None, account_id=ACCOUNT, store=store
+    )
+    service._page_size = 2
+
+    def all_pages(method, *args, **kwargs):
+        items, cursors, cursor = [], [], None
+        while True:
+            page = asyncio.run(method(*args, cursor=cursor, **kwargs))
+            items.extend(page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return items, cursors
+            cursors.append(cursor)
+
+    agreements, cursors = all_pages(
+        service.get_contracts_with_clause_type, ClauseType.ANTI_ASSIGNMENT
+    )
+    assert [item["envelope_id"] for item in agreements] == [
+        f"envelope-{i}" for i in range(4)
+    ]
+    assert len(cursors) == 1
+
+    # Obligations due on the same day are told apart by their key
+    obligations, cursors = all_pages(service.get_upcoming_obligations, 30, today=TODAY)
+    assert [item["due_date"] for item in obligations] == [
+        days_from_today(1),
+        days_from_today(5),
+        days_from_today(5),
+    ]
+    assert len(cursors) == 1
+
+    with pytest.raises(ValueError):
+        asyncio.run(service.get_upcoming_obligations(30, cursor="not a cursor"))
+
+
+def test_contract_excerpts_come_with_the_summary(store):
+    asyncio.run(
+        store.write_agreements(
+            [agreement("envelope-1", ["Anti-Assignment", "Non-Compete"])]
+        )
+    )
+    service = ContractSearchService(
+        uri=None, user=None, pwd=None, account_id=ACCOUNT, store=store
+    )
+
+    contract = asyncio.run(service.get_contract_excerpts("envelope-1"))
+    assert contract["name"] == "Agreement envelope-1"
+    assert [party["name"] for party in contract["parties"]] == ["Acme Corp"]
+    assert contract["clauses"] == [
+        {"clause_type": "Anti-Assignment", "excerpts": ["Assignment excerpt"]},
+        {"clause_type": "Non-Compete", "excerpts": ["Compete excerpt"]},
+    ]
+    assert asyncio.run(service.get_contract_excerpts("envelope-2")) == {}
+
+
+def test_services_share_the_process_store(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "storage_backend", "sqlite")
+    monkeypatch.setattr(settings, "sqlite_store_path", str(tmp_path / "shared.db"))
+    contract_service._get_contract_services.cache_clear()
+
+    # Requests of the account reuse one service on the registry's store
+    service = contract_service.get_contract_service(ACCOUNT)
+    assert contract_service.get_contract_service(ACCOUNT) is service
+    assert service._store is get_contract_store()
+    assert contract_service.get_contract_service("account-2")._store is service._store
+
+    asyncio.run(close_contract_stores())
+    contract_service._get_contract_services.cache_clear()
@@ -4,6 +4,8 @@ from .file import (
     extract_json_from_string,
     save_json_string_to_file,
 )
+from .hashing import normalize_text, content_hash
+from .dates import parse_date
 from .formatters import (
     my_excerpt_record_formatter,
     my_vector_search_excerpt_record_formatter,
@@ -14,6 +16,9 @@ __all__ = [
     "read_text_file",
     "extract_json_from_string",
     "save_json_string_to_file",
+    "normalize_text",
+    "content_hash",
+    "parse_date",
     "my_excerpt_record_formatter",
     "my_vector_search_excerpt_record_formatter",
 ]
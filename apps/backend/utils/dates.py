@@ -0,0 +1,40 @@
+import re
+from datetime import datetime
+from typing import Optional
+
+# Formats seen in extracted agreements, tried in order. Numeric dates are read
+# month first, as US agreements write them.
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%m/%d/%y",
+    "%B %d %Y",
+    "%b %d %Y",
+    "%d %B %Y",
+    "%d %b %Y",
+    "%B %Y",
+]
+
+
+def parse_date(text) -> Optional[str]:
+    # ISO date (YYYY-MM-DD) of a free-form extracted date, None if unreadable
+    if not text:
+        return None
+    cleaned = str(text).strip()
+    # Timestamps keep their date part
+    match = re.match(r"(\d{4}-\d{2}-\d{2})[T ]", cleaned)
+    if match:
+        cleaned = match.group(1)
+    # "1st of January, 2024" -> "1 January 2024"
+    cleaned = re.sub(r"(\d+)(st|nd|rd|th)\b", r"\1", cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r"\b(day )?of\b", " ", cleaned, flags=re.IGNORECASE)
+    cleaned = " ".join(cleaned.replace(",", " ").replace(".", " ").split())
+
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
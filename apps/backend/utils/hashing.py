@@ -0,0 +1,14 @@
+import hashlib
+
+
+def normalize_text(text) -> str:
+    # Collapse whitespace and case so formatting differences hash the same
+    if text is None:
+        return ""
+    return " ".join(str(text).split()).lower()
+
+
+def content_hash(*parts) -> str:
+    # Stable SHA-256 over the normalized parts
+    joined = "\x1f".join(normalize_text(part) for part in parts)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()